@@ -1,8 +1,21 @@
-from typing import Any, Dict, Optional
-from fastapi import APIRouter, HTTPException, Query
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Union
+import asyncio
+import codecs
+import json
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+from email.message import Message
+import httpx
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 
+from app.core.compression import accepted_encodings
 from app.core.config import get_settings
-from app.etl.geodair_client import GeodairClient
+from app.core.http import get_http_client
+from app.core.responses import FastJSONResponse, RawJSONResponse, is_json, wrap_json_bytes
+from app.core.resilience import CircuitOpenError
+from app.core.singleflight import get_singleflight
+from app.etl.geodair_client import GeodairClient, merge_chunk_results
 
 router = APIRouter()
 
@@ -13,22 +26,176 @@ async def get_air_quality(
     start: str = Query(..., description="Datetime ISO de début, ex: 2025-01-01T00:00:00"),
     end: str = Query(..., description="Datetime ISO de fin, ex: 2025-01-02T00:00:00"),
     station: Optional[str] = Query(None, description="Code station (optionnel)"),
-) -> Dict[str, Any]:
+    http_client: Optional[httpx.AsyncClient] = Depends(get_http_client),
+) -> Response:
     settings = get_settings()
     client = GeodairClient(
         base_url=settings.GEODAIR_API_BASE_URL,
         api_key=settings.GEODAIR_API_KEY or None,
+        timeout_seconds=settings.UPSTREAM_TIMEOUT_SECONDS,
+        http_client=http_client,
     )
-    try:
-        result = await client.fetch_air_quality(
+
+    async def fetch_single() -> Tuple[str, bytes]:
+        # Single upstream call: its body is relayed without being decoded
+        return await client.fetch_air_quality_raw(
             pollutant_code=pollutant_code,
             start_datetime_iso=start,
             end_datetime_iso=end,
             station_code=station,
         )
+
+    async def fetch() -> Union[Dict[str, Any], Tuple[str, bytes]]:
+        try:
+            window = datetime.fromisoformat(end) - datetime.fromisoformat(start)
+        except (TypeError, ValueError):
+            # Unparseable bounds, or one with a UTC offset and one without: forwarded unchanged
+            window = timedelta(0)
+        if window <= timedelta(days=settings.GEODAIR_MAX_WINDOW_DAYS):
+            return await fetch_single()
+        # Long windows are split into chunks fetched concurrently, then reassembled in order
+        chunks = [
+            result
+            async for _, _, result in client.fetch_air_quality_range(
+                pollutant_code=pollutant_code,
+                start_datetime_iso=start,
+                end_datetime_iso=end,
+                station_code=station,
+                chunk=timedelta(days=settings.GEODAIR_CHUNK_DAYS),
+                concurrency=settings.GEODAIR_CHUNK_CONCURRENCY,
+            )
+        ]
+        merged = merge_chunk_results(chunks)
+        return merged if merged is not None else await fetch_single()
+
+    # Identical concurrent requests share one upstream call
+    flight_key = (pollutant_code, start, end, station)
+    try:
+        result = await get_singleflight("geodair").do(
+            flight_key,
+            fetch,
+            timeout=settings.UPSTREAM_COALESCE_TIMEOUT_SECONDS or None,
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Erreur Geod'air: délai d'attente dépassé")
+    except Exception as exc:
+        raise _geodair_http_error(exc)
+
+    if isinstance(result, tuple):
+        return _passthrough_response(*result)
+    return FastJSONResponse(result)
+
+
+def _passthrough_response(content_type: str, body: bytes) -> Response:
+    """
+    Même forme que `GeodairClient.fetch_air_quality` : {"data": <json>} ou {"content": <texte>}.
+    Un corps annoncé JSON n'est relayé tel quel qu'après validation : une page de
+    maintenance servie en application/json repart sous `content`.
+    """
+    if "json" in content_type.lower():
+        if is_json(body):
+            return RawJSONResponse(wrap_json_bytes("data", body))
+    else:
+        try:
+            return FastJSONResponse({"data": json.loads(body)})
+        except ValueError:
+            pass
+    return FastJSONResponse({"content": body.decode(_charset(content_type), errors="replace")})
+
+
+def _charset(content_type: str) -> str:
+    # Same rule as httpx's response.text: the declared charset if Python knows it, else utf-8
+    message = Message()
+    message["Content-Type"] = content_type
+    charset = message.get_content_charset()
+    if charset:
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+
+
+# Upstream headers relayed by the streaming proxy
+PROXIED_HEADERS = ("content-type", "content-disposition", "last-modified", "etag")
+# Upstream content codings relayed without decompression, by server preference
+PASSTHROUGH_ENCODINGS = ("br", "gzip")
+
+
+@router.get("/raw")
+async def proxy_air_quality(
+    pollutant_code: str = Query(..., description="Code du polluant (voir Geod'air)"),
+    start: str = Query(..., description="Datetime ISO de début, ex: 2025-01-01T00:00:00"),
+    end: str = Query(..., description="Datetime ISO de fin, ex: 2025-01-02T00:00:00"),
+    station: Optional[str] = Query(None, description="Code station (optionnel)"),
+    accept_encoding: Optional[str] = Header(None),
+    http_client: Optional[httpx.AsyncClient] = Depends(get_http_client),
+) -> StreamingResponse:
+    """
+    Proxy en streaming : le corps amont (JSON, CSV, fichier) est relayé morceau par
+    morceau avec son Content-Type, sans être chargé en mémoire. Si le client accepte
+    gzip ou brotli, un corps amont ainsi compressé est transmis sans décompression.
+    """
+    settings = get_settings()
+    client = GeodairClient(
+        base_url=settings.GEODAIR_API_BASE_URL,
+        api_key=settings.GEODAIR_API_KEY or None,
+        timeout_seconds=settings.UPSTREAM_TIMEOUT_SECONDS,
+        http_client=http_client,
+    )
+    # Encodings the client can decode; asked from upstream so its bytes can be relayed as-is
+    passthrough = (
+        accepted_encodings(accept_encoding, PASSTHROUGH_ENCODINGS) if settings.GEODAIR_PROXY_GZIP_PASSTHROUGH else []
+    )
+
+    # The upstream response must stay open until the last chunk has been relayed
+    stack = AsyncExitStack()
+    try:
+        upstream = await stack.enter_async_context(
+            client.stream_air_quality(
+                pollutant_code=pollutant_code,
+                start_datetime_iso=start,
+                end_datetime_iso=end,
+                station_code=station,
+                accept_encoding=", ".join(passthrough) or None,
+            )
+        )
     except Exception as exc:
-        raise HTTPException(status_code=502, detail=f"Erreur Geod'air: {exc}")
+        await stack.aclose()
+        raise _geodair_http_error(exc)
+
+    headers = {name: upstream.headers[name] for name in PROXIED_HEADERS if name in upstream.headers}
+    headers["Vary"] = "Accept-Encoding"
+    upstream_encoding = upstream.headers.get("content-encoding", "identity").lower()
+    if upstream_encoding in passthrough:
+        headers["Content-Encoding"] = upstream_encoding
+        chunks = upstream.aiter_raw()
+    else:
+        chunks = upstream.aiter_bytes()
+    if upstream_encoding == "identity" or "Content-Encoding" in headers:
+        # Bytes are relayed unchanged: the upstream length still holds
+        if "content-length" in upstream.headers:
+            headers["Content-Length"] = upstream.headers["content-length"]
 
-    return result
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await stack.aclose()
 
+    return StreamingResponse(body(), headers=headers)
 
+
+def _geodair_http_error(exc: Exception) -> HTTPException:
+    if isinstance(exc, HTTPException):
+        return exc
+    if isinstance(exc, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=f"Erreur Geod'air: {exc}",
+            headers={"Retry-After": str(int(exc.retry_after) + 1)},
+        )
+    return HTTPException(status_code=502, detail=f"Erreur Geod'air: {exc}")
@@ -1,19 +1,68 @@
-from typing import Any, Dict, Optional
-from fastapi import APIRouter, HTTPException, Query
-from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import httpx
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from datetime import date as date_type, datetime
+from functools import lru_cache
 
+from app.core.cache import ResponseCache, SQLiteCacheTier, etag_matches
 from app.core.config import get_settings
+from app.core.http import get_http_client
+from app.core.profiling import phase
+from app.core.resilience import CircuitOpenError
+from app.core.responses import FastJSONResponse
+from app.core.singleflight import get_singleflight
+from app.core.streaming import ndjson_response, wants_ndjson
 from app.etl.atmo_client import AtmoClient
+from app.etl.atmo_transform import DEFAULT_FIELDS, normalize_features, parse_fields
 
 router = APIRouter()
 
+# Upstream features normalized together (one date parse per distinct value per batch)
+NORMALIZE_BATCH_SIZE = 1000
+
+
+@lru_cache()
+def get_atmo_cache() -> ResponseCache:
+    settings = get_settings()
+    disk = None
+    if settings.ATMO_CACHE_SQLITE_PATH:
+        disk = SQLiteCacheTier(
+            settings.ATMO_CACHE_SQLITE_PATH,
+            max_rows=settings.ATMO_CACHE_SQLITE_MAX_ROWS,
+            retain_expired_seconds=settings.ATMO_CACHE_MAX_STALE_SECONDS,
+        )
+    return ResponseCache(max_entries=settings.ATMO_CACHE_MAX_ENTRIES, disk=disk)
+
+
+def close_atmo_cache() -> None:
+    if get_atmo_cache.cache_info().currsize:
+        get_atmo_cache().close()
+        get_atmo_cache.cache_clear()
+
+
+def _cache_ttl_seconds(d: date_type) -> int:
+    # Indices for past days are final; a window reaching today (or a forecast) may still change
+    settings = get_settings()
+    if d < date_type.today():
+        return settings.ATMO_CACHE_HISTORICAL_TTL_SECONDS
+    return settings.ATMO_CACHE_RECENT_TTL_SECONDS
+
 
 @router.get("/indices")
 async def get_atmo_indices(
+    response: Response,
     date: str = Query(..., description="date (YYYY-MM-DD)"),
     date_historique: str = Query(..., description="date_historique (YYYY-MM-DD)"),
     code_zone: Optional[str] = Query(None, description="code_zone"),
-) -> Dict[str, Any]:
+    fields: Optional[str] = Query(
+        None, description="Champs renvoyés, séparés par des virgules (défaut : date,code_qual), ex: date,code_qual,lib_zone"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    http_client: Optional[httpx.AsyncClient] = Depends(get_http_client),
+) -> Response:
     # Ensure chronological order: date_historique must be strictly before date
     try:
         d = datetime.fromisoformat(date).date()
@@ -22,49 +71,147 @@ async def get_atmo_indices(
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
     if not (dh < d):
         raise HTTPException(status_code=400, detail="'date_historique' must be strictly before 'date'.")
+    try:
+        field_names = parse_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    cache = get_atmo_cache()
+    cache_key = f"{d.isoformat()}|{dh.isoformat()}|{code_zone or ''}"
+    if field_names != list(DEFAULT_FIELDS):
+        cache_key += "|" + ",".join(field_names)
+    if wants_ndjson(accept):
+        return await _stream_indices(http_client, d, dh, code_zone, cache_key, field_names)
+    entry = await cache.aget(cache_key)
+    response.headers["X-Cache"] = "HIT" if entry is not None else "MISS"
+    if entry is None:
+        async def fetch_and_cache():
+            result = await _fetch_indices(http_client, d, dh, code_zone, field_names)
+            return await cache.aset(cache_key, result, ttl_seconds=_cache_ttl_seconds(d))
+
+        # Identical concurrent misses share one upstream call
+        try:
+            try:
+                entry = await get_singleflight("atmo").do(
+                    cache_key,
+                    fetch_and_cache,
+                    timeout=get_settings().UPSTREAM_COALESCE_TIMEOUT_SECONDS or None,
+                )
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=504, detail="ATMO error: upstream request timed out")
+        except HTTPException:
+            # Upstream down: serve a recently expired copy rather than an error, if we have one
+            entry = await cache.aget_stale(cache_key, get_settings().ATMO_CACHE_MAX_STALE_SECONDS)
+            if entry is None:
+                raise
+            response.headers["X-Cache"] = "STALE"
+            response.headers["Warning"] = '110 - "Response is Stale"'
+
+    cache_headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={entry.ttl_remaining}",
+        "Vary": "Accept",
+    }
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=cache_headers)
+    # Cached values are plain JSON: encoded directly, without jsonable_encoder
+    return FastJSONResponse(entry.value, headers={**response.headers, **cache_headers})
+
+
+async def _stream_indices(
+    http_client: Optional[httpx.AsyncClient],
+    d: date_type,
+    dh: date_type,
+    code_zone: Optional[str],
+    cache_key: str,
+    fields: List[str],
+) -> StreamingResponse:
+    """
+    Mode NDJSON (`Accept: application/x-ndjson`) : une ligne (champs `fields`)
+    par indice, envoyée par lots au fil du flux amont. Un cache chaud est
+    rejoué tel quel ; sinon le résultat complet est mis en cache en fin de flux.
+    Les requêtes identiques simultanées ne sont pas fusionnées dans ce mode.
+    """
+    cache = get_atmo_cache()
+    headers = {"Vary": "Accept", "X-Cache": "HIT"}
+    entry = await cache.aget(cache_key)
+    if entry is None:
+        async def stream_and_cache() -> AsyncIterator[List[Dict[str, Any]]]:
+            items = []
+            async for batch in _iter_indices(http_client, d, dh, code_zone, fields):
+                items.extend(batch)
+                yield batch
+            await cache.aset(cache_key, {"results": items}, ttl_seconds=_cache_ttl_seconds(d))
+
+        try:
+            return await ndjson_response(stream_and_cache(), headers={**headers, "X-Cache": "MISS"})
+        except Exception as exc:
+            entry = await cache.aget_stale(cache_key, get_settings().ATMO_CACHE_MAX_STALE_SECONDS)
+            if entry is None:
+                raise _atmo_http_error(exc)
+            headers.update({"X-Cache": "STALE", "Warning": '110 - "Response is Stale"'})
+
+    async def replay() -> AsyncIterator[List[Dict[str, Any]]]:
+        yield entry.value["results"]
+
+    return await ndjson_response(replay(), headers=headers)
+
+
+async def _iter_indices(
+    http_client: Optional[httpx.AsyncClient],
+    d: date_type,
+    dh: date_type,
+    code_zone: Optional[str],
+    fields: List[str],
+) -> AsyncIterator[List[Dict[str, Any]]]:
     settings = get_settings()
     client = AtmoClient(
         base_url=settings.ATMO_API_BASE_URL,
         username=settings.ATMO_USERNAME,
         password=settings.ATMO_PASSWORD,
+        timeout_seconds=settings.UPSTREAM_TIMEOUT_SECONDS,
+        http_client=http_client,
     )
+    # Stream the upstream payload; only one batch of feature properties is held in memory
+    batch: List[Dict[str, Any]] = []
+    async for props in client.iter_indices_atmo(
+        date=d.isoformat(),
+        date_historique=dh.isoformat(),
+        code_zone=code_zone,
+    ):
+        batch.append(props)
+        if len(batch) >= NORMALIZE_BATCH_SIZE:
+            with phase("transform"):
+                rows = normalize_features(batch, fields)
+            yield rows
+            batch = []
+    if batch:
+        with phase("transform"):
+            rows = normalize_features(batch, fields)
+        yield rows
 
-    try:
-        raw = await client.fetch_indices_atmo(
-            date=d.isoformat(),
-            date_historique=dh.isoformat(),
-            code_zone=code_zone,
+
+def _atmo_http_error(exc: Exception) -> HTTPException:
+    if isinstance(exc, HTTPException):
+        return exc
+    if isinstance(exc, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=f"ATMO error: {exc}",
+            headers={"Retry-After": str(int(exc.retry_after) + 1)},
         )
-        # Extract only normalized date (from date_maj) and code_qual
-        items = []
-        if isinstance(raw, dict):
-            features = raw.get("features") or []
-            for ft in features:
-                props = (ft or {}).get("properties") or {}
-                date_maj = props.get("date_maj")
-                code_qual = props.get("code_qual")
-                if date_maj is not None and code_qual is not None:
-                    try:
-                        dt = datetime.fromisoformat(str(date_maj).replace("Z", "+00:00"))
-                        norm_date = dt.date().isoformat()
-                    except Exception:
-                        norm_date = str(date_maj).split("T")[0] if "T" in str(date_maj) else str(date_maj)
-                    items.append({"date": norm_date, "code_qual": code_qual})
-        elif isinstance(raw, list):
-            for row in raw:
-                if not isinstance(row, dict):
-                    continue
-                date_maj = row.get("date_maj")
-                code_qual = row.get("code_qual")
-                if date_maj is not None and code_qual is not None:
-                    try:
-                        dt = datetime.fromisoformat(str(date_maj).replace("Z", "+00:00"))
-                        norm_date = dt.date().isoformat()
-                    except Exception:
-                        norm_date = str(date_maj).split("T")[0] if "T" in str(date_maj) else str(date_maj)
-                    items.append({"date": norm_date, "code_qual": code_qual})
-        return {"results": items}
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail=f"ATMO error: {exc}")
+    return HTTPException(status_code=502, detail=f"ATMO error: {exc}")
 
 
+async def _fetch_indices(
+    http_client: Optional[httpx.AsyncClient],
+    d: date_type,
+    dh: date_type,
+    code_zone: Optional[str],
+    fields: List[str],
+) -> Dict[str, Any]:
+    try:
+        batches = _iter_indices(http_client, d, dh, code_zone, fields)
+        return {"results": [item async for batch in batches for item in batch]}
+    except Exception as exc:
+        raise _atmo_http_error(exc)
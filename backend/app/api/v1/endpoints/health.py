@@ -1,5 +1,10 @@
 from fastapi import APIRouter
 
+from app.api.v1.endpoints.atmo import get_atmo_cache
+from app.core.resilience import get_circuit_breaker
+from app.core.singleflight import get_singleflight
+from app.etl.atmo_token_store import get_atmo_token_store
+
 router = APIRouter()
 
 
@@ -8,3 +13,11 @@ def health_check():
     return {"status": "ok"}
 
 
+@router.get("/health/upstreams")
+def upstreams_health():
+    return {
+        "circuit_breakers": {name: get_circuit_breaker(name).snapshot() for name in ("atmo", "geodair")},
+        "coalescing": {name: get_singleflight(name).snapshot() for name in ("atmo", "geodair")},
+        "atmo_cache": get_atmo_cache().snapshot(),
+        "atmo_token": get_atmo_token_store().snapshot(),
+    }
@@ -0,0 +1,260 @@
+import re
+from datetime import date as date_type, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.columnar import FORMATS, iter_columnar, pyarrow_available
+from app.core.config import get_settings
+from app.core.responses import FastJSONResponse
+from app.core.streaming import ndjson_response, wants_ndjson
+from app.db.deps import get_async_db
+from app.db.rollups import truncate_date
+from app.models import City, Indicator, IndicatorDailyRollup, IndicatorMonthlyRollup
+
+router = APIRouter()
+
+BUCKETS = ("day", "week", "month")
+BASIC_STATS = ("count", "min", "max", "avg")
+# p50, p95, p99.9...
+_PERCENTILE = re.compile(r"^p(\d{1,2}(?:\.\d+)?)$")
+
+
+def parse_stats(stats: List[str]) -> List[str]:
+    """Valide la liste d'agrégats demandés (`count`, `min`, `max`, `avg`, `pNN`)."""
+    parsed: List[str] = []
+    for stat in stats:
+        for name in (part.strip() for part in stat.split(",")):
+            if not name or name in parsed:
+                continue
+            match = _PERCENTILE.match(name)
+            if name not in BASIC_STATS and (match is None or not 0 < float(match.group(1)) < 100):
+                raise ValueError(f"Unknown statistic '{name}'. Use count, min, max, avg or pNN (e.g. p95).")
+            parsed.append(name)
+    return parsed
+
+
+# Tables an aggregated query can be answered from, finest first
+RAW = "raw"
+DAILY = "daily"
+MONTHLY = "monthly"
+ROLLUP_TABLES = {DAILY: IndicatorDailyRollup, MONTHLY: IndicatorMonthlyRollup}
+
+
+def _is_month_end(d: date_type) -> bool:
+    return (d + timedelta(days=1)).day == 1
+
+
+def plan_table(bucket: str, stats: List[str], start: Optional[date_type], end: Optional[date_type]) -> str:
+    """
+    Choisit la table la plus grossière capable de répondre exactement : les
+    percentiles exigent les valeurs brutes ; les buckets mensuels sur des mois
+    entiers peuvent lire l'agrégat mensuel ; le reste lit l'agrégat journalier.
+    """
+    if not get_settings().INDICATORS_USE_ROLLUPS or any(stat not in BASIC_STATS for stat in stats):
+        return RAW
+    whole_months = (start is None or start.day == 1) and (end is None or _is_month_end(end))
+    if bucket == "month" and whole_months:
+        return MONTHLY
+    return DAILY
+
+
+def _aggregate(stat: str, table: str):
+    if table == RAW:
+        if stat == "count":
+            return func.count(Indicator.value)
+        if stat in ("min", "max", "avg"):
+            return getattr(func, stat)(Indicator.value)
+        fraction = float(stat[1:]) / 100
+        return func.percentile_cont(fraction).within_group(Indicator.value.asc())
+    rollup = ROLLUP_TABLES[table]
+    if stat == "count":
+        return func.sum(rollup.value_count)
+    if stat == "min":
+        return func.min(rollup.value_min)
+    if stat == "max":
+        return func.max(rollup.value_max)
+    # Exact mean over the bucket, whatever the number of values per day
+    return func.sum(rollup.value_sum) / func.nullif(func.sum(rollup.value_count), 0)
+
+
+def build_timeseries_query(
+    dialect: str,
+    bucket: str,
+    stats: List[str],
+    cities: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    source: Optional[str] = None,
+    start: Optional[date_type] = None,
+    end: Optional[date_type] = None,
+    table: str = RAW,
+) -> Select:
+    """
+    Agrégation GROUP BY (ville, type, bucket) des indicateurs filtrés, triée par
+    série puis par date, lue dans `table` (voir `plan_table`). Les percentiles
+    utilisent `percentile_cont` (PostgreSQL).
+    """
+    model = Indicator if table == RAW else ROLLUP_TABLES[table]
+    day = Indicator.date if table == RAW else model.period
+    bucket_col = truncate_date(dialect, bucket, day).label("bucket")
+    stmt = select(
+        City.insee_code,
+        model.type,
+        bucket_col,
+        *(_aggregate(stat, table).label(stat) for stat in stats),
+    ).join(City, City.id == model.city_id)
+    if cities:
+        stmt = stmt.where(City.insee_code.in_(cities))
+    if types:
+        stmt = stmt.where(model.type.in_(types))
+    if source:
+        stmt = stmt.where(model.source == source)
+    if start:
+        stmt = stmt.where(day >= start)
+    if end:
+        stmt = stmt.where(day <= end)
+    return stmt.group_by(City.insee_code, model.type, bucket_col).order_by(City.insee_code, model.type, bucket_col)
+
+
+def _isoformat(value: Any) -> str:
+    return value.isoformat() if isinstance(value, date_type) else str(value)
+
+
+def _point(row: Row, stats: List[str]) -> Dict[str, Any]:
+    point = {"date": _isoformat(row.bucket)}
+    for stat in stats:
+        point[stat] = row._mapping[stat]
+    return point
+
+
+async def iter_row_batches(db: AsyncSession, stmt: Select, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+    # Server-side cursor: only `batch_size` rows are held in memory at a time
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    async for rows in result.partitions(batch_size):
+        yield rows
+
+
+@router.get("")
+async def get_indicators(
+    response: Response,
+    city: Optional[List[str]] = Query(None, description="Code(s) INSEE de ville"),
+    type: Optional[List[str]] = Query(None, description="Type(s) d'indicateur, ex: atmo_indice"),
+    source: Optional[str] = Query(None, description="Source, ex: atmo ou geodair"),
+    start: Optional[date_type] = Query(None, description="Premier jour inclus (YYYY-MM-DD)"),
+    end: Optional[date_type] = Query(None, description="Dernier jour inclus (YYYY-MM-DD)"),
+    bucket: str = Query("day", description="Granularité : day, week ou month"),
+    stats: List[str] = Query(["avg", "min", "max"], description="Agrégats : count, min, max, avg, pNN"),
+    limit: int = Query(1000, ge=1, le=10000, description="Nombre maximal de points renvoyés"),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    if bucket not in BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Invalid bucket. Use one of: {', '.join(BUCKETS)}.")
+    try:
+        stat_names = parse_stats(stats)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not stat_names:
+        raise HTTPException(status_code=400, detail="At least one statistic is required.")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="'start' must not be after 'end'.")
+
+    table = plan_table(bucket, stat_names, start, end)
+    response.headers["X-Indicators-Table"] = table
+    stmt = build_timeseries_query(
+        db.get_bind().dialect.name,
+        bucket,
+        stat_names,
+        cities=city,
+        types=type,
+        source=source,
+        start=start,
+        end=end,
+        table=table,
+    )
+    if wants_ndjson(accept):
+        # One line per point, flat: {"insee_code", "type", "date", <stats>...}
+        async def points() -> AsyncIterator[List[Dict[str, Any]]]:
+            async for rows in iter_row_batches(db, stmt.limit(limit), batch_size=1000):
+                yield [{"insee_code": row.insee_code, "type": row.type, **_point(row, stat_names)} for row in rows]
+
+        return await ndjson_response(points(), headers={"X-Indicators-Table": table})
+
+    # One extra row tells whether the result was cut off
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    truncated = len(rows) > limit
+
+    series: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows[:limit]:
+        key = (row.insee_code, row.type)
+        if key not in series:
+            series[key] = {"insee_code": row.insee_code, "type": row.type, "points": []}
+        series[key]["points"].append(_point(row, stat_names))
+
+    return FastJSONResponse(
+        {"bucket": bucket, "stats": stat_names, "truncated": truncated, "series": list(series.values())},
+        headers=dict(response.headers),
+    )
+
+
+EXPORT_FIELDS = (
+    ("insee_code", "string"),
+    ("type", "string"),
+    ("source", "string"),
+    ("date", "date32"),
+    ("value", "float64"),
+)
+
+
+def build_export_query(
+    cities: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    source: Optional[str] = None,
+    start: Optional[date_type] = None,
+    end: Optional[date_type] = None,
+) -> Select:
+    """Lignes brutes filtrées, dans l'ordre de l'index (city_id, type, date)."""
+    stmt = select(City.insee_code, Indicator.type, Indicator.source, Indicator.date, Indicator.value).join(
+        City, City.id == Indicator.city_id
+    )
+    if cities:
+        stmt = stmt.where(City.insee_code.in_(cities))
+    if types:
+        stmt = stmt.where(Indicator.type.in_(types))
+    if source:
+        stmt = stmt.where(Indicator.source == source)
+    if start:
+        stmt = stmt.where(Indicator.date >= start)
+    if end:
+        stmt = stmt.where(Indicator.date <= end)
+    return stmt.order_by(Indicator.city_id, Indicator.type, Indicator.date)
+
+
+@router.get("/export")
+async def export_indicators(
+    format: str = Query("arrow", description="arrow (Arrow IPC stream) ou parquet"),
+    city: Optional[List[str]] = Query(None, description="Code(s) INSEE de ville"),
+    type: Optional[List[str]] = Query(None, description="Type(s) d'indicateur, ex: atmo_indice"),
+    source: Optional[str] = Query(None, description="Source, ex: atmo ou geodair"),
+    start: Optional[date_type] = Query(None, description="Premier jour inclus (YYYY-MM-DD)"),
+    end: Optional[date_type] = Query(None, description="Dernier jour inclus (YYYY-MM-DD)"),
+    batch_size: int = Query(50000, ge=1000, le=500000, description="Lignes par lot (RecordBatch / row group)"),
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Use one of: {', '.join(FORMATS)}.")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="'start' must not be after 'end'.")
+    if not pyarrow_available():
+        raise HTTPException(status_code=501, detail="Columnar export requires the optional 'pyarrow' package.")
+
+    stmt = build_export_query(cities=city, types=type, source=source, start=start, end=end)
+    extension = "arrow" if format == "arrow" else "parquet"
+    return StreamingResponse(
+        iter_columnar(iter_row_batches(db, stmt, batch_size), EXPORT_FIELDS, format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="indicators.{extension}"'},
+    )
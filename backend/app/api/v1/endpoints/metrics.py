@@ -0,0 +1,74 @@
+from typing import Iterator
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.api.v1.endpoints.atmo import get_atmo_cache
+from app.core.metrics import CONTENT_TYPE, REGISTRY, Family, Sample
+from app.core.resilience import OPEN, get_circuit_breaker
+from app.db.session import get_async_engine, get_engine
+
+router = APIRouter()
+
+UPSTREAMS = ("atmo", "geodair")
+
+
+def cache_families() -> Iterator[Family]:
+    cache = get_atmo_cache()
+    stats = cache.stats
+    yield (
+        "atmo_cache_requests_total",
+        "counter",
+        "Lectures du cache ATMO par résultat",
+        [
+            ("atmo_cache_requests_total", {"result": result}, stats[key])
+            for result, key in (("hit", "hits"), ("disk_hit", "disk_hits"), ("miss", "misses"), ("stale", "stale_hits"))
+        ],
+    )
+    yield "atmo_cache_hit_ratio", "gauge", "Part des lectures servies par le cache ATMO", [
+        ("atmo_cache_hit_ratio", {}, cache.hit_ratio)
+    ]
+
+
+def breaker_families() -> Iterator[Family]:
+    yield "upstream_circuit_open", "gauge", "1 si le disjoncteur de l'amont est ouvert", [
+        ("upstream_circuit_open", {"upstream": name}, float(get_circuit_breaker(name).state == OPEN))
+        for name in UPSTREAMS
+    ]
+
+
+def _pool_samples(engine_label: str, pool) -> Iterator[Sample]:
+    # Only QueuePool-like pools expose their usage (not StaticPool / NullPool)
+    if not all(hasattr(pool, attr) for attr in ("size", "checkedout", "checkedin", "overflow")):
+        return
+    labels = {"engine": engine_label}
+    yield "db_pool_size", labels, pool.size()
+    yield "db_pool_checked_out", labels, pool.checkedout()
+    yield "db_pool_checked_in", labels, pool.checkedin()
+    yield "db_pool_overflow", labels, pool.overflow()
+
+
+def db_pool_families() -> Iterator[Family]:
+    # Never builds an engine: a process that has not touched the database reports nothing
+    samples = []
+    if get_engine.cache_info().currsize:
+        samples.extend(_pool_samples("sync", get_engine().pool))
+    if get_async_engine.cache_info().currsize:
+        samples.extend(_pool_samples("async", get_async_engine().sync_engine.pool))
+    documentation = {
+        "db_pool_size": "Taille nominale du pool de connexions",
+        "db_pool_checked_out": "Connexions empruntées au pool",
+        "db_pool_checked_in": "Connexions disponibles dans le pool",
+        "db_pool_overflow": "Connexions ouvertes au-delà de la taille du pool",
+    }
+    for name, text in documentation.items():
+        yield name, "gauge", text, [sample for sample in samples if sample[0] == name]
+
+
+for collector in (cache_families, breaker_families, db_pool_families):
+    REGISTRY.register_collector(collector)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
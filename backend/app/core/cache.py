@@ -0,0 +1,228 @@
+"""
+Cache de réponses TTL + LRU, en mémoire avec un niveau SQLite optionnel.
+
+Les valeurs doivent être sérialisables en JSON : l'ETag est calculé sur leur
+forme sérialisée et le niveau disque les stocke telles quelles.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+
+class CacheEntry:
+    __slots__ = ("value", "etag", "expires_at")
+
+    def __init__(self, value: Any, etag: str, expires_at: float) -> None:
+        self.value = value
+        self.etag = etag
+        self.expires_at = expires_at
+
+    @property
+    def ttl_remaining(self) -> int:
+        return max(0, int(self.expires_at - time.time()))
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) < self.expires_at
+
+
+def compute_etag(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return '"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+
+
+class SQLiteCacheTier:
+    """
+    Niveau persistant : survit aux redémarrages et est partagé entre workers d'une même machine.
+
+    Le fichier reste borné : toutes les `purge_every` écritures, les entrées
+    expirées depuis plus de `retain_expired_seconds` (fenêtre de secours
+    "stale") sont supprimées, puis les plus proches de l'expiration au-delà de
+    `max_rows` lignes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_rows: int = 10000,
+        retain_expired_seconds: float = 24 * 3600,
+        purge_every: int = 100,
+    ) -> None:
+        self.path = path
+        self.max_rows = max_rows
+        self.retain_expired_seconds = retain_expired_seconds
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, etag TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, etag, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2])
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, etag, expires_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(entry.value, default=str), entry.etag, entry.expires_at),
+            )
+            self._writes += 1
+            due = self._writes % self.purge_every == 0
+        if due:
+            self.purge()
+
+    def purge_expired(self, older_than: float) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (older_than,))
+
+    def purge(self) -> None:
+        self.purge_expired(time.time() - self.retain_expired_seconds)
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                " SELECT key FROM response_cache ORDER BY expires_at"
+                " LIMIT max(0, (SELECT count(*) FROM response_cache) - ?))",
+                (self.max_rows,),
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM response_cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 512, disk: Optional[SQLiteCacheTier] = None) -> None:
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0, "stale_hits": 0, "evictions": 0}
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = self.stats["hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "hit_ratio": round(self.hit_ratio, 4)}
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Entrée encore fraîche pour `key`, sinon None (compté comme un miss)."""
+        now = time.time()
+        entry = self._get_memory(key, now)
+        if entry is None and self.disk is not None:
+            entry = self._promote(key, self.disk.get(key), now)
+        return self._count(entry)
+
+    async def aget(self, key: str) -> Optional[CacheEntry]:
+        """Comme `get`, la lecture disque éventuelle s'exécutant hors de la boucle d'événements."""
+        now = time.time()
+        entry = self._get_memory(key, now)
+        if entry is None and self.disk is not None:
+            entry = self._promote(key, await run_in_threadpool(self.disk.get, key), now)
+        return self._count(entry)
+
+    def get_stale(self, key: str, max_stale_seconds: float) -> Optional[CacheEntry]:
+        """
+        Entrée expirée depuis moins de `max_stale_seconds`, servie en secours
+        quand l'amont est indisponible.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+        return self._check_stale(entry, max_stale_seconds)
+
+    async def aget_stale(self, key: str, max_stale_seconds: float) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.disk is not None:
+            entry = await run_in_threadpool(self.disk.get, key)
+        return self._check_stale(entry, max_stale_seconds)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> CacheEntry:
+        entry = CacheEntry(value, compute_etag(value), time.time() + ttl_seconds)
+        self._store(key, entry)
+        if self.disk is not None:
+            self.disk.set(key, entry)
+        return entry
+
+    async def aset(self, key: str, value: Any, ttl_seconds: float) -> CacheEntry:
+        entry = CacheEntry(value, compute_etag(value), time.time() + ttl_seconds)
+        self._store(key, entry)
+        if self.disk is not None:
+            await run_in_threadpool(self.disk.set, key, entry)
+        return entry
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+    def _get_memory(self, key: str, now: float) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.is_fresh(now):
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry
+        return None
+
+    def _promote(self, key: str, entry: Optional[CacheEntry], now: float) -> Optional[CacheEntry]:
+        if entry is None or not entry.is_fresh(now):
+            return None
+        self._store(key, entry)
+        with self._lock:
+            self.stats["disk_hits"] += 1
+        return entry
+
+    def _count(self, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        if entry is None:
+            with self._lock:
+                self.stats["misses"] += 1
+        return entry
+
+    def _check_stale(self, entry: Optional[CacheEntry], max_stale_seconds: float) -> Optional[CacheEntry]:
+        if entry is None or time.time() - entry.expires_at > max_stale_seconds:
+            return None
+        with self._lock:
+            self.stats["stale_hits"] += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
@@ -0,0 +1,104 @@
+"""
+Sérialisation en colonnes (Apache Arrow IPC, Parquet) par lots, pour les
+exports volumineux : chaque lot de lignes lu en base devient un RecordBatch
+(un row group en Parquet) dont les octets sont émis aussitôt, sans
+matérialiser tout le résultat.
+
+`pyarrow` est une dépendance optionnelle (`pip install pyarrow`).
+"""
+from typing import Any, AsyncIterator, List, Sequence, Tuple
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+FORMATS = {"arrow": ARROW_MEDIA_TYPE, "parquet": PARQUET_MEDIA_TYPE}
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ChunkSink:
+    """Fichier en écriture seule dont le contenu est vidé après chaque lot."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def iter_columnar(
+    batches: AsyncIterator[Sequence[Tuple[Any, ...]]],
+    fields: Sequence[Tuple[str, str]],
+    fmt: str,
+) -> AsyncIterator[bytes]:
+    """
+    Encode les lots de tuples `batches` au format `fmt` ("arrow" ou "parquet").
+    `fields` : (nom de colonne, nom du type pyarrow) pour chaque colonne, ex. ("date", "date32").
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in fields])
+    sink = ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+
+        def write(batch: "pa.RecordBatch") -> None:
+            writer.write_table(pa.Table.from_batches([batch], schema=schema))
+
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+
+    try:
+        # The Arrow stream header (schema) goes out before the first row is read
+        header = sink.drain()
+        if header:
+            yield header
+        async for rows in batches:
+            if not rows:
+                continue
+            columns = list(zip(*rows))
+            write(
+                pa.record_batch(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                    schema=schema,
+                )
+            )
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
@@ -0,0 +1,134 @@
+"""
+Compression des réponses (brotli, gzip) négociée avec `Accept-Encoding`.
+
+Les corps de moins de `minimum_size` octets partent tels quels. Les réponses
+en streaming (NDJSON, exports) sont compressées morceau par morceau, avec un
+flush après chaque morceau pour ne pas retarder les premières lignes. Une
+réponse qui porte déjà un `Content-Encoding` (corps amont relayé compressé)
+n'est jamais recompressée.
+
+Brotli nécessite le paquet optionnel `brotli` ou `brotlicffi` ; sans lui,
+seul gzip est proposé.
+"""
+from typing import Dict, List, Optional, Sequence
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli (or brotlicffi)
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Already compressed, or must not be buffered by a compressor
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/vnd.apache.parquet",
+    "application/gzip",
+    "application/zip",
+    "image/",
+)
+
+
+def available_encodings() -> List[str]:
+    """Encodages proposés, par ordre de préférence du serveur."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def parse_accept_encoding(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """`{"gzip": 1.0, "br": 0.5, ...}` à partir de l'en-tête `Accept-Encoding`."""
+    preferences: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        preferences[coding] = quality
+    return preferences
+
+
+def accepted_encodings(accept_encoding: Optional[str], supported: Sequence[str]) -> List[str]:
+    """Encodages de `supported` acceptés par le client, du plus au moins préféré."""
+    preferences = parse_accept_encoding(accept_encoding)
+    default = preferences.get("*", 0.0)
+    ranked = [(preferences.get(coding, default), -index, coding) for index, coding in enumerate(supported)]
+    return [coding for quality, _, coding in sorted(ranked, reverse=True) if quality > 0]
+
+
+class _ExcludedTypesMixin:
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            await super().send_with_compression(message)
+            self.content_type_is_excluded = content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            return
+        await super().send_with_compression(message)
+
+
+class _GzipResponder(_ExcludedTypesMixin, GZipResponder):
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            # Sync flush: the client can decode every chunk as soon as it arrives
+            self.gzip_file.write(body)
+            self.gzip_file.flush()
+            chunk = self.gzip_buffer.getvalue()
+            self.gzip_buffer.seek(0)
+            self.gzip_buffer.truncate()
+            return chunk
+        return super().apply_compression(body, more_body=more_body)
+
+
+class _BrotliResponder(_ExcludedTypesMixin, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        chunk = self.compressor.process(body)
+        if more_body:
+            return chunk + self.compressor.flush()
+        return chunk + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        encoding = accepted[0] if accepted else None
+        if encoding == "br":
+            responder: ASGIApp = _BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif encoding == "gzip":
+            responder = _GzipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = self.app
+        await responder(scope, receive, send)
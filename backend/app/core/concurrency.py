@@ -0,0 +1,99 @@
+"""
+Limiteur de concurrence adaptatif (AIMD) pour les appels amont en masse.
+
+La limite augmente d'une unité après une « fenêtre » de succès et est divisée
+par deux dès que l'amont signale une surcharge (429 ou 5xx), à la manière du
+contrôle de congestion TCP.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from app.core.resilience import retry_after_header
+
+T = TypeVar("T")
+
+
+def is_overload(exc: BaseException) -> bool:
+    """Erreur amont qui justifie de ralentir (et de réessayer)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, (httpx.TimeoutException, httpx.TransportError))
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return retry_after_header(exc.response)
+    return None
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 16) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.in_flight = 0
+        self._successes = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self.stats: Dict[str, int] = {"acquired": 0, "backoffs": 0, "increases": 0}
+
+    def _cond(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self) -> None:
+        cond = self._cond()
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self.stats["acquired"] += 1
+
+    async def release(self, overloaded: bool = False) -> None:
+        cond = self._cond()
+        async with cond:
+            self.in_flight -= 1
+            if overloaded:
+                self._successes = 0
+                new_limit = max(self.min_limit, self.limit // 2)
+                if new_limit < self.limit:
+                    self.stats["backoffs"] += 1
+                self.limit = new_limit
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self._successes = 0
+                    self.limit += 1
+                    self.stats["increases"] += 1
+            cond.notify_all()
+
+
+async def call_with_backoff(
+    limiter: AdaptiveLimiter,
+    call: Callable[[], Awaitable[T]],
+    max_attempts: int = 3,
+    backoff_seconds: float = 1.0,
+) -> T:
+    """
+    Exécute `call` sous `limiter`. Une surcharge amont (429, 5xx, timeout)
+    réduit la limite et est réessayée après `Retry-After` ou un backoff
+    exponentiel, jusqu'à `max_attempts` tentatives ; toute autre erreur, ou
+    la dernière, est levée.
+    """
+    for attempt in range(1, max_attempts + 1):
+        await limiter.acquire()
+        try:
+            result = await call()
+        except Exception as exc:
+            overloaded = is_overload(exc)
+            await limiter.release(overloaded=overloaded)
+            if not overloaded or attempt == max_attempts:
+                raise
+            delay = retry_after_seconds(exc)
+            await asyncio.sleep(delay if delay is not None else backoff_seconds * 2 ** (attempt - 1))
+        else:
+            await limiter.release()
+            return result
+    raise ValueError("max_attempts must be >= 1")
@@ -10,12 +10,56 @@ class Settings(BaseModel):
     POSTGRES_DB: str = "observatoire_citadin"
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
     GEODAIR_API_BASE_URL: str = "https://www.geodair.fr"
     GEODAIR_API_KEY: str = ""
+    GEODAIR_MAX_WINDOW_DAYS: int = 7
+    GEODAIR_CHUNK_DAYS: int = 1
+    GEODAIR_CHUNK_CONCURRENCY: int = 4
+    GEODAIR_PROXY_GZIP_PASSTHROUGH: bool = True
     ATMO_API_BASE_URL: str = "https://admindata.atmo-france.org"
     ATMO_API_KEY: str = ""
     ATMO_USERNAME: str = ""
     ATMO_PASSWORD: str = ""
+    ATMO_TOKEN_CACHE_FILE: str = ""
+    ATMO_TOKEN_REFRESH_MARGIN_SECONDS: int = 1800
+    ATMO_CACHE_MAX_ENTRIES: int = 512
+    ATMO_CACHE_HISTORICAL_TTL_SECONDS: int = 7 * 24 * 3600
+    ATMO_CACHE_RECENT_TTL_SECONDS: int = 600
+    ATMO_CACHE_SQLITE_PATH: str = ""
+    ATMO_CACHE_SQLITE_MAX_ROWS: int = 10000
+    ATMO_CACHE_MAX_STALE_SECONDS: int = 24 * 3600
+    ETL_CHUNK_SIZE: int = 1000
+    INDICATORS_USE_ROLLUPS: bool = True
+    UPSTREAM_TIMEOUT_SECONDS: float = 30.0
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    UPSTREAM_KEEPALIVE_EXPIRY: float = 30.0
+    UPSTREAM_MAX_CONNECTIONS_PER_HOST: int = 20
+    UPSTREAM_HTTP2: bool = False
+    UPSTREAM_COALESCE_TIMEOUT_SECONDS: float = 30.0
+    UPSTREAM_RETRY_ATTEMPTS: int = 3
+    UPSTREAM_RETRY_BASE_DELAY_SECONDS: float = 0.2
+    UPSTREAM_RETRY_MAX_DELAY_SECONDS: float = 2.0
+    UPSTREAM_BREAKER_FAILURE_THRESHOLD: int = 5
+    UPSTREAM_BREAKER_RESET_SECONDS: float = 30.0
+    UPSTREAM_HEDGE_ENABLED: bool = False
+    UPSTREAM_HEDGE_QUANTILE: float = 0.95
+    UPSTREAM_HEDGE_MIN_DELAY_SECONDS: float = 0.05
+    UPSTREAM_HEDGE_MIN_SAMPLES: int = 20
+    UPSTREAM_HEDGE_BUDGET_RATIO: float = 0.05
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+    PROFILING_SECRET: str = ""
+    PROFILING_OUTPUT_DIR: str = ""
+    PROFILING_INTERVAL_SECONDS: float = 0.001
 
     @property
     def sqlalchemy_database_uri(self) -> str:
@@ -26,22 +70,110 @@ class Settings(BaseModel):
         db = self.POSTGRES_DB
         return f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{db}"
 
+    @property
+    def sqlalchemy_async_database_uri(self) -> str:
+        return self.sqlalchemy_database_uri.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+
 
 @lru_cache()
 def get_settings() -> Settings:
     load_dotenv(override=False)
+    # Field defaults, built once (not once per field)
+    defaults = Settings()
     return Settings(
-        POSTGRES_HOST=os.getenv("POSTGRES_HOST", Settings().POSTGRES_HOST),
-        POSTGRES_PORT=int(os.getenv("POSTGRES_PORT", Settings().POSTGRES_PORT)),
-        POSTGRES_DB=os.getenv("POSTGRES_DB", Settings().POSTGRES_DB),
-        POSTGRES_USER=os.getenv("POSTGRES_USER", Settings().POSTGRES_USER),
-        POSTGRES_PASSWORD=os.getenv("POSTGRES_PASSWORD", Settings().POSTGRES_PASSWORD),
-        GEODAIR_API_BASE_URL=os.getenv("GEODAIR_API_BASE_URL", Settings().GEODAIR_API_BASE_URL),
-        GEODAIR_API_KEY=os.getenv("GEODAIR_API_KEY", Settings().GEODAIR_API_KEY),
-        ATMO_API_BASE_URL=os.getenv("ATMO_API_BASE_URL", Settings().ATMO_API_BASE_URL),
-        ATMO_API_KEY=os.getenv("ATMO_API_KEY", Settings().ATMO_API_KEY),
-        ATMO_USERNAME=os.getenv("ATMO_USERNAME", Settings().ATMO_USERNAME),
-        ATMO_PASSWORD=os.getenv("ATMO_PASSWORD", Settings().ATMO_PASSWORD),
+        POSTGRES_HOST=os.getenv("POSTGRES_HOST", defaults.POSTGRES_HOST),
+        POSTGRES_PORT=int(os.getenv("POSTGRES_PORT", defaults.POSTGRES_PORT)),
+        POSTGRES_DB=os.getenv("POSTGRES_DB", defaults.POSTGRES_DB),
+        POSTGRES_USER=os.getenv("POSTGRES_USER", defaults.POSTGRES_USER),
+        POSTGRES_PASSWORD=os.getenv("POSTGRES_PASSWORD", defaults.POSTGRES_PASSWORD),
+        DB_POOL_SIZE=int(os.getenv("DB_POOL_SIZE", defaults.DB_POOL_SIZE)),
+        DB_MAX_OVERFLOW=int(os.getenv("DB_MAX_OVERFLOW", defaults.DB_MAX_OVERFLOW)),
+        DB_POOL_RECYCLE_SECONDS=int(os.getenv("DB_POOL_RECYCLE_SECONDS", defaults.DB_POOL_RECYCLE_SECONDS)),
+        DB_POOL_TIMEOUT_SECONDS=float(os.getenv("DB_POOL_TIMEOUT_SECONDS", defaults.DB_POOL_TIMEOUT_SECONDS)),
+        GEODAIR_API_BASE_URL=os.getenv("GEODAIR_API_BASE_URL", defaults.GEODAIR_API_BASE_URL),
+        GEODAIR_API_KEY=os.getenv("GEODAIR_API_KEY", defaults.GEODAIR_API_KEY),
+        GEODAIR_MAX_WINDOW_DAYS=int(os.getenv("GEODAIR_MAX_WINDOW_DAYS", defaults.GEODAIR_MAX_WINDOW_DAYS)),
+        GEODAIR_CHUNK_DAYS=int(os.getenv("GEODAIR_CHUNK_DAYS", defaults.GEODAIR_CHUNK_DAYS)),
+        GEODAIR_CHUNK_CONCURRENCY=int(os.getenv("GEODAIR_CHUNK_CONCURRENCY", defaults.GEODAIR_CHUNK_CONCURRENCY)),
+        GEODAIR_PROXY_GZIP_PASSTHROUGH=os.getenv(
+            "GEODAIR_PROXY_GZIP_PASSTHROUGH", str(defaults.GEODAIR_PROXY_GZIP_PASSTHROUGH)
+        ).lower() in ("1", "true", "yes"),
+        ATMO_API_BASE_URL=os.getenv("ATMO_API_BASE_URL", defaults.ATMO_API_BASE_URL),
+        ATMO_API_KEY=os.getenv("ATMO_API_KEY", defaults.ATMO_API_KEY),
+        ATMO_USERNAME=os.getenv("ATMO_USERNAME", defaults.ATMO_USERNAME),
+        ATMO_PASSWORD=os.getenv("ATMO_PASSWORD", defaults.ATMO_PASSWORD),
+        ATMO_TOKEN_CACHE_FILE=os.getenv("ATMO_TOKEN_CACHE_FILE", defaults.ATMO_TOKEN_CACHE_FILE),
+        ATMO_TOKEN_REFRESH_MARGIN_SECONDS=int(
+            os.getenv("ATMO_TOKEN_REFRESH_MARGIN_SECONDS", defaults.ATMO_TOKEN_REFRESH_MARGIN_SECONDS)
+        ),
+        ATMO_CACHE_MAX_ENTRIES=int(os.getenv("ATMO_CACHE_MAX_ENTRIES", defaults.ATMO_CACHE_MAX_ENTRIES)),
+        ATMO_CACHE_HISTORICAL_TTL_SECONDS=int(
+            os.getenv("ATMO_CACHE_HISTORICAL_TTL_SECONDS", defaults.ATMO_CACHE_HISTORICAL_TTL_SECONDS)
+        ),
+        ATMO_CACHE_RECENT_TTL_SECONDS=int(
+            os.getenv("ATMO_CACHE_RECENT_TTL_SECONDS", defaults.ATMO_CACHE_RECENT_TTL_SECONDS)
+        ),
+        ATMO_CACHE_SQLITE_PATH=os.getenv("ATMO_CACHE_SQLITE_PATH", defaults.ATMO_CACHE_SQLITE_PATH),
+        ATMO_CACHE_SQLITE_MAX_ROWS=int(os.getenv("ATMO_CACHE_SQLITE_MAX_ROWS", defaults.ATMO_CACHE_SQLITE_MAX_ROWS)),
+        ATMO_CACHE_MAX_STALE_SECONDS=int(
+            os.getenv("ATMO_CACHE_MAX_STALE_SECONDS", defaults.ATMO_CACHE_MAX_STALE_SECONDS)
+        ),
+        ETL_CHUNK_SIZE=int(os.getenv("ETL_CHUNK_SIZE", defaults.ETL_CHUNK_SIZE)),
+        INDICATORS_USE_ROLLUPS=os.getenv(
+            "INDICATORS_USE_ROLLUPS", str(defaults.INDICATORS_USE_ROLLUPS)
+        ).lower() in ("1", "true", "yes"),
+        UPSTREAM_TIMEOUT_SECONDS=float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", defaults.UPSTREAM_TIMEOUT_SECONDS)),
+        UPSTREAM_MAX_CONNECTIONS=int(os.getenv("UPSTREAM_MAX_CONNECTIONS", defaults.UPSTREAM_MAX_CONNECTIONS)),
+        UPSTREAM_MAX_KEEPALIVE_CONNECTIONS=int(
+            os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", defaults.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS)
+        ),
+        UPSTREAM_KEEPALIVE_EXPIRY=float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", defaults.UPSTREAM_KEEPALIVE_EXPIRY)),
+        UPSTREAM_MAX_CONNECTIONS_PER_HOST=int(
+            os.getenv("UPSTREAM_MAX_CONNECTIONS_PER_HOST", defaults.UPSTREAM_MAX_CONNECTIONS_PER_HOST)
+        ),
+        UPSTREAM_HTTP2=os.getenv("UPSTREAM_HTTP2", str(defaults.UPSTREAM_HTTP2)).lower() in ("1", "true", "yes"),
+        UPSTREAM_COALESCE_TIMEOUT_SECONDS=float(
+            os.getenv("UPSTREAM_COALESCE_TIMEOUT_SECONDS", defaults.UPSTREAM_COALESCE_TIMEOUT_SECONDS)
+        ),
+        UPSTREAM_RETRY_ATTEMPTS=int(os.getenv("UPSTREAM_RETRY_ATTEMPTS", defaults.UPSTREAM_RETRY_ATTEMPTS)),
+        UPSTREAM_RETRY_BASE_DELAY_SECONDS=float(
+            os.getenv("UPSTREAM_RETRY_BASE_DELAY_SECONDS", defaults.UPSTREAM_RETRY_BASE_DELAY_SECONDS)
+        ),
+        UPSTREAM_RETRY_MAX_DELAY_SECONDS=float(
+            os.getenv("UPSTREAM_RETRY_MAX_DELAY_SECONDS", defaults.UPSTREAM_RETRY_MAX_DELAY_SECONDS)
+        ),
+        UPSTREAM_BREAKER_FAILURE_THRESHOLD=int(
+            os.getenv("UPSTREAM_BREAKER_FAILURE_THRESHOLD", defaults.UPSTREAM_BREAKER_FAILURE_THRESHOLD)
+        ),
+        UPSTREAM_BREAKER_RESET_SECONDS=float(
+            os.getenv("UPSTREAM_BREAKER_RESET_SECONDS", defaults.UPSTREAM_BREAKER_RESET_SECONDS)
+        ),
+        UPSTREAM_HEDGE_ENABLED=os.getenv(
+            "UPSTREAM_HEDGE_ENABLED", str(defaults.UPSTREAM_HEDGE_ENABLED)
+        ).lower() in ("1", "true", "yes"),
+        UPSTREAM_HEDGE_QUANTILE=float(os.getenv("UPSTREAM_HEDGE_QUANTILE", defaults.UPSTREAM_HEDGE_QUANTILE)),
+        UPSTREAM_HEDGE_MIN_DELAY_SECONDS=float(
+            os.getenv("UPSTREAM_HEDGE_MIN_DELAY_SECONDS", defaults.UPSTREAM_HEDGE_MIN_DELAY_SECONDS)
+        ),
+        UPSTREAM_HEDGE_MIN_SAMPLES=int(os.getenv("UPSTREAM_HEDGE_MIN_SAMPLES", defaults.UPSTREAM_HEDGE_MIN_SAMPLES)),
+        UPSTREAM_HEDGE_BUDGET_RATIO=float(
+            os.getenv("UPSTREAM_HEDGE_BUDGET_RATIO", defaults.UPSTREAM_HEDGE_BUDGET_RATIO)
+        ),
+        COMPRESSION_ENABLED=os.getenv(
+            "COMPRESSION_ENABLED", str(defaults.COMPRESSION_ENABLED)
+        ).lower() in ("1", "true", "yes"),
+        COMPRESSION_MIN_SIZE=int(os.getenv("COMPRESSION_MIN_SIZE", defaults.COMPRESSION_MIN_SIZE)),
+        COMPRESSION_GZIP_LEVEL=int(os.getenv("COMPRESSION_GZIP_LEVEL", defaults.COMPRESSION_GZIP_LEVEL)),
+        COMPRESSION_BROTLI_QUALITY=int(os.getenv("COMPRESSION_BROTLI_QUALITY", defaults.COMPRESSION_BROTLI_QUALITY)),
+        METRICS_ENABLED=os.getenv("METRICS_ENABLED", str(defaults.METRICS_ENABLED)).lower() in ("1", "true", "yes"),
+        SERVER_TIMING_ENABLED=os.getenv(
+            "SERVER_TIMING_ENABLED", str(defaults.SERVER_TIMING_ENABLED)
+        ).lower() in ("1", "true", "yes"),
+        PROFILING_SECRET=os.getenv("PROFILING_SECRET", defaults.PROFILING_SECRET),
+        PROFILING_OUTPUT_DIR=os.getenv("PROFILING_OUTPUT_DIR", defaults.PROFILING_OUTPUT_DIR),
+        PROFILING_INTERVAL_SECONDS=float(
+            os.getenv("PROFILING_INTERVAL_SECONDS", defaults.PROFILING_INTERVAL_SECONDS)
+        ),
     )
 
 
@@ -0,0 +1,175 @@
+"""
+Requêtes de couverture (« hedged requests ») contre la latence de queue amont.
+
+Si un GET idempotent n'a pas reçu ses en-têtes après un délai égal à un
+percentile des latences récentes de la même API (p95 par défaut), une seconde
+requête identique part et la première réponse obtenue l'emporte ; l'autre est
+annulée. Un budget global (seau de jetons crédité d'une fraction de jeton par
+requête primaire, une couverture coûtant un jeton) borne la charge ajoutée à
+l'amont : avec un ratio de 0,05, au plus ~5 % de requêtes en plus.
+"""
+import asyncio
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Awaitable, Callable, Deque, List, Optional
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+
+Send = Callable[[], Awaitable[httpx.Response]]
+
+HEDGES = REGISTRY.counter(
+    "upstream_hedges_total",
+    "Requêtes de couverture par issue (primary_won, hedge_won, budget_exhausted)",
+    ("upstream", "result"),
+)
+
+
+class LatencyWindow:
+    """Dernières latences observées ; le tri n'est refait que toutes les `refresh_every` observations."""
+
+    def __init__(self, size: int = 256, refresh_every: int = 16) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._sorted: List[float] = []
+        self._since_sort = 0
+        self.refresh_every = refresh_every
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_sort += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        if not self._sorted or self._since_sort >= self.refresh_every:
+            self._sorted = sorted(self._samples)
+            self._since_sort = 0
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+
+class HedgeBudget:
+    def __init__(self, ratio: float = 0.05, burst: float = 10.0) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 0.0
+
+    def credit(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+@lru_cache()
+def get_hedge_budget() -> HedgeBudget:
+    """Budget commun à toutes les API amont du processus."""
+    return HedgeBudget(ratio=get_settings().UPSTREAM_HEDGE_BUDGET_RATIO)
+
+
+async def _discard(task: "asyncio.Task[httpx.Response]") -> None:
+    # The losing request: cancelled in flight, or closed if it already has a response
+    if not task.done():
+        task.cancel()
+    try:
+        response = await task
+    except BaseException:
+        return
+    await response.aclose()
+
+
+class Hedger:
+    def __init__(
+        self,
+        name: str,
+        budget: Optional[HedgeBudget] = None,
+        quantile: float = 0.95,
+        min_delay: float = 0.05,
+        min_samples: int = 20,
+        enabled: bool = True,
+    ) -> None:
+        self.name = name
+        self.budget = budget or get_hedge_budget()
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self.latencies = LatencyWindow()
+
+    def delay(self) -> Optional[float]:
+        """Délai avant couverture, ou None tant que trop peu de latences ont été observées."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latencies.quantile(self.quantile) or 0.0)
+
+    def wrap(self, send: Send) -> Send:
+        """`send` couvert par une seconde requête si la première tarde (inchangé si désactivé)."""
+        if not self.enabled:
+            return send
+        return lambda: self._send(send)
+
+    async def _timed(self, send: Send) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await send()
+        except asyncio.CancelledError:
+            # A loser cancelled in flight is the slow tail itself: its elapsed time
+            # (a lower bound of its latency) is kept, or the percentile would drift low
+            self.latencies.observe(time.perf_counter() - start)
+            raise
+        self.latencies.observe(time.perf_counter() - start)
+        return response
+
+    async def _send(self, send: Send) -> httpx.Response:
+        delay = self.delay()
+        self.budget.credit()
+        if delay is None:
+            return await self._timed(send)
+        primary = asyncio.ensure_future(self._timed(send))
+        hedge: Optional["asyncio.Task[httpx.Response]"] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            if not self.budget.try_spend():
+                HEDGES.inc((self.name, "budget_exhausted"))
+                return await primary
+            hedge = asyncio.ensure_future(self._timed(send))
+            pending = {primary, hedge}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None or not pending:
+                    break
+            winner = winner or primary
+            HEDGES.inc((self.name, "primary_won" if winner is primary else "hedge_won"))
+            for task in (primary, hedge):
+                if task is not winner:
+                    await _discard(task)
+            return winner.result()
+        except BaseException:
+            # Caller cancelled (or failed): leave nothing running behind it
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    await _discard(task)
+            raise
+
+
+@lru_cache()
+def get_hedger(name: str) -> Hedger:
+    settings = get_settings()
+    return Hedger(
+        name,
+        quantile=settings.UPSTREAM_HEDGE_QUANTILE,
+        min_delay=settings.UPSTREAM_HEDGE_MIN_DELAY_SECONDS,
+        min_samples=settings.UPSTREAM_HEDGE_MIN_SAMPLES,
+        enabled=settings.UPSTREAM_HEDGE_ENABLED,
+    )
@@ -0,0 +1,108 @@
+"""
+Client HTTP partagé pour les appels aux API amont (Atmo France, Geod'air).
+
+Un seul `httpx.AsyncClient` est créé dans le lifespan de l'application et
+réutilisé par toutes les requêtes, ce qui garde les connexions TCP/TLS ouvertes
+(keep-alive) au lieu de refaire une poignée de main à chaque appel.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional
+
+import httpx
+from fastapi import Request
+
+from app.core.config import Settings
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport qui plafonne le nombre de requêtes simultanées par hôte.
+    Le créneau est libéré à la fermeture de la réponse, pas à la réception des en-têtes.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int) -> None:
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore_for(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._max_per_host)
+            self._semaphores[host] = semaphore
+        return semaphore
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        semaphore = self._semaphore_for(request.url.host)
+        await semaphore.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        if isinstance(response.stream, httpx.ByteStream):
+            # Body already buffered (e.g. mock transports): nothing left to hold the slot for.
+            semaphore.release()
+            return response
+        response.stream = _ReleasingStream(response.stream, semaphore.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Construit le client amont partagé à partir des réglages `UPSTREAM_*`.
+    HTTP/2 nécessite le paquet optionnel `h2` (`pip install httpx[http2]`).
+    """
+    limits = httpx.Limits(
+        max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+    )
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        http2=settings.UPSTREAM_HTTP2,
+        limits=limits,
+    )
+    if settings.UPSTREAM_MAX_CONNECTIONS_PER_HOST > 0:
+        transport = HostLimitedTransport(transport, settings.UPSTREAM_MAX_CONNECTIONS_PER_HOST)
+    return httpx.AsyncClient(transport=transport, timeout=settings.UPSTREAM_TIMEOUT_SECONDS)
+
+
+@asynccontextmanager
+async def upstream_client(
+    shared: Optional[httpx.AsyncClient],
+    timeout_seconds: float,
+) -> AsyncIterator[httpx.AsyncClient]:
+    # Reuse the app-wide pooled client when available (API), otherwise open a
+    # short-lived one (CLI scripts, notebooks).
+    if shared is not None:
+        yield shared
+        return
+    async with httpx.AsyncClient(timeout=timeout_seconds) as client:
+        yield client
+
+
+def get_http_client(request: Request) -> Optional[httpx.AsyncClient]:
+    return getattr(request.app.state, "http_client", None)
@@ -0,0 +1,272 @@
+"""
+Métriques au format texte Prometheus, sans dépendance externe.
+
+Le chemin chaud se limite à une recherche dichotomique du bucket et à quelques
+additions sur des listes : pas de verrou (tout est mis à jour depuis la boucle
+asyncio), pas d'allocation d'étiquettes par appel au-delà d'un tuple. Les
+valeurs « instantanées » (cache, disjoncteurs, pool SQL) ne sont pas suivies en
+continu : des collecteurs les lisent au moment du scrape de `/metrics`.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import httpx
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds: from a cache hit to a slow upstream backfill
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+# (name, labels, value) as written on one exposition line
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def get(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self._values.items():
+            yield self.name, self._labels(labels), value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        self._values[labels] = value
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self._values.items():
+            yield self.name, self._labels(labels), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (+Inf last, not cumulative)..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, series in self._values.items():
+            base = self._labels(labels)
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                yield f"{self.name}_bucket", {**base, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", base, series[-1]
+            yield f"{self.name}_count", base, cumulative
+
+
+# name, kind, documentation, samples
+Family = Tuple[str, str, str, Iterable[Sample]]
+Collector = Callable[[], Iterable[Family]]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' already registered")
+        self._metrics[metric.name] = metric
+
+    def register_collector(self, collector: Collector) -> None:
+        """`collector` est appelé à chaque scrape et renvoie des familles (nom, type, aide, échantillons)."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.register(metric)
+        return metric
+
+    def families(self) -> Iterator[Family]:
+        for metric in self._metrics.values():
+            yield metric.name, metric.kind, metric.documentation, metric.samples()
+        for collector in self._collectors:
+            yield from collector()
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for name, kind, documentation, samples in self.families():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Durée des requêtes HTTP, jusqu'au dernier octet de la réponse",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requêtes HTTP en cours de traitement")
+UPSTREAM_REQUEST_DURATION = REGISTRY.histogram(
+    "upstream_request_duration_seconds",
+    "Durée des appels amont jusqu'aux en-têtes de la réponse (une tentative)",
+    ("upstream", "operation"),
+)
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "upstream_requests_total",
+    "Appels amont par statut HTTP (ou timeout, transport_error, cancelled, error)",
+    ("upstream", "operation", "status"),
+)
+
+
+def observe_upstream(
+    upstream: str, operation: str, send: Callable[[], Awaitable[httpx.Response]]
+) -> Callable[[], Awaitable[httpx.Response]]:
+    """Enveloppe `send` pour mesurer chaque tentative d'appel amont."""
+
+    async def timed() -> httpx.Response:
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await send()
+        except httpx.TimeoutException:
+            status = "timeout"
+            raise
+        except httpx.TransportError:
+            status = "transport_error"
+            raise
+        except asyncio.CancelledError:
+            # Includes hedged requests that lost the race
+            status = "cancelled"
+            raise
+        else:
+            status = str(response.status_code)
+            return response
+        finally:
+            UPSTREAM_REQUEST_DURATION.observe(time.perf_counter() - start, (upstream, operation))
+            UPSTREAM_REQUESTS.inc((upstream, operation, status))
+
+    return timed
+
+
+def _route_label(scope: Scope) -> str:
+    # The route template, never the raw path: path parameters would explode the label cardinality
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Durée et nombre de requêtes en cours, par méthode, route et statut."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start, (scope["method"], _route_label(scope), status)
+            )
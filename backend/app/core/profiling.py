@@ -0,0 +1,240 @@
+"""
+Où passe le temps d'une requête.
+
+- `ServerTimingMiddleware` (toujours actif, coût négligeable) : les phases
+  mesurées avec `phase()` (attente amont, parsing, transformation,
+  sérialisation) sont renvoyées dans l'en-tête `Server-Timing`, lisible dans
+  l'onglet réseau des navigateurs. Seul ce qui précède l'envoi des en-têtes
+  y figure : la fin d'une réponse en streaming n'est pas comptée.
+- `ProfilingMiddleware` (opt-in) : avec l'en-tête `X-Profile: <secret>` ou le
+  paramètre `?profile=<secret>`, un thread échantillonne la pile du thread de
+  la boucle asyncio pendant la requête et produit un profil speedscope
+  (https://www.speedscope.app). Les autres requêtes servies par la même boucle
+  pendant ce temps apparaissent aussi dans le profil.
+"""
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, TypeVar
+from urllib.parse import parse_qsl
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+T = TypeVar("T")
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("server_timing_phases", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Ajoute la durée du bloc à la phase `name` de la requête en cours (sans effet hors requête)."""
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+async def timed_iter(name: str, items: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Itère `items` en comptant l'attente de chaque élément dans la phase `name`."""
+    iterator = items.__aiter__()
+    while True:
+        with phase(name):
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+        yield item
+
+
+def server_timing(phases: Dict[str, float], total: float) -> str:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in phases.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        phases: Dict[str, float] = {}
+        token = _phases.set(phases)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                value = server_timing(phases, time.perf_counter() - start)
+                MutableHeaders(scope=message).append("Server-Timing", value)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _phases.reset(token)
+
+
+# (function, file, first line) of one code object
+FrameKey = Tuple[str, str, int]
+
+
+class StackSampler:
+    """Échantillonne la pile d'un thread toutes les `interval` secondes depuis un thread dédié."""
+
+    def __init__(self, thread_id: int, interval: float = 0.001) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self._frames: Dict[FrameKey, int] = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._started = 0.0
+        self.duration = 0.0
+
+    def _frame_index(self, key: FrameKey) -> int:
+        index = self._frames.get(key)
+        if index is None:
+            index = self._frames[key] = len(self._frames)
+        return index
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack: List[int] = []
+            while frame is not None:
+                code = frame.f_code
+                # co_qualname only exists from Python 3.11
+                name = getattr(code, "co_qualname", code.co_name)
+                stack.append(self._frame_index((name, code.co_filename, code.co_firstlineno)))
+                frame = frame.f_back
+            if stack:
+                # speedscope wants the root first
+                stack.reverse()
+                self.samples.append(stack)
+                self.weights.append(now - last)
+            last = now
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        frames = [{"name": function, "file": file, "line": line} for function, file, line in self._frames]
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "observatoire-citadin",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.duration,
+                    "samples": self.samples,
+                    "weights": self.weights,
+                }
+            ],
+        }
+
+
+class ProfilingMiddleware:
+    """
+    Profile les requêtes qui présentent le secret. Sans `output_dir`, la réponse
+    est remplacée par le profil speedscope (statut d'origine dans
+    `X-Profiled-Status`) ; sinon le profil est écrit dans `output_dir` et la
+    réponse d'origine porte `X-Profile-File`. Une seule requête est profilée à
+    la fois : les autres passent sans profilage.
+    """
+
+    def __init__(self, app: ASGIApp, secret: str, output_dir: str = "", interval: float = 0.001) -> None:
+        self.app = app
+        self.secret = secret.encode("utf-8")
+        self.output_dir = output_dir
+        self.interval = interval
+        self._busy = False
+
+    def _write(self, filename: str, body: bytes) -> None:
+        with open(os.path.join(self.output_dir, filename), "wb") as fh:
+            fh.write(body)
+
+    def _requested(self, scope: Scope) -> bool:
+        presented: Optional[bytes] = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                presented = value
+                break
+        if presented is None:
+            query = scope.get("query_string", b"").decode("latin-1")
+            presented = next((v.encode("utf-8") for k, v in parse_qsl(query) if k == "profile"), None)
+        return presented is not None and hmac.compare_digest(presented, self.secret)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._busy or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        self._busy = True
+        name = f"{scope['method']} {scope['path']} {datetime.now():%Y-%m-%dT%H:%M:%S}"
+        filename = f"profile-{datetime.now():%Y%m%d-%H%M%S-%f}.speedscope.json"
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if self.output_dir:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("X-Profile-File", filename)
+                await send(message)
+            elif message["type"] == "http.response.start":
+                # The profiled response is discarded: the profile replaces it
+                status = message["status"]
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self._busy = False
+        body = json.dumps(sampler.speedscope(name), separators=(",", ":")).encode("utf-8")
+        if self.output_dir:
+            await run_in_threadpool(self._write, filename, body)
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"content-disposition", f'attachment; filename="{filename}"'.encode("latin-1")),
+                    (b"x-profiled-status", str(status).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
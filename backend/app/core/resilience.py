@@ -0,0 +1,181 @@
+"""
+Résilience des appels amont : réessais avec backoff exponentiel « full jitter »
+pour les GET idempotents et disjoncteur (circuit breaker) par API amont.
+
+Tant que le disjoncteur est ouvert, les appels échouent immédiatement avec
+`CircuitOpenError` au lieu d'attendre le timeout amont ; après
+`reset_timeout` secondes, un seul appel d'essai est laissé passer. Un 429 est
+réessayé (en respectant `Retry-After`) mais ne compte pas comme une panne :
+l'amont répond, il demande seulement de ralentir.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from app.core.config import get_settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"upstream '{name}' unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats: Dict[str, int] = {"successes": 0, "failures": 0, "throttled": 0, "rejected": 0, "opened": 0}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self._retry_after(), 1) if self.state == OPEN else 0,
+            **self.stats,
+        }
+
+    def _retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self) -> None:
+        """Lève `CircuitOpenError` si l'appel ne doit pas partir."""
+        if self.state == OPEN:
+            if self._retry_after() > 0:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self._retry_after())
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self.stats["successes"] += 1
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self.state = CLOSED
+
+    def record_throttled(self) -> None:
+        # The upstream is alive: neither a failure nor a reason to close a half-open circuit
+        self.stats["throttled"] += 1
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Libère l'appel d'essai sans conclure (appel annulé) : le suivant fera l'essai."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.stats["opened"] += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+@lru_cache()
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(
+        name,
+        failure_threshold=settings.UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.UPSTREAM_BREAKER_RESET_SECONDS,
+    )
+
+
+def _is_retryable_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def retry_after_header(response: httpx.Response) -> Optional[float]:
+    """Délai demandé par `Retry-After` (secondes ou date HTTP), None s'il est absent ou invalide."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full jitter : délai uniforme dans [0, min(max_delay, base * 2^attempt)]."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+async def send_with_retry(
+    breaker: CircuitBreaker,
+    send: Callable[[], Awaitable[httpx.Response]],
+    max_attempts: Optional[int] = None,
+    base_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+) -> httpx.Response:
+    """
+    Exécute `send` (un GET idempotent) derrière le disjoncteur, en réessayant les
+    erreurs de transport, les timeouts, les 429 et les 5xx. Un `Retry-After`
+    remplace le backoff ; s'il dépasse `max_delay`, la réponse est renvoyée sans
+    attendre. La dernière réponse en erreur est renvoyée telle quelle pour que
+    l'appelant garde son `raise_for_status`.
+    """
+    settings = get_settings()
+    max_attempts = max_attempts or settings.UPSTREAM_RETRY_ATTEMPTS
+    base_delay = settings.UPSTREAM_RETRY_BASE_DELAY_SECONDS if base_delay is None else base_delay
+    max_delay = settings.UPSTREAM_RETRY_MAX_DELAY_SECONDS if max_delay is None else max_delay
+    for attempt in range(max_attempts):
+        breaker.before_call()
+        retry_after: Optional[float] = None
+        try:
+            response = await send()
+        except (httpx.TimeoutException, httpx.TransportError):
+            breaker.record_failure()
+            if attempt == max_attempts - 1:
+                raise
+        except asyncio.CancelledError:
+            # Says nothing about the upstream, but a half-open probe must not stay taken forever
+            breaker.release_probe()
+            raise
+        except BaseException:
+            breaker.record_failure()
+            raise
+        else:
+            if not _is_retryable_status(response.status_code):
+                breaker.record_success()
+                return response
+            if response.status_code == 429:
+                breaker.record_throttled()
+            else:
+                breaker.record_failure()
+            retry_after = retry_after_header(response)
+            if attempt == max_attempts - 1 or (retry_after is not None and retry_after > max_delay):
+                return response
+            await response.aclose()
+        await asyncio.sleep(backoff_delay(attempt, base_delay, max_delay) if retry_after is None else retry_after)
+    raise RuntimeError("send_with_retry: max_attempts must be >= 1")
@@ -0,0 +1,55 @@
+"""
+Réponses JSON rapides.
+
+`FastJSONResponse` (classe de réponse par défaut de l'application) encode avec
+orjson quand il est installé, sinon avec le module json standard en mode
+compact. Les endpoints à gros volume la renvoient directement, ce qui évite
+en plus le passage par `jsonable_encoder`. `RawJSONResponse` relaie un corps
+JSON déjà encodé (octets amont) sans le décoder.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+
+from app.core.profiling import phase
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str).encode(
+        "utf-8"
+    )
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with phase("serialize"):
+            return dumps(content)
+
+
+class RawJSONResponse(Response):
+    media_type = "application/json"
+
+
+def is_json(body: bytes) -> bool:
+    """Vrai si `body` est un document JSON valide (un Content-Type JSON ne le garantit pas)."""
+    try:
+        if orjson is not None:
+            orjson.loads(body)
+        else:
+            json.loads(body)
+    except ValueError:
+        return False
+    return True
+
+
+def wrap_json_bytes(key: str, body: bytes) -> bytes:
+    """`{"<key>": <body>}` à partir d'un document JSON encodé, sans le décoder."""
+    return b'{"' + key.encode("utf-8") + b'":' + body + b"}"
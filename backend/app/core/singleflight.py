@@ -0,0 +1,70 @@
+"""
+Fusion des appels identiques en cours (single-flight).
+
+Quand N appelants demandent la même clé pendant qu'un appel est déjà en vol,
+ils attendent tous le même résultat au lieu de déclencher N appels amont.
+"""
+import asyncio
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, name: str = "") -> None:
+        self.name = name
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.stats: Dict[str, int] = {"calls": 0, "executions": 0, "shared": 0, "timeouts": 0}
+
+    @property
+    def coalescing_ratio(self) -> float:
+        """Part des appels servis par un appel déjà en vol."""
+        calls = self.stats["calls"]
+        return self.stats["shared"] / calls if calls else 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "in_flight": self.in_flight, "coalescing_ratio": round(self.coalescing_ratio, 4)}
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: Optional[float] = None,
+    ) -> T:
+        """
+        Exécute `fn` pour `key`, ou rejoint l'exécution déjà en cours.
+        `timeout` borne l'attente de cet appelant seulement : l'appel partagé
+        continue pour les autres et lève `asyncio.TimeoutError` ici.
+        """
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["shared"] += 1
+        else:
+            self.stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        try:
+            # Shielded so that one cancelled/timed-out caller does not abort the shared call
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+
+    def _forget(self, key: Hashable, done: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is done:
+            del self._inflight[key]
+        if not done.cancelled():
+            # Mark the exception as retrieved even if every waiter gave up
+            done.exception()
+
+
+@lru_cache()
+def get_singleflight(name: str) -> SingleFlight:
+    return SingleFlight(name)
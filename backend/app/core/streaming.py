@@ -0,0 +1,54 @@
+"""
+Réponses NDJSON (`application/x-ndjson`) : une ligne JSON par élément, émise
+au fil de la production (amont ou curseur base), au lieu d'un document JSON
+construit en entier avant l'envoi.
+"""
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    """Mode streaming demandé explicitement par l'en-tête `Accept`."""
+    if not accept:
+        return False
+    return any(part.split(";")[0].strip().lower() == NDJSON_MEDIA_TYPE for part in accept.split(","))
+
+
+def ndjson_lines(rows: Sequence[Any]) -> bytes:
+    return "".join(json.dumps(row, separators=(",", ":"), default=str) + "\n" for row in rows).encode("utf-8")
+
+
+async def ndjson_response(
+    batches: AsyncIterator[Sequence[Any]],
+    headers: Optional[Dict[str, str]] = None,
+) -> StreamingResponse:
+    """
+    Réponse NDJSON alimentée par `batches` (un morceau HTTP par lot).
+
+    Le premier lot est attendu avant de renvoyer la réponse : une erreur
+    survenant avant toute donnée remonte à l'appelant, qui peut encore choisir
+    le code HTTP. Une erreur en cours de flux ne peut plus changer le statut
+    200 : elle termine le flux par une ligne `{"error": ...}`.
+    """
+    iterator = batches.__aiter__()
+    try:
+        first: Optional[Sequence[Any]] = await iterator.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def body() -> AsyncIterator[bytes]:
+        if first is None:
+            return
+        yield ndjson_lines(first)
+        try:
+            async for rows in iterator:
+                if rows:
+                    yield ndjson_lines(rows)
+        except Exception as exc:
+            yield ndjson_lines([{"error": str(exc)}])
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
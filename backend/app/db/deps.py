@@ -1,5 +1,8 @@
-from typing import Generator
-from app.db.session import SessionLocal
+from typing import AsyncGenerator, Generator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import SessionLocal, get_async_sessionmaker
 
 
 def get_db() -> Generator:
@@ -10,3 +13,6 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -0,0 +1,80 @@
+"""
+Migrations SQL du schéma PostgreSQL (dossier `backend/migrations/`).
+
+Les fichiers `NNNN_description.sql` sont appliqués dans l'ordre, chacun dans sa
+propre transaction, et enregistrés dans la table `schema_migrations`. Les
+tables de base sont créées par `Base.metadata.create_all` (ETL `--create-tables`)
+avant la première migration.
+
+Usage:
+    cd backend
+    python -m app.db.migrate
+    python -m app.db.migrate --partitions-until 2027-12-31
+"""
+import argparse
+from datetime import date as date_type, timedelta
+from pathlib import Path
+from typing import Iterable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+
+def pending_migrations(applied: Iterable[str], directory: Path = MIGRATIONS_DIR) -> List[Path]:
+    """Fichiers de migration pas encore appliqués, dans l'ordre de leur numéro."""
+    done = set(applied)
+    return sorted(path for path in directory.glob("*.sql") if path.stem not in done)
+
+
+def apply_migrations(engine: Engine, directory: Path = MIGRATIONS_DIR) -> List[str]:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                " version VARCHAR(255) PRIMARY KEY, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+            )
+        )
+        applied = conn.scalars(text("SELECT version FROM schema_migrations")).all()
+    versions = []
+    for path in pending_migrations(applied, directory):
+        with engine.begin() as conn:
+            # Raw driver cursor: the scripts contain '%' (format()) and several statements
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(path.read_text(encoding="utf-8"))
+            finally:
+                cursor.close()
+            conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": path.stem})
+        versions.append(path.stem)
+    return versions
+
+
+def ensure_partitions(conn: Connection, start: date_type, end: date_type) -> int:
+    """Crée les partitions mensuelles manquantes de `indicators` sur [start, end]."""
+    return conn.scalar(text("SELECT indicators_create_partitions(:start, :end)"), {"start": start, "end": end})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Applique les migrations SQL en attente")
+    parser.add_argument(
+        "--partitions-until",
+        type=date_type.fromisoformat,
+        default=date_type.today() + timedelta(days=365),
+        help="Crée les partitions mensuelles d'indicators jusqu'à cette date (défaut: dans un an)",
+    )
+    args = parser.parse_args()
+
+    from app.db.session import get_engine
+
+    engine = get_engine()
+    for version in apply_migrations(engine):
+        print(f"appliquée: {version}")
+    with engine.begin() as conn:
+        created = ensure_partitions(conn, date_type.today(), args.partitions_until)
+    print(f"{created} partition(s) créée(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Agrégats journaliers et mensuels de `indicators` (tables `indicators_daily`
+et `indicators_monthly`).
+
+L'ETL note les (ville, dates) touchées par ses upserts puis recalcule
+uniquement ces plages : les jours concernés à partir des données brutes, puis
+les mois qui les contiennent à partir des agrégats journaliers.
+
+Reconstruction complète (après une première migration ou un chargement manuel) :
+    cd backend
+    python -m app.db.rollups --since 2020-01-01
+"""
+import argparse
+from datetime import date as date_type, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import City, Indicator, IndicatorDailyRollup, IndicatorMonthlyRollup
+
+# city_id -> (first, last) date touched
+AffectedRanges = Dict[int, Tuple[date_type, date_type]]
+
+ROLLUP_COLUMNS = ("city_id", "type", "source", "period", "value_count", "value_sum", "value_min", "value_max")
+
+
+def truncate_date(dialect: str, unit: str, column):
+    """Début du jour, de la semaine (lundi) ou du mois contenant `column`."""
+    if unit == "day":
+        return column
+    if dialect == "postgresql":
+        return cast(func.date_trunc(unit, column), Date)
+    # SQLite (tests): date modifiers instead of date_trunc
+    if unit == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.date(column, "start of month")
+
+
+def track_affected(affected: AffectedRanges, city_id: int, day: date_type) -> None:
+    first, last = affected.get(city_id, (day, day))
+    affected[city_id] = (min(first, day), max(last, day))
+
+
+def _month_bounds(start: date_type, end: date_type) -> Tuple[date_type, date_type]:
+    next_month = (end.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return start.replace(day=1), next_month - timedelta(days=1)
+
+
+def refresh_rollups(session: Session, city_ids: Iterable[int], start: date_type, end: date_type) -> None:
+    """Recalcule les agrégats de `city_ids` sur [start, end] (mois entiers pour le mensuel). Ne commite pas."""
+    city_ids = list(city_ids)
+    if not city_ids:
+        return
+    daily = IndicatorDailyRollup
+    session.execute(
+        delete(daily).where(daily.city_id.in_(city_ids), daily.period.between(start, end)),
+        execution_options={"synchronize_session": False},
+    )
+    session.execute(
+        insert(daily).from_select(
+            ROLLUP_COLUMNS,
+            select(
+                Indicator.city_id,
+                Indicator.type,
+                Indicator.source,
+                Indicator.date,
+                func.count(Indicator.value),
+                func.sum(Indicator.value),
+                func.min(Indicator.value),
+                func.max(Indicator.value),
+            )
+            .where(Indicator.city_id.in_(city_ids), Indicator.date.between(start, end))
+            .group_by(Indicator.city_id, Indicator.type, Indicator.source, Indicator.date),
+        )
+    )
+
+    month_start, month_end = _month_bounds(start, end)
+    monthly = IndicatorMonthlyRollup
+    period = truncate_date(session.get_bind().dialect.name, "month", daily.period)
+    session.execute(
+        delete(monthly).where(monthly.city_id.in_(city_ids), monthly.period.between(month_start, month_end)),
+        execution_options={"synchronize_session": False},
+    )
+    session.execute(
+        insert(monthly).from_select(
+            ROLLUP_COLUMNS,
+            select(
+                daily.city_id,
+                daily.type,
+                daily.source,
+                period,
+                func.sum(daily.value_count),
+                func.sum(daily.value_sum),
+                func.min(daily.value_min),
+                func.max(daily.value_max),
+            )
+            .where(daily.city_id.in_(city_ids), daily.period.between(month_start, month_end))
+            .group_by(daily.city_id, daily.type, daily.source, period),
+        )
+    )
+
+
+def refresh_affected(session: Session, affected: AffectedRanges) -> None:
+    """
+    Rafraîchit les plages notées par l'ETL en une passe : toutes les villes
+    touchées, sur l'union de leurs plages. Ne commite pas.
+    """
+    if not affected:
+        return
+    start = min(first for first, _ in affected.values())
+    end = max(last for _, last in affected.values())
+    refresh_rollups(session, affected.keys(), start, end)
+
+
+def rebuild_rollups(session: Session, since: date_type, until: Optional[date_type] = None) -> None:
+    until = until or date_type.today()
+    city_ids = session.scalars(select(City.id)).all()
+    # One month per statement keeps transactions and sorts bounded on large tables
+    month_start, _ = _month_bounds(since, since)
+    while month_start <= until:
+        _, month_end = _month_bounds(month_start, month_start)
+        refresh_rollups(session, city_ids, max(since, month_start), min(until, month_end))
+        session.commit()
+        month_start = month_end + timedelta(days=1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconstruit les agrégats journaliers et mensuels des indicateurs")
+    parser.add_argument("--since", required=True, type=date_type.fromisoformat)
+    parser.add_argument("--until", type=date_type.fromisoformat, help="Dernier jour (défaut: aujourd'hui)")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as session:
+        rebuild_rollups(session, args.since, args.until)
+
+
+if __name__ == "__main__":
+    main()
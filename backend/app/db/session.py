@@ -1,18 +1,68 @@
+from functools import lru_cache
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
 from app.core.config import get_settings
 
 
-settings = get_settings()
+Base = declarative_base()
 
-engine = create_engine(
-    settings.sqlalchemy_database_uri,
-    pool_pre_ping=True,
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@lru_cache()
+def get_engine() -> Engine:
+    # Built on first use: importing the models or the API does not load psycopg2
+    settings = get_settings()
+    return create_engine(
+        settings.sqlalchemy_database_uri,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
 
-Base = declarative_base()
+
+@lru_cache()
+def get_sessionmaker() -> "sessionmaker[Session]":
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+def SessionLocal() -> Session:
+    """Nouvelle session synchrone liée au moteur partagé (créé au premier appel)."""
+    return get_sessionmaker()()
+
+
+@lru_cache()
+def get_async_engine() -> AsyncEngine:
+    # Built on first use: importing asyncpg is only paid by processes that need it
+    settings = get_settings()
+    return create_async_engine(
+        settings.sqlalchemy_async_database_uri,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+
+
+@lru_cache()
+def get_async_sessionmaker() -> "async_sessionmaker[AsyncSession]":
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+def dispose_engine() -> None:
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+        get_sessionmaker.cache_clear()
+        get_engine.cache_clear()
 
 
+async def dispose_async_engine() -> None:
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+        get_async_sessionmaker.cache_clear()
+        get_async_engine.cache_clear()
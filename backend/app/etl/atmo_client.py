@@ -1,9 +1,19 @@
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, Optional, Tuple, Union
+import asyncio
 import os
 from datetime import datetime, timedelta
 
 import httpx
 
+from app.core.concurrency import AdaptiveLimiter, call_with_backoff
+from app.core.hedging import Hedger, get_hedger
+from app.core.http import upstream_client
+from app.core.metrics import observe_upstream
+from app.core.profiling import phase, timed_iter
+from app.core.resilience import CircuitBreaker, get_circuit_breaker, send_with_retry
+from app.etl.atmo_token_store import AtmoTokenStore, get_atmo_token_store
+from app.etl.geojson_stream import aiter_feature_properties
+
 
 class AtmoClient:
     """
@@ -19,51 +29,120 @@ class AtmoClient:
         timeout_seconds: float = 30.0,
         username: Optional[str] = None,
         password: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        token_store: Optional[AtmoTokenStore] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedger: Optional[Hedger] = None,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key or os.getenv("ATMO_API_KEY", "")
         self.timeout_seconds = timeout_seconds
         self.username = username or os.getenv("ATMO_USERNAME", "")
         self.password = password or os.getenv("ATMO_PASSWORD", "")
-        self._token: Optional[str] = None
-        self._token_expiry: Optional[datetime] = None
+        self._http_client = http_client
+        # Tokens are shared process-wide so that per-request clients don't re-login
+        self._token_store = token_store or get_atmo_token_store()
+        self._token_key = f"{self.base_url}|{self.username}"
+        self._breaker = breaker or get_circuit_breaker("atmo")
+        self._hedger = hedger or get_hedger("atmo")
 
-    def _headers(self) -> Dict[str, str]:
+    @staticmethod
+    def _headers(token: Optional[str]) -> Dict[str, str]:
         headers: Dict[str, str] = {}
-        token = self._get_effective_token()
         if token:
             headers["Authorization"] = f"Bearer {token}"
         return headers
 
     def _get_effective_token(self) -> Optional[str]:
         # Priority: cached token > api_key > None
-        if self._token and self._token_expiry and datetime.utcnow() < self._token_expiry:
-            return self._token
+        token = self._token_store.peek(self._token_key)
+        if token:
+            return token
         if self.api_key:
             return self.api_key
         return None
 
+    def _has_credentials(self) -> bool:
+        return bool(self.username and self.password)
+
+    async def _ensure_token(self) -> Optional[str]:
+        # Login (single-flight, shared cache) only if neither cached token nor api_key is present,
+        # or if the cached token is about to expire.
+        if not self._has_credentials():
+            return self._get_effective_token()
+        if self._token_store.peek(self._token_key) or not self.api_key:
+            return await self._token_store.get_token(self._token_key, self._login_request)
+        return self.api_key
+
     async def login(self) -> str:
         """
         Authenticate with /api/login to obtain a 24h token.
         Expects JSON body: { "username": "...", "password": "..." }
+        Concurrent calls share a single login request.
         """
-        if not self.username or not self.password:
+        if not self._has_credentials():
+            raise RuntimeError("ATMO credentials missing: set ATMO_USERNAME and ATMO_PASSWORD")
+        return await self._token_store.refresh(self._token_key, self._login_request)
+
+    async def _login_request(self) -> Tuple[str, datetime]:
+        if not self._has_credentials():
             raise RuntimeError("ATMO credentials missing: set ATMO_USERNAME and ATMO_PASSWORD")
 
         login_url = f"{self.base_url}/api/login"
         payload = {"username": self.username, "password": self.password}
-        async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
-            resp = await client.post(login_url, json=payload)
+        async with upstream_client(self._http_client, self.timeout_seconds) as client:
+            resp = await observe_upstream(
+                "atmo", "login", lambda: client.post(login_url, json=payload, timeout=self.timeout_seconds)
+            )()
             resp.raise_for_status()
             data = resp.json()
             token = data.get("token") or data.get("access_token") or data.get("jwt") or data.get("id_token")
             if not token:
                 raise RuntimeError("Unable to parse token from ATMO login response")
             # Cache token for ~24h (slightly less to avoid edge expiry during calls)
-            self._token = token
-            self._token_expiry = datetime.utcnow() + timedelta(hours=23, minutes=50)
-            return token
+            return token, datetime.utcnow() + timedelta(hours=23, minutes=50)
+
+    def _indices_request(
+        self,
+        date: str,
+        date_historique: str,
+        code_zone: Optional[str] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        endpoint = f"{self.base_url}/api/v2/data/indices/atmo"
+        params: Dict[str, Any] = {"date": date, "date_historique": date_historique}
+        if code_zone:
+            params["code_zone"] = code_zone
+        return endpoint, params
+
+    async def _send_authenticated(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        params: Dict[str, Any],
+        stream: bool = False,
+        max_attempts: Optional[int] = None,
+    ) -> httpx.Response:
+        def send(token: Optional[str]) -> Awaitable[httpx.Response]:
+            # Idempotent GET: transient failures are retried behind the "atmo" circuit breaker
+            request = client.build_request(
+                "GET", endpoint, params=params, headers=self._headers(token), timeout=self.timeout_seconds
+            )
+            return send_with_retry(
+                self._breaker,
+                self._hedger.wrap(observe_upstream("atmo", "data", lambda: client.send(request, stream=stream))),
+                max_attempts=max_attempts,
+            )
+
+        token = await self._ensure_token()
+        # First attempt
+        response = await send(token)
+        if response.status_code == 401 and self._has_credentials():
+            # Retry once after refreshing token; only the first 401 for a given token triggers a login
+            await response.aclose()
+            self._token_store.invalidate(self._token_key, token)
+            token = await self._token_store.get_token(self._token_key, self._login_request)
+            response = await send(token)
+        return response
 
     async def fetch_indices_atmo(
         self,
@@ -78,24 +157,95 @@ class AtmoClient:
           - date_historique
           - code_zone
         """
-        endpoint = f"{self.base_url}/api/v2/data/indices/atmo"
-        params: Dict[str, Any] = {"date": date, "date_historique": date_historique}
-        if code_zone:
-            params["code_zone"] = code_zone
-        async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
-            # Ensure we have a token (login if neither cached token nor api_key present)
-            if not self._get_effective_token() and self.username and self.password:
-                await self.login()
-            # First attempt
-            response = await client.get(endpoint, params=params, headers=self._headers())
-            if response.status_code == 401 and self.username and self.password:
-                # Retry once after refreshing token
-                await self.login()
-                response = await client.get(endpoint, params=params, headers=self._headers())
-            response.raise_for_status()
+        async with upstream_client(self._http_client, self.timeout_seconds) as client:
+            return await self._fetch_indices(client, date, date_historique, code_zone)
+
+    async def _fetch_indices(
+        self,
+        client: httpx.AsyncClient,
+        date: str,
+        date_historique: str,
+        code_zone: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        endpoint, params = self._indices_request(date, date_historique, code_zone)
+        with phase("upstream"):
+            response = await self._send_authenticated(client, endpoint, params, max_attempts=max_attempts)
+        response.raise_for_status()
+        with phase("parse"):
             try:
                 return response.json()
             except Exception:
                 return {"content": response.text}
 
+    async def iter_indices_atmo(
+        self,
+        date: str,
+        date_historique: str,
+        code_zone: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Variante en flux de `fetch_indices_atmo` : produit les `properties` de
+        chaque feature au fur et à mesure de la réception, sans jamais charger
+        la réponse complète en mémoire. Une réponse non JSON ne produit rien.
+        """
+        endpoint, params = self._indices_request(date, date_historique, code_zone)
+        async with upstream_client(self._http_client, self.timeout_seconds) as client:
+            with phase("upstream"):
+                response = await self._send_authenticated(client, endpoint, params, stream=True)
+            try:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                # Waiting for the body counts as upstream time, splitting it as parse time
+                async for props in aiter_feature_properties(timed_iter("upstream", response.aiter_bytes())):
+                    yield props
+            finally:
+                await response.aclose()
+
+    async def fetch_indices_atmo_many(
+        self,
+        zones: Iterable[str],
+        date: str,
+        date_historique: str,
+        concurrency: int = 8,
+        max_attempts: int = 3,
+        backoff_seconds: float = 1.0,
+    ) -> AsyncIterator[Tuple[str, Union[Dict[str, Any], BaseException]]]:
+        """
+        Récupère les indices de plusieurs zones en parallèle et produit
+        `(code_zone, résultat)` dans l'ordre de complétion, pour que le
+        chargement puisse commencer dès la première réponse.
 
+        La concurrence démarre à `concurrency` (qui reste un plafond), est
+        divisée par deux à chaque 429/5xx et remonte progressivement ensuite. Une zone en échec est
+        réessayée jusqu'à `max_attempts` fois ; l'exception finale est produite
+        comme résultat (à la manière de `gather(return_exceptions=True)`).
+        """
+        limiter = AdaptiveLimiter(initial=concurrency, max_limit=concurrency)
+        queue: "asyncio.Queue[Tuple[str, Union[Dict[str, Any], BaseException]]]" = asyncio.Queue()
+
+        async def fetch_zone(code_zone: str) -> None:
+            try:
+                result = await call_with_backoff(
+                    limiter,
+                    # One upstream call per attempt: every 429/5xx reaches the limiter
+                    lambda: self._fetch_indices(client, date, date_historique, code_zone=code_zone, max_attempts=1),
+                    max_attempts=max_attempts,
+                    backoff_seconds=backoff_seconds,
+                )
+            except Exception as exc:
+                await queue.put((code_zone, exc))
+            else:
+                await queue.put((code_zone, result))
+
+        # One connection pool for every zone, even outside the API
+        async with upstream_client(self._http_client, self.timeout_seconds) as client:
+            tasks = [asyncio.ensure_future(fetch_zone(code_zone)) for code_zone in zones]
+            try:
+                for _ in range(len(tasks)):
+                    yield await queue.get()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,141 @@
+"""
+Cache process-wide des jetons d'authentification Atmo France.
+
+Le jeton obtenu via /api/login est valable 24h : il est partagé entre toutes les
+instances d'`AtmoClient` (une par requête API) au lieu d'être stocké sur
+l'instance. Les rafraîchissements concurrents sont fusionnés en un seul login
+(single-flight) et le jeton est renouvelé un peu avant son expiration.
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.singleflight import SingleFlight
+
+
+LoginFn = Callable[[], Awaitable[Tuple[str, datetime]]]
+
+
+class AtmoTokenStore:
+    def __init__(
+        self,
+        refresh_margin: timedelta = timedelta(minutes=30),
+        cache_file: Optional[str] = None,
+    ) -> None:
+        self.refresh_margin = refresh_margin
+        self.cache_file = cache_file or None
+        self._tokens: Dict[str, Tuple[str, datetime]] = {}
+        self._flight = SingleFlight("atmo_login")
+        self._loaded = False
+        self.stats: Dict[str, int] = {
+            "logins": 0,
+            "login_failures": 0,
+            "cache_hits": 0,
+            "proactive_refreshes": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def coalesced(self) -> int:
+        return self._flight.stats["shared"]
+
+    @property
+    def logins_avoided(self) -> int:
+        return self.stats["cache_hits"] + self.coalesced
+
+    def snapshot(self) -> Dict[str, int]:
+        return {**self.stats, "coalesced": self.coalesced, "logins_avoided": self.logins_avoided}
+
+    def peek(self, key: str) -> Optional[str]:
+        """Jeton encore valide pour `key`, sans déclencher de login."""
+        self._load()
+        cached = self._tokens.get(key)
+        if cached and datetime.utcnow() < cached[1]:
+            return cached[0]
+        return None
+
+    def set(self, key: str, token: str, expires_at: datetime) -> None:
+        self._load()
+        self._tokens[key] = (token, expires_at)
+        self._save()
+
+    def invalidate(self, key: str, token: Optional[str] = None) -> None:
+        """
+        Oublie le jeton de `key`. Si `token` est fourni, n'invalide que s'il est
+        toujours le jeton courant (évite qu'une rafale de 401 provoque N logins).
+        """
+        self._load()
+        cached = self._tokens.get(key)
+        if cached and (token is None or cached[0] == token):
+            del self._tokens[key]
+            self.stats["invalidations"] += 1
+            self._save()
+
+    async def get_token(self, key: str, login: LoginFn) -> str:
+        self._load()
+        cached = self._tokens.get(key)
+        now = datetime.utcnow()
+        if cached and now < cached[1] - self.refresh_margin:
+            self.stats["cache_hits"] += 1
+            return cached[0]
+        if cached and now < cached[1]:
+            # Close to expiry: refresh now, but keep serving the current token if login fails
+            self.stats["proactive_refreshes"] += 1
+            try:
+                return await self.refresh(key, login)
+            except Exception:
+                return cached[0]
+        return await self.refresh(key, login)
+
+    async def refresh(self, key: str, login: LoginFn) -> str:
+        return await self._flight.do(key, lambda: self._login(key, login))
+
+    async def _login(self, key: str, login: LoginFn) -> str:
+        self.stats["logins"] += 1
+        try:
+            token, expires_at = await login()
+        except Exception:
+            self.stats["login_failures"] += 1
+            raise
+        self.set(key, token, expires_at)
+        return token
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as fh:
+                raw = json.load(fh)
+            for key, entry in raw.items():
+                self._tokens[key] = (entry["token"], datetime.fromisoformat(entry["expires_at"]))
+        except Exception:
+            # A corrupt or unreadable cache only costs one login
+            self._tokens.clear()
+
+    def _save(self) -> None:
+        if not self.cache_file:
+            return
+        payload = {
+            key: {"token": token, "expires_at": expires_at.isoformat()}
+            for key, (token, expires_at) in self._tokens.items()
+        }
+        tmp_path = f"{self.cache_file}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+        os.replace(tmp_path, self.cache_file)
+
+
+@lru_cache()
+def get_atmo_token_store() -> AtmoTokenStore:
+    settings = get_settings()
+    return AtmoTokenStore(
+        refresh_margin=timedelta(seconds=settings.ATMO_TOKEN_REFRESH_MARGIN_SECONDS),
+        cache_file=settings.ATMO_TOKEN_CACHE_FILE or None,
+    )
@@ -0,0 +1,101 @@
+"""
+Normalisation des propriétés de features ATMO, par lots.
+
+Dans une réponse ATMO, les mêmes chaînes `date_maj` / `date_ech` reviennent
+sur des milliers de features : chaque valeur distincte n'est analysée qu'une
+fois (cache LRU), puis le lot est projeté sur les champs demandés. Un
+chemin pandas optionnel (`engine="pandas"`) construit un DataFrame et
+factorise les colonnes de dates, pour les traitements hors API.
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# Output field -> ATMO property
+ATMO_FIELDS = {
+    "date": "date_maj",
+    "date_ech": "date_ech",
+    "code_zone": "code_zone",
+    "lib_zone": "lib_zone",
+    "code_qual": "code_qual",
+    "lib_qual": "lib_qual",
+    "coul_qual": "coul_qual",
+    "code_no2": "code_no2",
+    "code_o3": "code_o3",
+    "code_pm10": "code_pm10",
+    "code_pm25": "code_pm25",
+    "code_so2": "code_so2",
+}
+DEFAULT_FIELDS = ("date", "code_qual")
+DATE_FIELDS = ("date", "date_ech")
+# A feature is kept only if these properties are present (see normalize_features)
+REQUIRED_PROPERTIES = ("date_maj", "code_qual")
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Champs demandés (liste séparée par des virgules), dans l'ordre, validés."""
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ATMO_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(ATMO_FIELDS)}.")
+    return list(dict.fromkeys(names))
+
+
+@lru_cache(maxsize=4096)
+def normalize_day(value: str) -> str:
+    """Jour ISO (YYYY-MM-DD) d'un horodatage ATMO ("2024-11-14T10:00:00Z"...)."""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).date().isoformat()
+    except ValueError:
+        return value.split("T")[0]
+
+
+def _day(value: Any) -> Any:
+    return normalize_day(str(value)) if value is not None else None
+
+
+def normalize_features(
+    features: Sequence[Dict[str, Any]],
+    fields: Iterable[str] = DEFAULT_FIELDS,
+    engine: str = "python",
+) -> List[Dict[str, Any]]:
+    """
+    Un dict `{champ: valeur}` par feature gardée (`date_maj` et `code_qual`
+    renseignés), dans l'ordre des features. `engine="pandas"` exige pandas.
+    """
+    fields = list(fields)
+    if engine == "pandas":
+        return _normalize_pandas(features, fields)
+    kept = [props for props in features if props.get("date_maj") is not None and props.get("code_qual") is not None]
+    if not fields:
+        return [{} for _ in kept]
+    columns = []
+    for name in fields:
+        key = ATMO_FIELDS[name]
+        values = [props.get(key) for props in kept]
+        if name in DATE_FIELDS:
+            days = {value: _day(value) for value in set(values)}
+            values = [days[value] for value in values]
+        columns.append(values)
+    return [dict(zip(fields, row)) for row in zip(*columns)]
+
+
+def _normalize_pandas(features: Sequence[Dict[str, Any]], fields: List[str]) -> List[Dict[str, Any]]:
+    import pandas as pd
+
+    columns = list(dict.fromkeys([*REQUIRED_PROPERTIES, *(ATMO_FIELDS[name] for name in fields)]))
+    # object dtype keeps integer codes as ints despite missing values
+    frame = pd.DataFrame(list(features), columns=columns, dtype=object)
+    frame = frame[frame[list(REQUIRED_PROPERTIES)].notna().all(axis=1)]
+    out = pd.DataFrame(index=frame.index)
+    for name in fields:
+        column = frame[ATMO_FIELDS[name]]
+        if name in DATE_FIELDS:
+            # Parse each distinct timestamp once, then broadcast back to the rows
+            codes, uniques = pd.factorize(column)
+            days = [normalize_day(str(value)) for value in uniques]
+            column = pd.Series([days[code] if code >= 0 else None for code in codes], index=column.index, dtype=object)
+        out[name] = column
+    return out.astype(object).where(out.notna(), None).to_dict("records")
@@ -1,14 +1,78 @@
+import asyncio
 import os
-from typing import Any, Dict, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
 
 import httpx
 
+from app.core.concurrency import AdaptiveLimiter, call_with_backoff
+from app.core.hedging import Hedger, get_hedger
+from app.core.http import upstream_client
+from app.core.metrics import observe_upstream
+from app.core.profiling import phase
+from app.core.resilience import CircuitBreaker, get_circuit_breaker, send_with_retry
+
+def split_time_range(start: datetime, end: datetime, chunk: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Découpe [start, end) en fenêtres contiguës d'au plus `chunk`."""
+    if chunk <= timedelta(0):
+        raise ValueError("chunk must be positive")
+    windows = []
+    current = start
+    while current < end:
+        window_end = min(current + chunk, end)
+        windows.append((current, window_end))
+        current = window_end
+    return windows
+
+
+def _merge_csv(texts: List[str]) -> str:
+    # Each window repeats the CSV header line: keep only the first one
+    header = texts[0].splitlines(keepends=True)[0] if texts[0] else ""
+    parts = [texts[0]]
+    for text in texts[1:]:
+        lines = text.splitlines(keepends=True)
+        if header and lines and lines[0].rstrip("\r\n") == header.rstrip("\r\n"):
+            text = "".join(lines[1:])
+        if not text:
+            continue
+        if parts[-1] and not parts[-1].endswith("\n"):
+            parts.append("\n")
+        parts.append(text)
+    return "".join(parts)
+
+
+def merge_chunk_results(results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Recolle les réponses de plusieurs fenêtres dans la forme d'un appel unique :
+    listes JSON concaténées dans l'ordre, ou textes (CSV) mis bout à bout sans
+    répéter la ligne d'en-tête. None si les réponses ne se recollent pas (JSON
+    autre qu'une liste, formats mélangés) : l'appelant refait alors un seul appel.
+    """
+    if all(isinstance(result.get("data"), list) for result in results):
+        return {"data": [row for result in results for row in result["data"]]}
+    if results and all(isinstance(result.get("content"), str) for result in results):
+        return {"content": _merge_csv([result["content"] for result in results])}
+    return None
+
 
 class GeodairClient:
-    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout_seconds: float = 30.0) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        timeout_seconds: float = 30.0,
+        http_client: Optional[httpx.AsyncClient] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedger: Optional[Hedger] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key or os.getenv("GEODAIR_API_KEY", "")
         self.timeout_seconds = timeout_seconds
+        self._http_client = http_client
+        self._breaker = breaker or get_circuit_breaker("geodair")
+        self._hedger = hedger or get_hedger("geodair")
 
     async def fetch_air_quality(
         self,
@@ -18,7 +82,66 @@ class GeodairClient:
         station_code: Optional[str] = None,
         extra_params: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        headers = {}
+        async with upstream_client(self._http_client, self.timeout_seconds) as client:
+            return await self._fetch(
+                client, pollutant_code, start_datetime_iso, end_datetime_iso, station_code, extra_params
+            )
+
+    async def fetch_air_quality_raw(
+        self,
+        pollutant_code: str,
+        start_datetime_iso: str,
+        end_datetime_iso: str,
+        station_code: Optional[str] = None,
+        extra_params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, bytes]:
+        """
+        Corps amont brut et son Content-Type, sans décodage : à relayer tel quel
+        quand aucune transformation n'est nécessaire.
+        """
+        async with upstream_client(self._http_client, self.timeout_seconds) as client:
+            response = await self._send(
+                client, pollutant_code, start_datetime_iso, end_datetime_iso, station_code, extra_params
+            )
+            return response.headers.get("Content-Type", ""), response.content
+
+    @asynccontextmanager
+    async def stream_air_quality(
+        self,
+        pollutant_code: str,
+        start_datetime_iso: str,
+        end_datetime_iso: str,
+        station_code: Optional[str] = None,
+        accept_encoding: Optional[str] = None,
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Réponse amont en streaming (statut et en-têtes lus, corps pas encore) :
+        `aiter_bytes()` pour le corps décodé, `aiter_raw()` pour les octets tels
+        qu'envoyés (ex. gzip). La connexion est rendue à la sortie du contexte.
+        """
+        headers = {"Accept-Encoding": accept_encoding} if accept_encoding else None
+        async with upstream_client(self._http_client, self.timeout_seconds) as client:
+            response = await self._send(
+                client, pollutant_code, start_datetime_iso, end_datetime_iso, station_code, stream=True, headers=headers
+            )
+            try:
+                yield response
+            finally:
+                await response.aclose()
+
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        pollutant_code: str,
+        start_datetime_iso: str,
+        end_datetime_iso: str,
+        station_code: Optional[str] = None,
+        extra_params: Optional[Dict[str, Any]] = None,
+        stream: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+        max_attempts: Optional[int] = None,
+    ) -> httpx.Response:
+        headers = dict(headers or {})
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
 
@@ -36,13 +159,104 @@ class GeodairClient:
         # according to your account and documentation. See https://www.geodair.fr/donnees/api
         endpoint = f"{self.base_url}/donnees/api"
 
-        async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
-            response = await client.get(endpoint, params=params, headers=headers)
-            response.raise_for_status()
-            # The API may return JSON or a file. Attempt JSON first.
+        request = client.build_request("GET", endpoint, params=params, headers=headers, timeout=self.timeout_seconds)
+        with phase("upstream"):
+            response = await send_with_retry(
+                self._breaker,
+                self._hedger.wrap(observe_upstream("geodair", "data", lambda: client.send(request, stream=stream))),
+                max_attempts=max_attempts,
+            )
+        if stream and response.is_error:
+            await response.aclose()
+        response.raise_for_status()
+        return response
+
+    async def _fetch(
+        self,
+        client: httpx.AsyncClient,
+        pollutant_code: str,
+        start_datetime_iso: str,
+        end_datetime_iso: str,
+        station_code: Optional[str] = None,
+        extra_params: Optional[Dict[str, Any]] = None,
+        max_attempts: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        response = await self._send(
+            client,
+            pollutant_code,
+            start_datetime_iso,
+            end_datetime_iso,
+            station_code,
+            extra_params,
+            max_attempts=max_attempts,
+        )
+        # The API may return JSON or a file. Attempt JSON first.
+        with phase("parse"):
             try:
                 return {"data": response.json()}
             except Exception:
                 return {"content": response.text}
 
+    async def fetch_air_quality_range(
+        self,
+        pollutant_code: str,
+        start_datetime_iso: str,
+        end_datetime_iso: str,
+        station_code: Optional[str] = None,
+        chunk: timedelta = timedelta(days=1),
+        concurrency: int = 4,
+        max_attempts: int = 3,
+        backoff_seconds: float = 1.0,
+    ) -> AsyncIterator[Tuple[datetime, datetime, Dict[str, Any]]]:
+        """
+        Variante de `fetch_air_quality` pour les longues périodes : la fenêtre est
+        découpée en morceaux de `chunk`, récupérés en parallèle (au plus
+        `concurrency` en vol, réduit sur 429/5xx) et produits dans l'ordre
+        chronologique sous forme `(début, fin, résultat)`.
+        Chaque morceau est réessayé indépendamment ; si l'un échoue après
+        `max_attempts` tentatives, son exception est levée à son tour de sortie.
+        """
+        windows = split_time_range(
+            datetime.fromisoformat(start_datetime_iso),
+            datetime.fromisoformat(end_datetime_iso),
+            chunk,
+        )
+        limiter = AdaptiveLimiter(initial=concurrency, max_limit=max(concurrency, 1))
+
+        async def fetch_window(window_start: datetime, window_end: datetime) -> Dict[str, Any]:
+            return await call_with_backoff(
+                limiter,
+                # One upstream call per attempt: every 429/5xx reaches the limiter
+                lambda: self._fetch(
+                    client,
+                    pollutant_code,
+                    # isoformat keeps the caller's UTC offset, if any
+                    window_start.isoformat(),
+                    window_end.isoformat(),
+                    station_code,
+                    max_attempts=1,
+                ),
+                max_attempts=max_attempts,
+                backoff_seconds=backoff_seconds,
+            )
 
+        async with upstream_client(self._http_client, self.timeout_seconds) as client:
+            # Only a bounded look-ahead of windows is scheduled, so results do not pile up
+            # in memory when the consumer is slower than the upstream.
+            pending: Deque[Tuple[datetime, datetime, "asyncio.Task[Dict[str, Any]]"]] = deque()
+            remaining = iter(windows)
+            try:
+                while True:
+                    while len(pending) < concurrency * 2:
+                        window = next(remaining, None)
+                        if window is None:
+                            break
+                        pending.append((window[0], window[1], asyncio.ensure_future(fetch_window(*window))))
+                    if not pending:
+                        return
+                    window_start, window_end, task = pending.popleft()
+                    yield window_start, window_end, await task
+            finally:
+                for _, _, task in pending:
+                    task.cancel()
+                await asyncio.gather(*(task for _, _, task in pending), return_exceptions=True)
@@ -0,0 +1,191 @@
+"""
+Parseur incrémental pour les FeatureCollection GeoJSON (ATMO).
+
+Plutôt que de charger toute la réponse avec `response.json()`, les octets sont
+découpés au fil de l'eau en éléments du tableau `features` (ou du tableau
+racine si l'API renvoie une liste). Seul l'élément courant est décodé : la
+mémoire reste bornée par la taille d'une feature, quelle que soit la taille
+de la réponse.
+
+Un document tronqué, un élément mal formé ou un corps sans le tableau attendu
+(page HTML de maintenance, objet d'erreur JSON) lève `ValueError` : un
+résultat partiel ou vide n'est jamais renvoyé comme s'il était complet.
+"""
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from app.core.profiling import phase
+
+# Until the target array is found we need ':' and ',' to recognise the "features" key
+_HEADER_TOKENS = re.compile(r'["{}\[\]:,]')
+_STRING_BODY = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_SEPARATORS = re.compile(r"[\s,]*")
+_DECODER = json.JSONDecoder()
+# A decode error further than this from the end of the buffer cannot be a cut-off token
+_MAX_PARTIAL_TOKEN = 64
+
+
+class FeatureSplitter:
+    """
+    Découpe un flux JSON en éléments décodés :
+      - `{"features": [ {...}, {...} ]}` -> chaque feature
+      - `[ {...}, {...} ]` -> chaque élément de la liste
+    L'en-tête du document est parcouru caractère structurant par caractère
+    structurant ; chaque élément du tableau est ensuite décodé d'un bloc par le
+    décodeur C de `json` dès qu'il est complet dans le tampon.
+    """
+
+    def __init__(self, array_key: str = "features", max_element_chars: int = 16 * 1024 * 1024) -> None:
+        self.array_key = array_key
+        self.max_element_chars = max_element_chars
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_array = False
+        self._found = False
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buf)
+
+    def feed(self, text: str) -> List[Any]:
+        if self.done:
+            return []
+        buf = self._buf + text
+        pos = self._pos
+        if not self._in_array:
+            pos = self._scan_header(buf, pos)
+        elements: List[Any] = []
+        if self._in_array:
+            pos = self._decode_elements(buf, pos, elements)
+        # Everything before `pos` has been consumed
+        self._buf = buf[pos:]
+        self._pos = 0
+        return elements
+
+    def finish(self) -> None:
+        """Fin du flux : lève `ValueError` si le document est incomplet ou sans tableau cible."""
+        if self.done and self._found:
+            return
+        if self._in_array:
+            raise ValueError(f"Truncated JSON: '{self.array_key}' array is not closed")
+        if self._depth > 0:
+            raise ValueError("Truncated JSON document")
+        raise ValueError(f"No '{self.array_key}' array in the response body")
+
+    def _scan_header(self, buf: str, pos: int) -> int:
+        while True:
+            match = _HEADER_TOKENS.search(buf, pos)
+            if match is None:
+                return len(buf)
+            idx = match.start()
+            char = buf[idx]
+            if char == '"':
+                end = _STRING_BODY.match(buf, idx + 1)
+                if end is None:
+                    # Incomplete string: resume from its opening quote on the next chunk
+                    return idx
+                if self._depth == 1:
+                    self._last_string = buf[idx + 1 : end.end() - 1]
+                pos = end.end()
+                continue
+            pos = idx + 1
+            if char == ":":
+                if self._depth == 1:
+                    self._current_key = self._last_string
+            elif char == ",":
+                if self._depth == 1:
+                    self._current_key = None
+            elif char == "[" and (
+                self._depth == 0 or (self._depth == 1 and self._current_key == self.array_key)
+            ):
+                self._in_array = self._found = True
+                return pos
+            elif char in "{[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth < 0:
+                    self.done = True
+                    return pos
+
+    def _decode_elements(self, buf: str, pos: int, elements: List[Any]) -> int:
+        size = len(buf)
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos >= size:
+                return pos
+            if buf[pos] == "]":
+                # End of the target array: the rest of the document is irrelevant
+                self.done = True
+                return pos + 1
+            try:
+                value, end = _DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError as exc:
+                incomplete = exc.msg.startswith("Unterminated string") or size - exc.pos <= _MAX_PARTIAL_TOKEN
+                if not incomplete:
+                    raise ValueError(f"Malformed JSON element in '{self.array_key}' array: {exc.msg}") from exc
+                if size - pos > self.max_element_chars:
+                    raise ValueError(f"JSON element larger than {self.max_element_chars} characters") from exc
+                # Element not complete yet: wait for the next chunk
+                return pos
+            if end >= size and not isinstance(value, (dict, list)):
+                # A scalar touching the end of the buffer may still be truncated (e.g. "12" of "123")
+                return pos
+            elements.append(value)
+            pos = end
+
+
+def _properties(element: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(element, dict):
+        return None
+    props = element.get("properties")
+    if isinstance(props, dict):
+        return props
+    # Plain list rows carry their fields at the top level
+    return element if "properties" not in element else None
+
+
+def _emit(splitter: FeatureSplitter, text: str) -> Iterator[Dict[str, Any]]:
+    for element in splitter.feed(text):
+        props = _properties(element)
+        if props is not None:
+            yield props
+
+
+def iter_feature_properties(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    splitter = FeatureSplitter()
+    for chunk in chunks:
+        yield from _emit(splitter, decoder.decode(chunk))
+        if splitter.done:
+            splitter.finish()
+            return
+    yield from _emit(splitter, decoder.decode(b"", final=True))
+    splitter.finish()
+
+
+async def aiter_feature_properties(
+    chunks: AsyncIterator[bytes],
+    encoding: str = "utf-8",
+) -> AsyncIterator[Dict[str, Any]]:
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    splitter = FeatureSplitter()
+    async for chunk in chunks:
+        with phase("parse"):
+            rows = list(_emit(splitter, decoder.decode(chunk)))
+        for props in rows:
+            yield props
+        if splitter.done:
+            splitter.finish()
+            return
+    with phase("parse"):
+        rows = list(_emit(splitter, decoder.decode(b"", final=True)))
+    for props in rows:
+        yield props
+    splitter.finish()
@@ -0,0 +1,261 @@
+"""
+Synchronisation incrémentale des indicateurs ATMO / Geod'air.
+
+Pour chaque (ville, type, source), la table `etl_watermarks` garde la dernière
+date chargée avec succès. Une synchronisation ne demande à l'amont que les
+jours postérieurs, fenêtre par fenêtre dans l'ordre chronologique ; le
+watermark n'avance qu'une fois une fenêtre entièrement chargée. Après un
+crash, seule la fenêtre en cours est retéléchargée (les upserts la rendent
+idempotente).
+
+Un appel ATMO renvoie tous les sous-indices d'une zone : une fenêtre chargée
+fait avancer les watermarks de tous les types ATMO de la zone, y compris
+ceux absents de la réponse.
+
+Usage:
+    cd backend
+    python -m app.etl.incremental atmo --code_zone 75056 --code_zone 69123 --since 2025-01-01
+    python -m app.etl.incremental geodair --insee 75056 --pollutant 24 --since 2025-01-01
+"""
+import argparse
+import asyncio
+from datetime import date as date_type, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.rollups import AffectedRanges, refresh_affected
+from app.etl.atmo_client import AtmoClient
+from app.etl.geodair_client import GeodairClient
+from app.etl.load_indicators import (
+    ATMO_INDICATOR_FIELDS,
+    ATMO_SOURCE,
+    GEODAIR_SOURCE,
+    IndicatorRow,
+    chunked,
+    collect_atmo_chunks,
+    dialect_insert,
+    geodair_indicator_rows,
+    upsert_indicator_chunk,
+)
+from app.models import City, EtlWatermark
+
+# (insee_code, type, source) -> last loaded date
+WatermarkKey = Tuple[str, str, str]
+
+
+def get_watermark(session: Session, insee_code: str, source: str, type: Optional[str] = None) -> Optional[date_type]:
+    """
+    Date jusqu'à laquelle `insee_code` est à jour pour `source`. Sans `type`,
+    renvoie le minimum sur tous les types de la source (le plus en retard).
+    """
+    stmt = (
+        select(func.min(EtlWatermark.last_date))
+        .join(City, City.id == EtlWatermark.city_id)
+        .where(City.insee_code == insee_code, EtlWatermark.source == source)
+    )
+    if type is not None:
+        stmt = stmt.where(EtlWatermark.type == type)
+    return session.scalar(stmt)
+
+
+def advance_watermarks(session: Session, marks: Dict[WatermarkKey, date_type]) -> None:
+    """Avance les watermarks (jamais en arrière). Ne commite pas."""
+    if not marks:
+        return
+    insee_codes = {insee_code for insee_code, _, _ in marks}
+    city_ids = dict(session.execute(select(City.insee_code, City.id).where(City.insee_code.in_(insee_codes))).all())
+    values = [
+        {"city_id": city_ids[insee_code], "type": type, "source": source, "last_date": last_date}
+        for (insee_code, type, source), last_date in marks.items()
+        if insee_code in city_ids
+    ]
+    if not values:
+        return
+    insert = dialect_insert(session)
+    stmt = insert(EtlWatermark).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["city_id", "type", "source"],
+        set_={
+            "last_date": case(
+                (stmt.excluded.last_date > EtlWatermark.last_date, stmt.excluded.last_date),
+                else_=EtlWatermark.last_date,
+            ),
+            "updated_at": func.now(),
+        },
+    )
+    session.execute(stmt)
+
+
+def date_windows(start: date_type, until: date_type, window_days: int) -> Iterator[Tuple[date_type, date_type]]:
+    """Fenêtres [début, fin] consécutives et inclusives couvrant [start, until]."""
+    current = start
+    while current <= until:
+        end = min(current + timedelta(days=window_days - 1), until)
+        yield current, end
+        current = end + timedelta(days=1)
+
+
+def _track(marks: Dict[WatermarkKey, date_type], rows: Iterable[IndicatorRow]) -> None:
+    for row in rows:
+        key = (row["insee_code"], row["type"], row["source"])
+        if key not in marks or row["date"] > marks[key]:
+            marks[key] = row["date"]
+
+
+def _window_marks(insee_codes: Iterable[str], end: date_type) -> Dict[WatermarkKey, date_type]:
+    # One ATMO call returns every sub-index of a zone: once the window is committed, each type is
+    # up to date, including those the upstream no longer reports (they would freeze the minimum)
+    return {
+        (insee_code, indicator_type, ATMO_SOURCE): end
+        for insee_code in insee_codes
+        for indicator_type in ATMO_INDICATOR_FIELDS.values()
+    }
+
+
+def _resume_from(session: Session, insee_code: str, source: str, since: date_type) -> date_type:
+    watermark = get_watermark(session, insee_code, source)
+    return max(since, watermark + timedelta(days=1)) if watermark else since
+
+
+async def sync_atmo_zone(
+    session: Session,
+    client: AtmoClient,
+    code_zone: str,
+    since: date_type,
+    until: Optional[date_type] = None,
+    window_days: int = 7,
+    chunk_size: int = 1000,
+) -> int:
+    """
+    Charge les indices ATMO de `code_zone` postérieurs à son watermark.
+    `until` vaut hier par défaut : les indices du jour peuvent encore changer.
+    """
+    until = until or date_type.today() - timedelta(days=1)
+    total = 0
+    for start, end in date_windows(_resume_from(session, code_zone, ATMO_SOURCE, since), until, window_days):
+        marks: Dict[WatermarkKey, date_type] = {}
+        affected: AffectedRanges = {}
+        # ATMO requires date_historique strictly before date
+        features = client.iter_indices_atmo(
+            date=end.isoformat(),
+            date_historique=(start - timedelta(days=1)).isoformat(),
+            code_zone=code_zone,
+        )
+        async for chunk in collect_atmo_chunks(features, chunk_size):
+            chunk = [row for row in chunk if start <= row["date"] <= end]
+            total += upsert_indicator_chunk(session, chunk, affected)
+            session.commit()
+            _track(marks, chunk)
+        # The window is fully committed: only now may the watermark move past it
+        refresh_affected(session, affected)
+        advance_watermarks(session, _window_marks({code_zone, *(insee for insee, _, _ in marks)}, end))
+        session.commit()
+    return total
+
+
+async def sync_geodair_city(
+    session: Session,
+    client: GeodairClient,
+    insee_code: str,
+    pollutant_code: str,
+    since: date_type,
+    until: Optional[date_type] = None,
+    station_code: Optional[str] = None,
+    city_name: Optional[str] = None,
+    window_days: int = 7,
+    chunk_size: int = 1000,
+) -> int:
+    until = until or date_type.today() - timedelta(days=1)
+    indicator_type = f"geodair_{pollutant_code}"
+    watermark = get_watermark(session, insee_code, GEODAIR_SOURCE, type=indicator_type)
+    start_from = max(since, watermark + timedelta(days=1)) if watermark else since
+    total = 0
+    for start, end in date_windows(start_from, until, window_days):
+        result = await client.fetch_air_quality(
+            pollutant_code=pollutant_code,
+            start_datetime_iso=f"{start.isoformat()}T00:00:00",
+            end_datetime_iso=f"{(end + timedelta(days=1)).isoformat()}T00:00:00",
+            station_code=station_code,
+        )
+        rows: List[IndicatorRow] = [
+            row
+            for row in geodair_indicator_rows(result, insee_code, pollutant_code, city_name=city_name)
+            if start <= row["date"] <= end
+        ]
+        marks: Dict[WatermarkKey, date_type] = {}
+        affected: AffectedRanges = {}
+        for chunk in chunked(rows, chunk_size):
+            total += upsert_indicator_chunk(session, chunk, affected)
+            session.commit()
+            _track(marks, chunk)
+        refresh_affected(session, affected)
+        advance_watermarks(session, marks)
+        session.commit()
+    return total
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Synchronisation incrémentale des indicateurs")
+    parser.add_argument("--since", required=True, type=date_type.fromisoformat, help="Date de départ sans watermark")
+    parser.add_argument("--until", type=date_type.fromisoformat, help="Dernier jour à charger (défaut: hier)")
+    parser.add_argument("--window-days", type=int, default=7)
+    parser.add_argument("--chunk-size", type=int, default=settings.ETL_CHUNK_SIZE)
+    sub = parser.add_subparsers(dest="source", required=True)
+
+    atmo = sub.add_parser("atmo")
+    atmo.add_argument("--code_zone", action="append", required=True)
+
+    geodair = sub.add_parser("geodair")
+    geodair.add_argument("--insee", required=True)
+    geodair.add_argument("--city-name")
+    geodair.add_argument("--pollutant", required=True)
+    geodair.add_argument("--station")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    async def run(session: Session) -> int:
+        if args.source == "atmo":
+            client = AtmoClient(
+                base_url=settings.ATMO_API_BASE_URL,
+                api_key=settings.ATMO_API_KEY or None,
+                username=settings.ATMO_USERNAME,
+                password=settings.ATMO_PASSWORD,
+            )
+            total = 0
+            for code_zone in args.code_zone:
+                total += await sync_atmo_zone(
+                    session,
+                    client,
+                    code_zone,
+                    since=args.since,
+                    until=args.until,
+                    window_days=args.window_days,
+                    chunk_size=args.chunk_size,
+                )
+            return total
+        client = GeodairClient(base_url=settings.GEODAIR_API_BASE_URL, api_key=settings.GEODAIR_API_KEY or None)
+        return await sync_geodair_city(
+            session,
+            client,
+            insee_code=args.insee,
+            pollutant_code=args.pollutant,
+            since=args.since,
+            until=args.until,
+            station_code=args.station,
+            city_name=args.city_name,
+            window_days=args.window_days,
+            chunk_size=args.chunk_size,
+        )
+
+    with SessionLocal() as session:
+        loaded = asyncio.run(run(session))
+    print(f"{loaded} indicateurs chargés")
+
+
+if __name__ == "__main__":
+    main()
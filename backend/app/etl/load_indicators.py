@@ -0,0 +1,432 @@
+"""
+Chargement des mesures ATMO et Geod'air dans la table `indicators`.
+
+Les données amont sont normalisées en lignes `Indicator` puis chargées par
+lots avec `INSERT ... ON CONFLICT DO UPDATE` sur la clé naturelle
+(city_id, type, date, source) : relancer un chargement met à jour les
+valeurs existantes au lieu de créer des doublons.
+
+Usage:
+    cd backend
+    python -m app.etl.load_indicators atmo --code_zone 75056 --date 2025-11-14 --date_historique 2025-11-01
+    python -m app.etl.load_indicators atmo --code_zone 75056 --code_zone 69123 --concurrency 16 \
+        --date 2025-11-14 --date_historique 2025-11-01
+    python -m app.etl.load_indicators geodair --insee 75056 --pollutant 24 \\
+        --start 2025-11-01T00:00:00 --end 2025-11-14T00:00:00
+"""
+import argparse
+import asyncio
+from datetime import date as date_type, datetime
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.rollups import AffectedRanges, refresh_affected, track_affected
+from app.etl.atmo_client import AtmoClient
+from app.etl.geodair_client import GeodairClient
+from app.models import City, Indicator
+
+ATMO_SOURCE = "atmo"
+GEODAIR_SOURCE = "geodair"
+
+# ATMO property -> indicator type
+ATMO_INDICATOR_FIELDS = {
+    "code_qual": "atmo_indice",
+    "code_no2": "atmo_no2",
+    "code_o3": "atmo_o3",
+    "code_pm10": "atmo_pm10",
+    "code_pm25": "atmo_pm25",
+    "code_so2": "atmo_so2",
+}
+
+GEODAIR_DATE_KEYS = ("date_debut", "Date de début", "date", "datetime")
+GEODAIR_VALUE_KEYS = ("valeur", "Valeur", "value")
+
+IndicatorRow = Dict[str, Any]
+
+
+def _parse_day(value: Any) -> Optional[date_type]:
+    if value is None:
+        return None
+    return _parse_day_text(str(value).strip())
+
+
+@lru_cache(maxsize=4096)
+def _parse_day_text(text: str) -> Optional[date_type]:
+    # Upstream payloads repeat the same few timestamps on every row
+    try:
+        return date_type.fromisoformat(text[:10])
+    except ValueError:
+        try:
+            return datetime.strptime(text[:10], "%d/%m/%Y").date()
+        except ValueError:
+            return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(str(value).replace(",", "."))
+    except ValueError:
+        return None
+
+
+def atmo_indicator_rows(features: Iterable[Dict[str, Any]]) -> Iterator[IndicatorRow]:
+    """
+    Une ligne par sous-indice ATMO et par feature. La date retenue est `date_ech`
+    (jour auquel s'applique l'indice), à défaut `date_maj`.
+    """
+    for props in features:
+        insee_code = props.get("code_zone")
+        day = _parse_day(props.get("date_ech") or props.get("date_maj"))
+        if not insee_code or day is None:
+            continue
+        for field, indicator_type in ATMO_INDICATOR_FIELDS.items():
+            value = _to_float(props.get(field))
+            if value is None:
+                continue
+            yield {
+                "insee_code": str(insee_code),
+                "city_name": props.get("lib_zone") or str(insee_code),
+                "type": indicator_type,
+                "value": value,
+                "date": day,
+                "source": ATMO_SOURCE,
+            }
+
+
+GeodairSums = Dict[date_type, List[float]]
+
+
+def accumulate_geodair_sums(payload: Any, sums: GeodairSums) -> None:
+    """Ajoute les mesures Geod'air de `payload` aux sommes [total, nombre] par jour."""
+    records = payload.get("data", payload) if isinstance(payload, dict) else payload
+    if not isinstance(records, list):
+        return
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        day = _parse_day(next((record[k] for k in GEODAIR_DATE_KEYS if k in record), None))
+        value = _to_float(next((record[k] for k in GEODAIR_VALUE_KEYS if k in record), None))
+        if day is None or value is None:
+            continue
+        totals = sums.setdefault(day, [0.0, 0])
+        totals[0] += value
+        totals[1] += 1
+
+
+def _geodair_daily_rows(
+    sums: GeodairSums, insee_code: str, pollutant_code: str, city_name: Optional[str] = None
+) -> List[IndicatorRow]:
+    return [
+        {
+            "insee_code": insee_code,
+            "city_name": city_name or insee_code,
+            "type": f"geodair_{pollutant_code}",
+            "value": total / count,
+            "date": day,
+            "source": GEODAIR_SOURCE,
+        }
+        for day, (total, count) in sorted(sums.items())
+    ]
+
+
+def geodair_indicator_rows(
+    payload: Any,
+    insee_code: str,
+    pollutant_code: str,
+    city_name: Optional[str] = None,
+) -> List[IndicatorRow]:
+    """
+    Moyenne journalière des mesures Geod'air d'une commune. La colonne `date`
+    étant journalière, les mesures horaires sont agrégées par jour.
+    """
+    sums: GeodairSums = {}
+    accumulate_geodair_sums(payload, sums)
+    return _geodair_daily_rows(sums, insee_code, pollutant_code, city_name=city_name)
+
+
+def dialect_insert(session: Session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise RuntimeError(f"Bulk upsert not supported for dialect '{dialect}'")
+
+
+def upsert_cities(session: Session, cities: Dict[str, str]) -> Dict[str, int]:
+    """Crée les villes manquantes (clé INSEE) et renvoie la correspondance insee_code -> id."""
+    if not cities:
+        return {}
+    insert = dialect_insert(session)
+    stmt = insert(City).values([{"insee_code": code, "name": name} for code, name in cities.items()])
+    session.execute(stmt.on_conflict_do_nothing(index_elements=["insee_code"]))
+    rows = session.execute(select(City.insee_code, City.id).where(City.insee_code.in_(list(cities))))
+    return {insee_code: city_id for insee_code, city_id in rows}
+
+
+def upsert_indicator_chunk(
+    session: Session, rows: List[IndicatorRow], affected: Optional[AffectedRanges] = None
+) -> int:
+    """
+    Charge un lot de lignes en un seul INSERT ... ON CONFLICT DO UPDATE. Ne commite pas.
+    Les (ville, date) écrites sont notées dans `affected` pour le rafraîchissement des agrégats.
+    """
+    if not rows:
+        return 0
+    city_ids = upsert_cities(session, {row["insee_code"]: row["city_name"] for row in rows})
+    # A single statement may not touch the same key twice: keep the last value per key
+    values: Dict[Tuple[int, str, date_type, str], Dict[str, Any]] = {}
+    for row in rows:
+        city_id = city_ids[row["insee_code"]]
+        key = (city_id, row["type"], row["date"], row["source"])
+        values[key] = {
+            "city_id": city_id,
+            "type": row["type"],
+            "value": row["value"],
+            "date": row["date"],
+            "source": row["source"],
+        }
+        if affected is not None:
+            track_affected(affected, city_id, row["date"])
+    insert = dialect_insert(session)
+    stmt = insert(Indicator).values(list(values.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["city_id", "type", "date", "source"],
+        set_={"value": stmt.excluded.value},
+    )
+    session.execute(stmt)
+    return len(values)
+
+
+def chunked(rows: Iterable[IndicatorRow], chunk_size: int) -> Iterator[List[IndicatorRow]]:
+    chunk: List[IndicatorRow] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_upsert_indicators(session: Session, rows: Iterable[IndicatorRow], chunk_size: int = 1000) -> int:
+    """
+    Charge `rows` par lots de `chunk_size`, avec un commit par lot, puis rafraîchit
+    les agrégats des plages touchées. Renvoie le nombre de lignes écrites.
+    """
+    total = 0
+    affected: AffectedRanges = {}
+    for chunk in chunked(rows, chunk_size):
+        total += upsert_indicator_chunk(session, chunk, affected)
+        session.commit()
+    refresh_affected(session, affected)
+    session.commit()
+    return total
+
+
+async def collect_atmo_chunks(
+    features: AsyncIterator[Dict[str, Any]],
+    chunk_size: int,
+) -> AsyncIterator[List[IndicatorRow]]:
+    chunk: List[IndicatorRow] = []
+    async for props in features:
+        chunk.extend(atmo_indicator_rows([props]))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def load_atmo_indices(
+    session: Session,
+    client: AtmoClient,
+    date: str,
+    date_historique: str,
+    code_zone: Optional[str] = None,
+    chunk_size: int = 1000,
+) -> int:
+    """Streame les indices ATMO et les charge au fil de l'eau, lot par lot."""
+    total = 0
+    affected: AffectedRanges = {}
+    features = client.iter_indices_atmo(date=date, date_historique=date_historique, code_zone=code_zone)
+    async for chunk in collect_atmo_chunks(features, chunk_size):
+        total += upsert_indicator_chunk(session, chunk, affected)
+        session.commit()
+    refresh_affected(session, affected)
+    session.commit()
+    return total
+
+
+def _feature_properties(payload: Any) -> Iterator[Dict[str, Any]]:
+    # FeatureCollection -> properties of each feature; plain list -> each row
+    rows = (payload.get("features") or []) if isinstance(payload, dict) else payload
+    for row in rows if isinstance(rows, list) else []:
+        if isinstance(row, dict):
+            props = row.get("properties", row)
+            if isinstance(props, dict):
+                yield props
+
+
+async def load_atmo_zones(
+    session: Session,
+    client: AtmoClient,
+    zones: List[str],
+    date: str,
+    date_historique: str,
+    concurrency: int = 8,
+    chunk_size: int = 1000,
+) -> Tuple[int, Dict[str, BaseException]]:
+    """
+    Récupère plusieurs zones en parallèle et charge chacune dès sa réception.
+    Renvoie le nombre de lignes écrites et les zones en échec.
+    """
+    total = 0
+    failures: Dict[str, BaseException] = {}
+    async for code_zone, result in client.fetch_indices_atmo_many(
+        zones, date=date, date_historique=date_historique, concurrency=concurrency
+    ):
+        if isinstance(result, BaseException):
+            failures[code_zone] = result
+            continue
+        total += bulk_upsert_indicators(
+            session, atmo_indicator_rows(_feature_properties(result)), chunk_size=chunk_size
+        )
+    return total, failures
+
+
+async def load_geodair_measurements(
+    session: Session,
+    client: GeodairClient,
+    insee_code: str,
+    pollutant_code: str,
+    start: str,
+    end: str,
+    station_code: Optional[str] = None,
+    city_name: Optional[str] = None,
+    chunk_size: int = 1000,
+    concurrency: int = 4,
+) -> int:
+    """
+    Récupère les fenêtres journalières en parallèle et les charge au fil de
+    l'eau. Les fenêtres arrivent dans l'ordre : un jour antérieur au début de
+    la fenêtre reçue est complet, sa moyenne peut être écrite et oubliée.
+    """
+    total = 0
+    affected: AffectedRanges = {}
+    sums: GeodairSums = {}
+
+    def flush(before: Optional[date_type] = None) -> int:
+        done = {day: sums.pop(day) for day in sorted(sums) if before is None or day < before}
+        rows = _geodair_daily_rows(done, insee_code, pollutant_code, city_name=city_name)
+        written = 0
+        for chunk in chunked(rows, chunk_size):
+            written += upsert_indicator_chunk(session, chunk, affected)
+            session.commit()
+        return written
+
+    async for window_start, _, result in client.fetch_air_quality_range(
+        pollutant_code=pollutant_code,
+        start_datetime_iso=start,
+        end_datetime_iso=end,
+        station_code=station_code,
+        concurrency=concurrency,
+    ):
+        total += flush(before=window_start.date())
+        accumulate_geodair_sums(result, sums)
+    total += flush()
+    refresh_affected(session, affected)
+    session.commit()
+    return total
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Charge les mesures ATMO / Geod'air dans la table indicators")
+    parser.add_argument("--chunk-size", type=int, default=settings.ETL_CHUNK_SIZE)
+    parser.add_argument("--create-tables", action="store_true", help="Crée les tables manquantes avant le chargement")
+    sub = parser.add_subparsers(dest="source", required=True)
+
+    atmo = sub.add_parser("atmo")
+    atmo.add_argument("--date", required=True)
+    atmo.add_argument("--date_historique", required=True)
+    atmo.add_argument("--code_zone", action="append", help="Répétable : les zones sont récupérées en parallèle")
+    atmo.add_argument("--concurrency", type=int, default=8)
+
+    geodair = sub.add_parser("geodair")
+    geodair.add_argument("--insee", required=True, help="Code INSEE de la commune de rattachement")
+    geodair.add_argument("--city-name")
+    geodair.add_argument("--pollutant", required=True)
+    geodair.add_argument("--start", required=True)
+    geodair.add_argument("--end", required=True)
+    geodair.add_argument("--station")
+    geodair.add_argument("--concurrency", type=int, default=4, help="Fenêtres journalières récupérées en parallèle")
+    args = parser.parse_args()
+
+    from app.db.session import Base, SessionLocal, get_engine
+
+    if args.create_tables:
+        Base.metadata.create_all(bind=get_engine())
+
+    with SessionLocal() as session:
+        if args.source == "atmo":
+            client = AtmoClient(
+                base_url=settings.ATMO_API_BASE_URL,
+                api_key=settings.ATMO_API_KEY or None,
+                username=settings.ATMO_USERNAME,
+                password=settings.ATMO_PASSWORD,
+            )
+            zones = args.code_zone or []
+            if len(zones) > 1:
+                loaded, failures = asyncio.run(
+                    load_atmo_zones(
+                        session,
+                        client,
+                        zones,
+                        date=args.date,
+                        date_historique=args.date_historique,
+                        concurrency=args.concurrency,
+                        chunk_size=args.chunk_size,
+                    )
+                )
+                for code_zone, exc in failures.items():
+                    print(f"Zone {code_zone} en échec: {exc}")
+            else:
+                loaded = asyncio.run(
+                    load_atmo_indices(
+                        session,
+                        client,
+                        date=args.date,
+                        date_historique=args.date_historique,
+                        code_zone=zones[0] if zones else None,
+                        chunk_size=args.chunk_size,
+                    )
+                )
+        else:
+            client = GeodairClient(base_url=settings.GEODAIR_API_BASE_URL, api_key=settings.GEODAIR_API_KEY or None)
+            loaded = asyncio.run(
+                load_geodair_measurements(
+                    session,
+                    client,
+                    insee_code=args.insee,
+                    pollutant_code=args.pollutant,
+                    start=args.start,
+                    end=args.end,
+                    station_code=args.station,
+                    city_name=args.city_name,
+                    chunk_size=args.chunk_size,
+                    concurrency=args.concurrency,
+                )
+            )
+    print(f"{loaded} indicateurs chargés")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,32 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
 from app.api.v1 import router as api_v1_router
+from app.api.v1.endpoints.atmo import close_atmo_cache
+from app.api.v1.endpoints.metrics import router as metrics_router
+from app.core.compression import CompressionMiddleware
+from app.core.config import get_settings
+from app.core.http import create_http_client
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware, ServerTimingMiddleware
+from app.core.responses import FastJSONResponse
+from app.db.session import dispose_async_engine, dispose_engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # One pooled upstream client for the whole process (keep-alive, HTTP/2 if enabled)
+    app.state.http_client = create_http_client(get_settings())
+    try:
+        yield
+    finally:
+        await app.state.http_client.aclose()
+        app.state.http_client = None
+        await dispose_async_engine()
+        dispose_engine()
+        close_atmo_cache()
 
 
 def create_app() -> FastAPI:
@@ -8,8 +34,34 @@ def create_app() -> FastAPI:
         title="Observatoire Citadin API",
         version="1.0.0",
         description="Backend de l'Observatoire Citadin",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
     )
 
+    settings = get_settings()
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+
+    if settings.PROFILING_SECRET:
+        app.add_middleware(
+            ProfilingMiddleware,
+            secret=settings.PROFILING_SECRET,
+            output_dir=settings.PROFILING_OUTPUT_DIR,
+            interval=settings.PROFILING_INTERVAL_SECONDS,
+        )
+    if settings.SERVER_TIMING_ENABLED:
+        app.add_middleware(ServerTimingMiddleware)
+
+    if settings.METRICS_ENABLED:
+        # Outermost: the measured latency includes compression
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
+
     app.include_router(api_v1_router, prefix="/api/v1")
 
     @app.get("/")
@@ -20,5 +72,3 @@ def create_app() -> FastAPI:
 
 
 app = create_app()
-
-
@@ -1,6 +1,6 @@
 from .city import City
+from .etl_watermark import EtlWatermark
 from .indicator import Indicator
+from .indicator_rollup import IndicatorDailyRollup, IndicatorMonthlyRollup
 
-__all__ = ["City", "Indicator"]
-
-
+__all__ = ["City", "EtlWatermark", "Indicator", "IndicatorDailyRollup", "IndicatorMonthlyRollup"]
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, UniqueConstraint, func
+
+from app.db.session import Base
+
+
+class EtlWatermark(Base):
+    """Dernière date chargée avec succès par (ville, type d'indicateur, source)."""
+
+    __tablename__ = "etl_watermarks"
+    __table_args__ = (
+        UniqueConstraint("city_id", "type", "source", name="uq_etl_watermarks_city_type_source"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    city_id = Column(Integer, ForeignKey("cities.id", ondelete="CASCADE"), nullable=False, index=True)
+    type = Column(String(100), nullable=False)
+    source = Column(String(255), nullable=False)
+    last_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
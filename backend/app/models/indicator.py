@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String
+from sqlalchemy import Column, Date, Float, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -6,14 +6,21 @@ from app.db.session import Base
 
 class Indicator(Base):
     __tablename__ = "indicators"
+    __table_args__ = (
+        # Natural key used by the ETL upserts (INSERT ... ON CONFLICT DO UPDATE)
+        UniqueConstraint("city_id", "type", "date", "source", name="uq_indicators_city_type_date_source"),
+        # Time-series reads; INCLUDE (value) makes the aggregations index-only on PostgreSQL
+        Index("ix_indicators_city_type_date", "city_id", "type", "date", postgresql_include=["value"]),
+        Index("ix_indicators_date_brin", "date", postgresql_using="brin"),
+    )
 
+    # On PostgreSQL the table is partitioned by month and its primary key is (id, date):
+    # see migrations/0003_indicators_monthly_partitions.sql
     id = Column(Integer, primary_key=True, index=True)
     city_id = Column(Integer, ForeignKey("cities.id", ondelete="CASCADE"), nullable=False, index=True)
-    type = Column(String(100), nullable=False, index=True)
+    type = Column(String(100), nullable=False)
     value = Column(Float, nullable=True)
-    date = Column(Date, nullable=True, index=True)
+    date = Column(Date, nullable=False)
     source = Column(String(255), nullable=True)
 
     city = relationship("City", back_populates="indicators")
-
-
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String, UniqueConstraint
+
+from app.db.session import Base
+
+
+class IndicatorDailyRollup(Base):
+    """Agrégats journaliers de `indicators` par (ville, type, source), rafraîchis par l'ETL."""
+
+    __tablename__ = "indicators_daily"
+    __table_args__ = (
+        UniqueConstraint("city_id", "type", "period", "source", name="uq_indicators_daily_city_type_period_source"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    city_id = Column(Integer, ForeignKey("cities.id", ondelete="CASCADE"), nullable=False)
+    type = Column(String(100), nullable=False)
+    source = Column(String(255), nullable=True)
+    period = Column(Date, nullable=False)
+    # Sum and count (not the mean) so that coarser buckets can be re-aggregated exactly
+    value_count = Column(Integer, nullable=False)
+    value_sum = Column(Float, nullable=True)
+    value_min = Column(Float, nullable=True)
+    value_max = Column(Float, nullable=True)
+
+
+class IndicatorMonthlyRollup(Base):
+    """Agrégats mensuels (`period` = 1er du mois), calculés à partir des agrégats journaliers."""
+
+    __tablename__ = "indicators_monthly"
+    __table_args__ = (
+        UniqueConstraint("city_id", "type", "period", "source", name="uq_indicators_monthly_city_type_period_source"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    city_id = Column(Integer, ForeignKey("cities.id", ondelete="CASCADE"), nullable=False)
+    type = Column(String(100), nullable=False)
+    source = Column(String(255), nullable=True)
+    period = Column(Date, nullable=False)
+    value_count = Column(Integer, nullable=False)
+    value_sum = Column(Float, nullable=True)
+    value_min = Column(Float, nullable=True)
+    value_max = Column(Float, nullable=True)
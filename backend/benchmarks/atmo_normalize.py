@@ -0,0 +1,84 @@
+"""
+Benchmark: normalisation des propriétés de features ATMO déjà extraites.
+
+- per-row : l'ancienne boucle (un `datetime.fromisoformat` par feature)
+- batch   : `normalize_features` par lots (dates mises en cache)
+- pandas  : `normalize_features(engine="pandas")`, si pandas est installé
+
+    cd backend
+    python -m benchmarks.atmo_normalize --features 100000 --fields date,code_qual,lib_zone,date_ech
+"""
+import argparse
+import time
+from typing import Any, Dict, List
+
+from app.etl.atmo_transform import normalize_day, normalize_features, parse_fields
+from benchmarks.atmo_parse import _normalize
+
+BATCH_SIZE = 1000
+
+
+def generate_properties(n_features: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "aasqa": "11",
+            "code_zone": f"{75000 + i % 500}",
+            "lib_zone": "Paris",
+            "date_ech": f"2024-11-{1 + i % 28:02d}T00:00:00+01:00",
+            "date_maj": f"2024-11-{1 + i % 28:02d}T10:00:00Z",
+            "code_qual": i % 6,
+            "lib_qual": "Moyen",
+            "coul_qual": "#50CCAA",
+            "code_no2": 1,
+            "code_o3": 2,
+            "code_pm10": 1,
+            "code_pm25": 2,
+            "code_so2": 1,
+        }
+        for i in range(n_features)
+    ]
+
+
+def run_per_row(features: List[Dict[str, Any]], fields: List[str]) -> int:
+    # Legacy path only knows date + code_qual
+    return sum(1 for props in features if _normalize(props))
+
+
+def run_batch(features: List[Dict[str, Any]], fields: List[str], engine: str = "python") -> int:
+    normalize_day.cache_clear()
+    count = 0
+    for i in range(0, len(features), BATCH_SIZE):
+        count += len(normalize_features(features[i : i + BATCH_SIZE], fields, engine=engine))
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--features", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--fields", default="date,code_qual")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    fields = parse_fields(args.fields)
+
+    modes = {"per-row": run_per_row, "batch": run_batch}
+    try:
+        import pandas  # noqa: F401
+
+        modes["pandas"] = lambda features, fields: run_batch(features, fields, engine="pandas")
+    except ImportError:
+        print("pandas not installed: skipping the pandas engine")
+
+    print(f"{'features':>10} {'mode':>8} {'best (s)':>9} {'features/s':>12}")
+    for n in args.features:
+        features = generate_properties(n)
+        for mode, run in modes.items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                run(features, fields)
+                best = min(best, time.perf_counter() - start)
+            print(f"{n:>10} {mode:>8} {best:>9.3f} {n / best:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
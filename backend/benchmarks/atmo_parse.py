@@ -0,0 +1,126 @@
+"""
+Benchmark: parsing complet (`response.json()`) vs parseur incrémental des indices ATMO.
+
+Chaque mode tourne dans un sous-processus séparé pour que le pic de RSS mesuré
+ne soit pas pollué par l'autre mode.
+
+    cd backend
+    python -m benchmarks.atmo_parse --features 200000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Iterator
+
+from app.etl.geojson_stream import iter_feature_properties
+
+CHUNK_SIZE = 64 * 1024
+
+
+def generate_payload(n_features: int) -> Iterator[bytes]:
+    """Produit une FeatureCollection ATMO synthétique par morceaux, sans la matérialiser."""
+    yield b'{"type":"FeatureCollection","features":['
+    buf = []
+    for i in range(n_features):
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [2.35 + i * 1e-6, 48.85]},
+            "properties": {
+                "aasqa": "11",
+                "code_zone": f"{75000 + i % 500}",
+                "lib_zone": "Paris",
+                "date_ech": "2024-11-14T00:00:00Z",
+                "date_maj": f"2024-11-{1 + i % 28:02d}T10:00:00Z",
+                "code_qual": i % 6,
+                "lib_qual": "Moyen",
+                "coul_qual": "#50CCAA",
+                "code_no2": 1,
+                "code_o3": 2,
+                "code_pm10": 1,
+                "code_pm25": 2,
+                "code_so2": 1,
+            },
+        }
+        buf.append(("," if i else "") + json.dumps(feature))
+        if len(buf) >= 256:
+            yield "".join(buf).encode()
+            buf = []
+    if buf:
+        yield "".join(buf).encode()
+    yield b"]}"
+
+
+def _rechunk(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        while len(pending) >= CHUNK_SIZE:
+            yield pending[:CHUNK_SIZE]
+            pending = pending[CHUNK_SIZE:]
+    if pending:
+        yield pending
+
+
+def _normalize(props):
+    date_maj = props.get("date_maj")
+    code_qual = props.get("code_qual")
+    if date_maj is None or code_qual is None:
+        return None
+    try:
+        norm_date = datetime.fromisoformat(str(date_maj).replace("Z", "+00:00")).date().isoformat()
+    except Exception:
+        norm_date = str(date_maj).split("T")[0]
+    return {"date": norm_date, "code_qual": code_qual}
+
+
+def run_full(n_features: int) -> int:
+    # Mirrors the previous path: buffer the body, json.loads, walk features
+    body = b"".join(_rechunk(generate_payload(n_features)))
+    raw = json.loads(body)
+    items = [_normalize((ft or {}).get("properties") or {}) for ft in raw.get("features") or []]
+    return sum(1 for item in items if item)
+
+
+def run_stream(n_features: int) -> int:
+    items = [_normalize(props) for props in iter_feature_properties(_rechunk(generate_payload(n_features)))]
+    return sum(1 for item in items if item)
+
+
+def _child(mode: str, n_features: int) -> None:
+    start = time.perf_counter()
+    count = run_full(n_features) if mode == "full" else run_stream(n_features)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"mode": mode, "items": count, "seconds": round(elapsed, 3), "peak_rss_mb": round(peak_rss_mb, 1)}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--features", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--mode", choices=["full", "stream"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        _child(args.mode, args.features[0])
+        return
+
+    print(f"{'features':>10} {'mode':>7} {'seconds':>9} {'peak RSS (MB)':>14}")
+    for n in args.features:
+        for mode in ("full", "stream"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.atmo_parse", "--mode", mode, "--features", str(n)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(out)
+            print(f"{n:>10} {mode:>7} {result['seconds']:>9} {result['peak_rss_mb']:>14}")
+
+
+if __name__ == "__main__":
+    main()
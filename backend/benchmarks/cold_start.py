@@ -0,0 +1,99 @@
+"""
+Benchmark: démarrage à froid de l'API (déploiements serverless / autoscalés).
+
+Chaque essai lance un interpréteur neuf et mesure l'import de `app.main`, le
+démarrage (lifespan) puis la première requête, ainsi que le pic de RSS.
+`--importtime` affiche en plus les modules les plus coûteux à importer.
+
+    cd backend
+    python -m benchmarks.cold_start --runs 10 --path /api/v1/health
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ("interpreter", "import", "startup", "first_request", "total")
+
+
+def _child(path: str, launched_at: float) -> None:
+    start = time.time()
+    import resource
+
+    import app.main
+
+    imported = time.time()
+    from fastapi.testclient import TestClient
+
+    with TestClient(app.main.app) as client:
+        ready = time.time()
+        status = client.get(path).status_code
+        answered = time.time()
+    print(
+        json.dumps(
+            {
+                "status": status,
+                "interpreter": start - launched_at,
+                "import": imported - start,
+                "startup": ready - imported,
+                "first_request": answered - ready,
+                "total": answered - launched_at,
+                # ru_maxrss is in KiB on Linux
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            }
+        )
+    )
+
+
+def _run(path: str) -> dict:
+    launched_at = time.time()
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.cold_start", "--child", str(launched_at), "--path", path],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _importtime(top: int) -> None:
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], check=True, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in err.splitlines()[1:]:
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        rows.append((int(cumulative_us), int(self_us), name))
+    print(f"\n{'cumulative (ms)':>16} {'self (ms)':>10}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>16.1f} {self_us / 1000:>10.1f}  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/api/v1/health")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="Affiche les N imports les plus lents")
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        _child(args.path, args.child)
+        return
+
+    results = [_run(args.path) for _ in range(args.runs)]
+    statuses = {result["status"] for result in results}
+    print(f"{args.runs} cold starts, GET {args.path} -> {', '.join(map(str, sorted(statuses)))}")
+    print(f"{'phase':>14} {'p50 (ms)':>9} {'max (ms)':>9}")
+    for phase in PHASES:
+        values = [result[phase] * 1000 for result in results]
+        print(f"{phase:>14} {statistics.median(values):>9.1f} {max(values):>9.1f}")
+    print(f"{'peak RSS (MB)':>14} {statistics.median(r['peak_rss_mb'] for r in results):>9.1f}")
+    if args.importtime:
+        _importtime(args.importtime)
+
+
+if __name__ == "__main__":
+    main()
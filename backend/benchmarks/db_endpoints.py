@@ -0,0 +1,90 @@
+"""
+Benchmark: endpoint adossé à la base, session synchrone (psycopg2, threadpool)
+vs session asynchrone (asyncpg), sous charge concurrente.
+
+Nécessite une base PostgreSQL accessible avec les variables POSTGRES_*.
+
+    cd backend
+    python -m benchmarks.db_endpoints --requests 2000 --concurrency 50 --query-ms 5
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.deps import get_async_db, get_db
+from app.db.session import dispose_async_engine
+
+
+def build_app(query_ms: float) -> FastAPI:
+    app = FastAPI()
+    # pg_sleep stands in for a realistic indexed range query
+    statement = text("SELECT pg_sleep(:seconds), 1")
+    params = {"seconds": query_ms / 1000}
+
+    @app.get("/sync")
+    def sync_endpoint(db: Session = Depends(get_db)):
+        return {"value": db.execute(statement, params).scalar()}
+
+    @app.get("/async")
+    async def async_endpoint(db: AsyncSession = Depends(get_async_db)):
+        return {"value": (await db.execute(statement, params)).scalar()}
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, total: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    remaining = iter(range(total))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker() -> None:
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def report(name: str, latencies: List[float], elapsed: float) -> None:
+    print(
+        f"{name:>6}: {len(latencies) / elapsed:8.1f} req/s  "
+        f"p50={percentile(latencies, 0.5) * 1000:6.1f}ms  p95={percentile(latencies, 0.95) * 1000:6.1f}ms"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    app = build_app(args.query_ms)
+    for path in ("/sync", "/async"):
+        await drive(app, path, min(50, args.requests), args.concurrency)  # warm up the pools
+        start = time.perf_counter()
+        latencies = await drive(app, path, args.requests, args.concurrency)
+        report(path.strip("/"), latencies, time.perf_counter() - start)
+    await dispose_async_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--query-ms", type=float, default=5.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
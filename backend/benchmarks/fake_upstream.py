@@ -0,0 +1,193 @@
+"""
+Faux serveurs Atmo France et Geod'air pour mesurer l'API hors ligne.
+
+Une seule application ASGI sert les deux API amont :
+
+- `POST /api/login` : jeton ATMO, refusé (401) sur les données après `--token-ttl` secondes ;
+- `GET /api/v2/data/indices/atmo` : FeatureCollection de `--features` indices par zone, envoyée par morceaux ;
+- `GET /donnees/api` : une mesure Geod'air par heure entre `start` et `end` ;
+- `GET /_stats` : compteurs (appels, logins, 401, erreurs injectées).
+
+Chaque appel de données attend `--latency-ms` (plus une queue exponentielle de
+moyenne `--jitter-ms`) avant les en-têtes, et échoue en 503 avec la
+probabilité `--error-rate`.
+
+    cd backend
+    python -m benchmarks.fake_upstream --port 8100 --latency-ms 80 --jitter-ms 40 --features 5000 --token-ttl 60
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import date as date_type, datetime, timedelta
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Header, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+ATMO_INDICES_PATH = "/api/v2/data/indices/atmo"
+GEODAIR_PATH = "/donnees/api"
+
+
+@dataclass
+class UpstreamConfig:
+    latency_ms: float = 50.0
+    jitter_ms: float = 0.0
+    features: int = 1000
+    error_rate: float = 0.0
+    # 0: tokens never expire
+    token_ttl_seconds: float = 0.0
+    chunk_bytes: int = 64 * 1024
+    seed: Optional[int] = None
+
+
+@lru_cache(maxsize=256)
+def atmo_body(code_zone: str, date: str, date_historique: str, features: int) -> bytes:
+    """FeatureCollection déterministe de `features` indices, répartis sur les jours et les zones."""
+    try:
+        end = date_type.fromisoformat(date)
+        start = date_type.fromisoformat(date_historique)
+    except ValueError:
+        end = start = date_type.today()
+    days = [start + timedelta(days=offset) for offset in range(max(1, (end - start).days))]
+    zones = [code_zone] if code_zone else [f"{75000 + i:05d}" for i in range(max(1, features // len(days)))]
+    rows = []
+    for i in range(features):
+        zone = zones[i % len(zones)]
+        day = days[(i // len(zones)) % len(days)]
+        quality = 1 + zlib.crc32(f"{zone}|{day}".encode()) % 6
+        rows.append(
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [2.35, 48.85]},
+                "properties": {
+                    "code_zone": zone,
+                    "lib_zone": f"Zone {zone}",
+                    "date_ech": f"{day.isoformat()}T00:00:00+01:00",
+                    "date_maj": f"{day.isoformat()}T12:00:00+01:00",
+                    "code_qual": quality,
+                    "lib_qual": "Moyen",
+                    "coul_qual": "#50CCAA",
+                    "code_no2": quality,
+                    "code_o3": 2,
+                    "code_pm10": 1,
+                    "code_pm25": 1,
+                    "code_so2": 1,
+                },
+            }
+        )
+    return json.dumps({"type": "FeatureCollection", "features": rows}).encode("utf-8")
+
+
+def geodair_body(start: str, end: str, max_rows: int = 24 * 366) -> bytes:
+    try:
+        current = datetime.fromisoformat(start)
+        stop = datetime.fromisoformat(end)
+    except ValueError:
+        return b"[]"
+    rows: List[Dict[str, object]] = []
+    while current < stop and len(rows) < max_rows:
+        rows.append({"date_debut": current.strftime("%Y-%m-%d %H:%M:%S"), "valeur": round(10 + current.hour * 0.5, 1)})
+        current += timedelta(hours=1)
+    return json.dumps(rows).encode("utf-8")
+
+
+def build_app(config: UpstreamConfig) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(config.seed)
+    tokens: Dict[str, float] = {}
+    stats: Dict[str, int] = {"atmo": 0, "geodair": 0, "logins": 0, "unauthorized": 0, "injected_errors": 0}
+
+    async def wait_and_maybe_fail() -> Optional[Response]:
+        delay = config.latency_ms / 1000
+        if config.jitter_ms:
+            delay += rng.expovariate(1000 / config.jitter_ms)
+        await asyncio.sleep(delay)
+        if rng.random() < config.error_rate:
+            stats["injected_errors"] += 1
+            return JSONResponse({"detail": "injected failure"}, status_code=503)
+        return None
+
+    async def chunks(body: bytes) -> AsyncIterator[bytes]:
+        for offset in range(0, len(body), config.chunk_bytes):
+            yield body[offset : offset + config.chunk_bytes]
+            await asyncio.sleep(0)
+
+    @app.post("/api/login")
+    async def login(request: Request):
+        await request.body()
+        stats["logins"] += 1
+        token = f"token-{stats['logins']}"
+        tokens[token] = time.monotonic()
+        return {"token": token}
+
+    @app.get(ATMO_INDICES_PATH)
+    async def atmo_indices(
+        date: str = Query(...),
+        date_historique: str = Query(...),
+        code_zone: str = Query(""),
+        authorization: str = Header(""),
+    ):
+        stats["atmo"] += 1
+        issued = tokens.get(authorization.removeprefix("Bearer "))
+        if issued is None or (config.token_ttl_seconds and time.monotonic() - issued > config.token_ttl_seconds):
+            stats["unauthorized"] += 1
+            return JSONResponse({"detail": "token expired"}, status_code=401)
+        failure = await wait_and_maybe_fail()
+        if failure is not None:
+            return failure
+        body = atmo_body(code_zone, date, date_historique, config.features)
+        return StreamingResponse(chunks(body), media_type="application/json")
+
+    @app.get(GEODAIR_PATH)
+    async def geodair(start: str = Query(...), end: str = Query(...)):
+        stats["geodair"] += 1
+        failure = await wait_and_maybe_fail()
+        if failure is not None:
+            return failure
+        return Response(geodair_body(start, end), media_type="application/json")
+
+    @app.get("/_stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Délai avant les en-têtes")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Moyenne de la queue exponentielle ajoutée")
+    parser.add_argument("--features", type=int, default=1000, help="Indices ATMO par réponse")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilité d'un 503")
+    parser.add_argument("--token-ttl", type=float, default=0.0, help="Durée de vie des jetons ATMO (0 : illimitée)")
+    parser.add_argument("--seed", type=int)
+
+
+def config_from_args(args: argparse.Namespace) -> UpstreamConfig:
+    return UpstreamConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        features=args.features,
+        error_rate=args.error_rate,
+        token_ttl_seconds=args.token_ttl,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(build_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark: latence des requêtes par plage de dates sur `indicators`, table
+simple vs table partitionnée par mois, à mesure que le volume grossit.
+
+Le générateur remplit, mois par mois et côté serveur (generate_series), deux
+tables d'un schéma jetable `bench_indicators` avec les index des migrations
+0001-0003. Après chaque palier on mesure :
+
+- series : une ville, un type, 30 jours agrégés par semaine (forme de /api/v1/indicators)
+- wide   : tous les indicateurs d'un type sur une semaine (parcours BRIN / élagage des partitions)
+
+Nécessite une base PostgreSQL 12+ accessible avec les variables POSTGRES_*.
+20000 villes x 5 types x 120 mois représentent ~365 millions de lignes par table.
+
+    cd backend
+    python -m benchmarks.indicator_partitions --cities 20000 --types 5 --months 12 36 120
+"""
+import argparse
+import random
+import time
+from datetime import date as date_type, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.db.session import get_engine
+
+SCHEMA = "bench_indicators"
+LAYOUTS = ("flat", "partitioned")
+
+COLUMNS = """
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    city_id integer NOT NULL,
+    type varchar(100) NOT NULL,
+    value double precision,
+    date date NOT NULL,
+    source varchar(255)
+"""
+
+SERIES_QUERY = """
+SELECT date_trunc('week', date)::date AS bucket, avg(value), min(value), max(value)
+FROM {table}
+WHERE city_id = :city_id AND type = :type AND date >= :start AND date < :end
+GROUP BY bucket ORDER BY bucket
+"""
+
+WIDE_QUERY = """
+SELECT count(*), avg(value)
+FROM {table}
+WHERE type = :type AND date >= :start AND date < :end
+"""
+
+
+def create_tables(conn: Connection) -> None:
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"CREATE TABLE {SCHEMA}.flat ({COLUMNS}, PRIMARY KEY (id))"))
+    conn.execute(text(f"CREATE TABLE {SCHEMA}.partitioned ({COLUMNS}, PRIMARY KEY (id, date)) PARTITION BY RANGE (date)"))
+    for layout in LAYOUTS:
+        table = f"{SCHEMA}.{layout}"
+        conn.execute(text(f"CREATE INDEX ON {table} (city_id, type, date) INCLUDE (value)"))
+        conn.execute(text(f"CREATE INDEX ON {table} USING brin (date)"))
+
+
+def month_start(first: date_type, offset: int) -> date_type:
+    month = first.month - 1 + offset
+    return date_type(first.year + month // 12, month % 12 + 1, 1)
+
+
+def generate_month(conn: Connection, start: date_type, cities: int, types: int) -> None:
+    """Un mois de valeurs journalières pour chaque (ville, type), insérées dans l'ordre chronologique."""
+    end = month_start(start, 1)
+    partition = f"{SCHEMA}.partitioned_{start:%Y_%m}"
+    conn.execute(
+        text(f"CREATE TABLE {partition} PARTITION OF {SCHEMA}.partitioned FOR VALUES FROM ('{start}') TO ('{end}')")
+    )
+    for layout in LAYOUTS:
+        conn.execute(
+            text(
+                f"INSERT INTO {SCHEMA}.{layout} (city_id, type, value, date, source) "
+                "SELECT c, 'type_' || t, random() * 100, d::date, 'bench' "
+                "FROM generate_series(CAST(:start AS date), CAST(:end AS date) - 1, interval '1 day') AS d, "
+                "generate_series(1, :cities) AS c, generate_series(1, :types) AS t "
+                "ORDER BY d"
+            ),
+            {"start": start, "end": end, "cities": cities, "types": types},
+        )
+
+
+def time_queries(
+    conn: Connection, sql: str, make_params: Callable[[], Dict[str, object]], repeat: int
+) -> List[float]:
+    latencies = []
+    for _ in range(repeat):
+        params = make_params()
+        start = time.perf_counter()
+        conn.execute(text(sql), params).all()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=2000)
+    parser.add_argument("--types", type=int, default=5)
+    parser.add_argument("--months", type=int, nargs="+", default=[12, 36, 120], help="Paliers (mois cumulés)")
+    parser.add_argument("--first-month", type=date_type.fromisoformat, default=date_type(2015, 1, 1))
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Conserve le schéma de benchmark")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    engine = get_engine()
+    with engine.begin() as conn:
+        create_tables(conn)
+    loaded = 0
+    try:
+        for step in sorted(args.months):
+            for offset in range(loaded, step):
+                with engine.begin() as conn:
+                    generate_month(conn, month_start(args.first_month, offset), args.cities, args.types)
+            loaded = step
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                for layout in LAYOUTS:
+                    conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.{layout}"))
+                rows = conn.scalar(text(f"SELECT count(*) FROM {SCHEMA}.flat"))
+            last_day = month_start(args.first_month, loaded) - timedelta(days=1)
+            span = (last_day - args.first_month).days
+
+            def window(days: int) -> Dict[str, object]:
+                start = args.first_month + timedelta(days=rng.randint(0, max(0, span - days)))
+                return {
+                    "city_id": rng.randint(1, args.cities),
+                    "type": f"type_{rng.randint(1, args.types)}",
+                    "start": start,
+                    "end": start + timedelta(days=days),
+                }
+
+            print(f"--- {loaded} mois, {rows:,} lignes par table")
+            with engine.connect() as conn:
+                for layout in LAYOUTS:
+                    table = f"{SCHEMA}.{layout}"
+                    for name, sql, days in (("series", SERIES_QUERY, 30), ("wide", WIDE_QUERY, 7)):
+                        repeat = args.repeat if name == "series" else max(1, args.repeat // 20)
+                        latencies = time_queries(conn, sql.format(table=table), lambda: window(days), repeat)
+                        print(
+                            f"{layout:>12} {name:>6}: p50={percentile(latencies, 0.5) * 1000:8.2f}ms  "
+                            f"p95={percentile(latencies, 0.95) * 1000:8.2f}ms"
+                        )
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
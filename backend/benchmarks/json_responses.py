@@ -0,0 +1,107 @@
+"""
+Benchmark: sérialisation des réponses JSON selon la taille du payload
+(lignes au format Geod'air).
+
+- stdlib      : dict renvoyé avec JSONResponse (jsonable_encoder + json)
+- default     : dict renvoyé avec la classe par défaut FastJSONResponse (jsonable_encoder + orjson)
+- direct      : FastJSONResponse renvoyée directement (orjson seul)
+- passthrough : octets amont relayés avec RawJSONResponse (aucun décodage)
+
+Sans orjson installé, `default` et `direct` utilisent le module json standard.
+
+    cd backend
+    python -m benchmarks.json_responses --rows 1000 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.core import responses
+from app.core.responses import FastJSONResponse, RawJSONResponse, wrap_json_bytes
+
+
+def generate_rows(n_rows: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "date_debut": f"2024-01-{1 + i % 28:02d} {i % 24:02d}:00:00",
+            "date_fin": f"2024-01-{1 + i % 28:02d} {i % 24:02d}:59:59",
+            "code_site": f"FR{10000 + i % 500}",
+            "nom_site": f"Station {i % 500}",
+            "polluant": "PM10",
+            "valeur": round((i * 7.31) % 120, 2),
+            "unite": "µg-m3",
+            "validite": 1,
+        }
+        for i in range(n_rows)
+    ]
+
+
+def build_app(rows: List[Dict[str, Any]]) -> FastAPI:
+    raw = json.dumps(rows).encode("utf-8")
+    stdlib_app = FastAPI(default_response_class=JSONResponse)
+    fast_app = FastAPI(default_response_class=FastJSONResponse)
+
+    @stdlib_app.get("/stdlib")
+    async def stdlib():
+        return {"data": rows}
+
+    @fast_app.get("/default")
+    async def default():
+        return {"data": rows}
+
+    @fast_app.get("/direct")
+    async def direct():
+        return FastJSONResponse({"data": rows})
+
+    @fast_app.get("/passthrough")
+    async def passthrough():
+        return RawJSONResponse(wrap_json_bytes("data", raw))
+
+    fast_app.mount("/s", stdlib_app)
+    return fast_app
+
+
+async def measure(app: FastAPI, path: str, repeat: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        (await client.get(path)).raise_for_status()  # warm up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            (await client.get(path)).raise_for_status()
+        return (time.perf_counter() - start) / repeat
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    encoder = "orjson" if responses.orjson is not None else "json (orjson absent)"
+    print(f"encodeur rapide: {encoder}")
+    for n_rows in args.rows:
+        app = build_app(generate_rows(n_rows))
+        repeat = max(3, args.budget_rows // n_rows)
+        timings = {
+            "stdlib": await measure(app, "/s/stdlib", repeat),
+            "default": await measure(app, "/default", repeat),
+            "direct": await measure(app, "/direct", repeat),
+            "passthrough": await measure(app, "/passthrough", repeat),
+        }
+        baseline = timings["stdlib"]
+        summary = "  ".join(
+            f"{name}={seconds * 1000:8.2f}ms (x{baseline / seconds:4.1f})" for name, seconds in timings.items()
+        )
+        print(f"{n_rows:>7} lignes: {summary}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--budget-rows", type=int, default=1_000_000, help="Lignes sérialisées par mode et par taille")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Test de charge de l'API contre les faux serveurs amont (`benchmarks.fake_upstream`).
+
+Le faux amont et l'API (uvicorn, un worker) tournent chacun dans leur propre
+processus, comme en production. Chaque scénario envoie `--requests` requêtes à
+concurrence fixe, après un échauffement, et rapporte le débit, les latences
+p50/p95/p99, les erreurs, la RSS de l'API (courante et pic) et les appels reçus
+par l'amont. `--distinct` fixe le nombre de requêtes différentes, donc le taux
+de succès du cache ATMO et de la fusion des requêtes identiques.
+
+Scénarios : `atmo` (`GET /api/v1/atmo/indices`, une zone par requête distincte)
+et `air-quality` (`GET /api/v1/air-quality`, une fenêtre d'un jour par requête
+distincte). Aucune base de données n'est nécessaire.
+
+    cd backend
+    python -m benchmarks.load_test --scenario atmo air-quality --requests 2000 --concurrency 50 --distinct 20 \\
+        --latency-ms 80 --jitter-ms 40 --features 5000 --token-ttl 30 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import date as date_type, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.fake_upstream import add_arguments
+
+# Request number -> (path, query parameters)
+RequestFactory = Callable[[int], Tuple[str, Dict[str, str]]]
+
+
+def atmo_request(distinct: int) -> RequestFactory:
+    def build(i: int) -> Tuple[str, Dict[str, str]]:
+        return "/api/v1/atmo/indices", {
+            "date": "2024-11-14",
+            "date_historique": "2024-11-10",
+            "code_zone": f"{75000 + i % distinct:05d}",
+        }
+
+    return build
+
+
+def air_quality_request(distinct: int) -> RequestFactory:
+    first = date_type(2024, 1, 1)
+
+    def build(i: int) -> Tuple[str, Dict[str, str]]:
+        start = first + timedelta(days=i % distinct)
+        return "/api/v1/air-quality", {
+            "pollutant_code": "24",
+            "start": f"{start.isoformat()}T00:00:00",
+            "end": f"{(start + timedelta(days=1)).isoformat()}T00:00:00",
+        }
+
+    return build
+
+
+SCENARIOS: Dict[str, Callable[[int], RequestFactory]] = {"atmo": atmo_request, "air-quality": air_quality_request}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url}: process exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url}: not ready after {timeout:.0f}s")
+
+
+def memory_mb(pid: int) -> Dict[str, float]:
+    """RSS courante et pic (VmHWM) d'un processus, en Mo (Linux)."""
+    values: Dict[str, float] = {}
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return {"rss_mb": values.get("VmRSS", 0.0), "peak_rss_mb": values.get("VmHWM", 0.0)}
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def drive(base_url: str, build: RequestFactory, total: int, concurrency: int) -> Tuple[List[float], int, float]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+
+        async def worker() -> None:
+            nonlocal errors
+            for i in remaining:
+                path, params = build(i)
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, params=params)
+                    await response.aread()
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_scenario(name: str, args: argparse.Namespace, api_url: str, upstream_url: str, api_pid: int) -> Dict[str, Any]:
+    build = SCENARIOS[name](args.distinct)
+    asyncio.run(drive(api_url, build, min(args.warmup, args.requests), args.concurrency))
+    upstream_before = httpx.get(f"{upstream_url}/_stats").json()
+    latencies, errors, elapsed = asyncio.run(drive(api_url, build, args.requests, args.concurrency))
+    upstream_after = httpx.get(f"{upstream_url}/_stats").json()
+    ordered = sorted(latencies)
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+        **memory_mb(api_pid),
+        "upstream_calls": {key: upstream_after[key] - upstream_before[key] for key in upstream_after},
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(
+        f"{'scenario':>12} {'req':>6} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'max ms':>8} {'RSS MB':>7} {'peak MB':>8}  upstream"
+    )
+    for r in results:
+        upstream = ", ".join(f"{key}={value}" for key, value in r["upstream_calls"].items() if value)
+        print(
+            f"{r['scenario']:>12} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>8.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} "
+            f"{r['rss_mb']:>7.1f} {r['peak_rss_mb']:>8.1f}  {upstream or '-'}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=50, help="Requêtes non mesurées (0 : cache froid)")
+    parser.add_argument("--distinct", type=int, default=20, help="Requêtes différentes par scénario")
+    parser.add_argument("--json", help="Écrit aussi les résultats dans ce fichier")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    upstream_port, api_port = free_port(), free_port()
+    upstream_url = f"http://127.0.0.1:{upstream_port}"
+    api_url = f"http://127.0.0.1:{api_port}"
+    upstream_args = [
+        f"--latency-ms={args.latency_ms}",
+        f"--jitter-ms={args.jitter_ms}",
+        f"--features={args.features}",
+        f"--error-rate={args.error_rate}",
+        f"--token-ttl={args.token_ttl}",
+    ]
+    if args.seed is not None:
+        upstream_args.append(f"--seed={args.seed}")
+    env = {
+        **os.environ,
+        "ATMO_API_BASE_URL": upstream_url,
+        "GEODAIR_API_BASE_URL": upstream_url,
+        "ATMO_USERNAME": "bench",
+        "ATMO_PASSWORD": "bench",
+        "ATMO_API_KEY": "",
+        "ATMO_TOKEN_CACHE_FILE": "",
+        "ATMO_CACHE_SQLITE_PATH": "",
+    }
+    upstream = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_upstream", "--port", str(upstream_port), *upstream_args]
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        wait_ready(f"{upstream_url}/_stats", upstream)
+        wait_ready(f"{api_url}/api/v1/health", api)
+        print(
+            f"{args.requests} requests per scenario, concurrency {args.concurrency}, {args.distinct} distinct; "
+            f"upstream {args.latency_ms:.0f}ms (+exp {args.jitter_ms:.0f}ms), {args.features} features, "
+            f"error rate {args.error_rate:.1%}, token TTL {args.token_ttl or 'none'}"
+        )
+        results = [run_scenario(name, args, api_url, upstream_url, api.pid) for name in args.scenario]
+    finally:
+        for process in (api, upstream):
+            process.terminate()
+        for process in (api, upstream):
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
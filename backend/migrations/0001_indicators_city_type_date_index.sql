@@ -0,0 +1,28 @@
+-- Composite index for the time-series queries: WHERE city_id = ? AND type = ? AND date BETWEEN ? AND ?.
+-- INCLUDE (value) lets the aggregations run as index-only scans.
+CREATE INDEX IF NOT EXISTS ix_indicators_city_type_date ON indicators (city_id, type, date) INCLUDE (value);
+
+-- Covered by the composite index (type alone is not selective)
+DROP INDEX IF EXISTS ix_indicators_type;
+
+-- Natural key of the ETL upserts (ON CONFLICT (city_id, type, date, source)).
+-- Tables created from the original model lack it: keep the most recent row of
+-- each duplicate, then add the constraint. NULL sources never conflict.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'indicators'::regclass AND conname = 'uq_indicators_city_type_date_source'
+    ) THEN
+        DELETE FROM indicators older
+        USING indicators newer
+        WHERE older.city_id = newer.city_id
+          AND older.type = newer.type
+          AND older.date = newer.date
+          AND older.source = newer.source
+          AND older.id < newer.id;
+        ALTER TABLE indicators
+            ADD CONSTRAINT uq_indicators_city_type_date_source UNIQUE (city_id, type, date, source);
+    END IF;
+END;
+$$;
@@ -0,0 +1,4 @@
+-- Indicators are loaded in chronological order: a BRIN index on date stays a few
+-- pages large and answers wide date-range scans, where the B-tree was as big as the data.
+CREATE INDEX IF NOT EXISTS ix_indicators_date_brin ON indicators USING brin (date);
+DROP INDEX IF EXISTS ix_indicators_date;
@@ -0,0 +1,98 @@
+-- Range partitioning of indicators by month (PostgreSQL 12+).
+--
+-- The primary key of a partitioned table must contain the partition key: it
+-- becomes (id, date) and date becomes NOT NULL (rows without a date are dropped;
+-- the ETL never writes any). Months without a partition land in indicators_default
+-- until indicators_create_partitions() is called for them (python -m app.db.migrate).
+
+ALTER TABLE indicators RENAME TO indicators_unpartitioned;
+ALTER TABLE indicators_unpartitioned RENAME CONSTRAINT indicators_pkey TO indicators_unpartitioned_pkey;
+-- Frees the constraint's index name; absent if 0001 ran before it added the constraint
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'indicators_unpartitioned'::regclass AND conname = 'uq_indicators_city_type_date_source'
+    ) THEN
+        ALTER TABLE indicators_unpartitioned
+            RENAME CONSTRAINT uq_indicators_city_type_date_source TO uq_indicators_unpartitioned_city_type_date_source;
+    END IF;
+END;
+$$;
+ALTER SEQUENCE indicators_id_seq OWNED BY NONE;
+DROP INDEX IF EXISTS ix_indicators_id, ix_indicators_city_id, ix_indicators_city_type_date, ix_indicators_date_brin;
+
+CREATE TABLE indicators (
+    id integer NOT NULL DEFAULT nextval('indicators_id_seq'),
+    city_id integer NOT NULL REFERENCES cities (id) ON DELETE CASCADE,
+    type varchar(100) NOT NULL,
+    value double precision,
+    date date NOT NULL,
+    source varchar(255),
+    CONSTRAINT indicators_pkey PRIMARY KEY (id, date),
+    CONSTRAINT uq_indicators_city_type_date_source UNIQUE (city_id, type, date, source)
+) PARTITION BY RANGE (date);
+ALTER SEQUENCE indicators_id_seq OWNED BY indicators.id;
+
+CREATE TABLE indicators_default PARTITION OF indicators DEFAULT;
+
+-- Creates the missing monthly partitions covering [from_date, to_date] and moves
+-- into them the rows already routed to the default partition. Returns the number
+-- of partitions created.
+CREATE OR REPLACE FUNCTION indicators_create_partitions(from_date date, to_date date)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', from_date)::date;
+    month_end date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE month_start <= to_date LOOP
+        month_end := (month_start + interval '1 month')::date;
+        partition_name := 'indicators_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE indicators INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name
+            );
+            EXECUTE format(
+                'INSERT INTO %I SELECT * FROM indicators_default WHERE date >= %L AND date < %L',
+                partition_name, month_start, month_end
+            );
+            EXECUTE format(
+                'DELETE FROM indicators_default WHERE date >= %L AND date < %L', month_start, month_end
+            );
+            EXECUTE format(
+                'ALTER TABLE indicators ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+SELECT indicators_create_partitions(
+    COALESCE((SELECT min(date) FROM indicators_unpartitioned), current_date),
+    (current_date + interval '12 months')::date
+);
+
+-- Duplicates can only remain if the table never had the unique constraint: the most recent row wins
+INSERT INTO indicators (id, city_id, type, value, date, source)
+SELECT id, city_id, type, value, date, source
+FROM indicators_unpartitioned
+WHERE date IS NOT NULL
+ORDER BY id DESC
+ON CONFLICT (city_id, type, date, source) DO NOTHING;
+
+DROP TABLE indicators_unpartitioned;
+
+-- Indexes declared on the parent are created on every partition, present and future
+CREATE INDEX ix_indicators_city_id ON indicators (city_id);
+CREATE INDEX ix_indicators_city_type_date ON indicators (city_id, type, date) INCLUDE (value);
+CREATE INDEX ix_indicators_date_brin ON indicators USING brin (date);
+
+ANALYZE indicators;
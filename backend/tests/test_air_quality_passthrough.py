@@ -0,0 +1,139 @@
+import gzip
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.http import get_http_client
+from app.core.responses import FastJSONResponse
+from app.main import app
+
+PARAMS = {"pollutant_code": "24", "start": "2024-01-01T00:00:00", "end": "2024-01-02T00:00:00"}
+
+
+@pytest.fixture()
+def upstream():
+    state = {"body": b"", "content_type": "application/json"}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=state["body"], headers={"Content-Type": state["content_type"]})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app.dependency_overrides[get_http_client] = lambda: http_client
+    try:
+        yield state
+    finally:
+        app.dependency_overrides.pop(get_http_client, None)
+
+
+def test_json_upstream_body_is_relayed_without_reencoding(upstream):
+    # Spacing and key order of the upstream document survive: it was never decoded
+    upstream["body"] = b'[ {"valeur": 1.50, "date_debut": "2024-01-01 00:00:00"} ]'
+    response = TestClient(app).get("/api/v1/air-quality", params=PARAMS)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == b'{"data":[ {"valeur": 1.50, "date_debut": "2024-01-01 00:00:00"} ]}'
+
+
+def test_non_json_upstream_is_returned_as_content(upstream):
+    upstream["body"] = "date;valeur\n2024-01-01;été\n".encode("utf-8")
+    upstream["content_type"] = "text/csv"
+    response = TestClient(app).get("/api/v1/air-quality", params={**PARAMS, "station": "FR1"})
+    assert response.json() == {"content": "date;valeur\n2024-01-01;été\n"}
+
+
+def test_non_json_upstream_is_decoded_with_its_declared_charset(upstream):
+    upstream["body"] = "date;valeur\n2024-01-01;été\n".encode("iso-8859-1")
+    upstream["content_type"] = "text/csv; charset=iso-8859-1"
+    response = TestClient(app).get("/api/v1/air-quality", params=PARAMS)
+    assert response.json() == {"content": "date;valeur\n2024-01-01;été\n"}
+
+
+def test_invalid_json_upstream_body_is_returned_as_content(upstream):
+    # A maintenance page served with a JSON content type must not be spliced into the response
+    upstream["body"] = b"<html>maintenance</html>"
+    response = TestClient(app).get("/api/v1/air-quality", params=PARAMS)
+    assert response.status_code == 200
+    assert response.json() == {"content": "<html>maintenance</html>"}
+
+
+def test_fast_json_response_renders_compact_utf8():
+    response = FastJSONResponse({"ville": "Besançon", "valeurs": [1, 2.5, None]})
+    assert response.body == '{"ville":"Besançon","valeurs":[1,2.5,null]}'.encode("utf-8")
+
+
+CSV = "date;valeur\n" + "".join(f"2024-01-01 {h:02d}:00;{h}\n" for h in range(24))
+
+
+@pytest.fixture()
+def gzip_upstream():
+    seen = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen["accept-encoding"] = request.headers.get("accept-encoding")
+        if request.url.params.get("station") == "missing":
+            return httpx.Response(404)
+        body = gzip.compress(CSV.encode("utf-8"))
+
+        async def chunks():
+            # Streamed body, as received from the network
+            for i in range(0, len(body), 16):
+                yield body[i : i + 16]
+
+        return httpx.Response(
+            200,
+            content=chunks(),
+            headers={
+                "Content-Type": "text/csv; charset=utf-8",
+                "Content-Encoding": "gzip",
+                "Content-Disposition": 'attachment; filename="export.csv"',
+                "Content-Length": str(len(body)),
+            },
+        )
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app.dependency_overrides[get_http_client] = lambda: http_client
+    try:
+        yield seen
+    finally:
+        app.dependency_overrides.pop(get_http_client, None)
+
+
+def test_raw_proxy_relays_gzip_body_untouched(gzip_upstream):
+    with TestClient(app).stream(
+        "GET", "/api/v1/air-quality/raw", params=PARAMS, headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.status_code == 200
+    assert gzip_upstream["accept-encoding"] == "gzip"
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"] == 'attachment; filename="export.csv"'
+    assert int(response.headers["content-length"]) == len(raw)
+    assert gzip.decompress(raw).decode("utf-8") == CSV
+
+
+def test_raw_proxy_decodes_for_clients_without_gzip(gzip_upstream):
+    response = TestClient(app).get("/api/v1/air-quality/raw", params=PARAMS, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.text == CSV
+
+
+def test_raw_proxy_maps_upstream_errors(gzip_upstream):
+    response = TestClient(app).get("/api/v1/air-quality/raw", params={**PARAMS, "station": "missing"})
+    assert response.status_code == 502
+
+
+def test_raw_proxy_reencodes_when_upstream_coding_is_not_accepted(gzip_upstream):
+    if compression.brotli is None:
+        pytest.skip("brotli not installed")
+    with TestClient(app).stream(
+        "GET", "/api/v1/air-quality/raw", params=PARAMS, headers={"Accept-Encoding": "br"}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+    assert gzip_upstream["accept-encoding"] == "br"
+    # Upstream ignored the request and sent gzip: decoded, then compressed by the middleware
+    assert response.headers["content-encoding"] == "br"
+    assert compression.brotli.decompress(raw).decode("utf-8") == CSV
@@ -0,0 +1,127 @@
+import asyncio
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import atmo
+from app.core.cache import ResponseCache, SQLiteCacheTier
+from app.etl.geojson_stream import aiter_feature_properties
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _install_fake_upstream(monkeypatch):
+    calls = []
+
+    async def fake_fetch(http_client, d, dh, code_zone, fields):
+        calls.append((d, dh, code_zone))
+        return {"results": [{"date": dh.isoformat(), "code_qual": 2}]}
+
+    atmo.get_atmo_cache.cache_clear()
+    monkeypatch.setattr(atmo, "_fetch_indices", fake_fetch)
+    return calls
+
+
+def test_historical_window_is_served_from_cache(monkeypatch):
+    calls = _install_fake_upstream(monkeypatch)
+    params = {"date": "2024-11-14", "date_historique": "2024-11-10", "code_zone": "75056"}
+
+    first = client.get("/api/v1/atmo/indices", params=params)
+    second = client.get("/api/v1/atmo/indices", params=params)
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert len(calls) == 1
+    max_age = int(first.headers["Cache-Control"].split("max-age=")[1])
+    assert max_age > 24 * 3600
+
+
+def test_window_containing_today_gets_short_ttl(monkeypatch):
+    _install_fake_upstream(monkeypatch)
+    today = date.today()
+    params = {"date": today.isoformat(), "date_historique": (today - timedelta(days=3)).isoformat()}
+
+    response = client.get("/api/v1/atmo/indices", params=params)
+
+    assert int(response.headers["Cache-Control"].split("max-age=")[1]) <= 600
+
+
+def test_if_none_match_returns_304(monkeypatch):
+    _install_fake_upstream(monkeypatch)
+    params = {"date": "2024-11-14", "date_historique": "2024-11-10"}
+    etag = client.get("/api/v1/atmo/indices", params=params).headers["ETag"]
+
+    response = client.get("/api/v1/atmo/indices", params=params, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_unparseable_upstream_body_is_a_502_and_never_cached(monkeypatch):
+    calls = []
+
+    class MaintenancePage:
+        def __init__(self, **kwargs):
+            pass
+
+        async def iter_indices_atmo(self, **kwargs):
+            calls.append(kwargs)
+
+            async def body():
+                yield b"<html>maintenance</html>"
+
+            async for props in aiter_feature_properties(body()):
+                yield props
+
+    atmo.get_atmo_cache.cache_clear()
+    monkeypatch.setattr(atmo, "AtmoClient", MaintenancePage)
+    params = {"date": "2024-11-14", "date_historique": "2024-11-10", "code_zone": "75056"}
+
+    first = client.get("/api/v1/atmo/indices", params=params)
+    second = client.get("/api/v1/atmo/indices", params=params)
+
+    assert first.status_code == second.status_code == 502
+    assert len(calls) == 2
+    assert atmo.get_atmo_cache().get("2024-11-14|2024-11-10|75056") is None
+
+
+def test_lru_eviction_and_sqlite_tier(tmp_path):
+    disk = SQLiteCacheTier(str(tmp_path / "cache.sqlite3"))
+    cache = ResponseCache(max_entries=2, disk=disk)
+    for key in ("a", "b", "c"):
+        cache.set(key, {"key": key}, ttl_seconds=60)
+
+    assert cache.stats["evictions"] == 1
+    assert cache.get("a").value == {"key": "a"}
+    assert cache.stats["disk_hits"] == 1
+    assert ResponseCache(disk=disk).get("c").value == {"key": "c"}
+
+
+def test_sqlite_tier_stays_bounded(tmp_path):
+    disk = SQLiteCacheTier(str(tmp_path / "cache.sqlite3"), max_rows=5, retain_expired_seconds=60, purge_every=4)
+    cache = ResponseCache(max_entries=2, disk=disk)
+    # Expired beyond the stale window: purged first
+    cache.set("old", {"key": "old"}, ttl_seconds=-3600)
+    for i in range(11):
+        cache.set(f"k{i}", {"key": i}, ttl_seconds=60 + i)
+
+    assert disk.count() <= 5
+    assert disk.get("old") is None
+    assert disk.get("k10").value == {"key": 10}
+    cache.close()
+
+
+def test_async_accessors_read_disk_off_the_loop(tmp_path):
+    disk = SQLiteCacheTier(str(tmp_path / "cache.sqlite3"))
+
+    async def scenario():
+        await ResponseCache(disk=disk).aset("a", {"key": "a"}, ttl_seconds=60)
+        cold = ResponseCache(disk=disk)
+        entry = await cold.aget("a")
+        return entry, cold.stats["disk_hits"], await cold.aget_stale("missing", 60)
+
+    entry, disk_hits, stale = asyncio.run(scenario())
+    assert entry.value == {"key": "a"} and disk_hits == 1 and stale is None
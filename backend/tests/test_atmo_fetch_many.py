@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+
+from app.core.concurrency import AdaptiveLimiter
+from app.core.resilience import CircuitBreaker
+from app.etl import atmo_client
+from app.etl.atmo_client import AtmoClient
+
+
+def test_fetch_many_backs_off_on_429_and_yields_every_zone(monkeypatch):
+    limiters = []
+
+    class RecordingLimiter(AdaptiveLimiter):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            limiters.append(self)
+
+    monkeypatch.setattr(atmo_client, "AdaptiveLimiter", RecordingLimiter)
+    breaker = CircuitBreaker("test")
+    attempts = {}
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        zone = request.url.params["code_zone"]
+        attempts[zone] = attempts.get(zone, 0) + 1
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.005)
+        in_flight["now"] -= 1
+        if zone == "2" and attempts[zone] == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if zone == "3":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"features": [{"properties": {"code_zone": zone}}]})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = AtmoClient(base_url="https://atmo.test", api_key="key", http_client=http_client, breaker=breaker)
+            return [
+                item
+                async for item in client.fetch_indices_atmo_many(
+                    [str(i) for i in range(10)], "2024-11-14", "2024-11-10", concurrency=3
+                )
+            ]
+
+    results = dict(asyncio.run(run()))
+    assert set(results) == {str(i) for i in range(10)}
+    assert attempts["2"] == 2 and results["2"]["features"][0]["properties"]["code_zone"] == "2"
+    assert isinstance(results["3"], httpx.HTTPStatusError) and attempts["3"] == 1
+    assert in_flight["peak"] <= 3
+    # The 429 was not swallowed by the per-request retry: the limiter halved its limit
+    assert limiters[0].stats["backoffs"] == 1
+    # A 429 is throttling, not an outage
+    assert breaker.stats["throttled"] == 1 and breaker.consecutive_failures == 0
@@ -0,0 +1,66 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.etl.atmo_client import AtmoClient
+from app.etl.atmo_token_store import AtmoTokenStore
+
+
+def _mock_atmo(calls):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/login":
+            calls["login"] += 1
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"token": f"tok-{calls['login']}"})
+        calls["data"] += 1
+        return httpx.Response(200, json={"type": "FeatureCollection", "features": []})
+
+    return httpx.MockTransport(handler)
+
+
+def test_concurrent_requests_share_a_single_login():
+    calls = {"login": 0, "data": 0}
+    store = AtmoTokenStore()
+
+    async def run() -> None:
+        async with httpx.AsyncClient(transport=_mock_atmo(calls)) as http_client:
+            clients = [
+                AtmoClient(
+                    base_url="https://atmo.test",
+                    username="user",
+                    password="secret",
+                    http_client=http_client,
+                    token_store=store,
+                )
+                for _ in range(10)
+            ]
+            await asyncio.gather(*(c.fetch_indices_atmo("2025-01-02", "2025-01-01") for c in clients))
+            # A later request reuses the cached token
+            await clients[0].fetch_indices_atmo("2025-01-02", "2025-01-01")
+
+    asyncio.run(run())
+    assert calls == {"login": 1, "data": 11}
+    assert store.stats["logins"] == 1
+    assert store.logins_avoided == 10
+
+
+def test_token_near_expiry_is_refreshed_proactively():
+    store = AtmoTokenStore(refresh_margin=timedelta(minutes=30))
+    store.set("k", "old", datetime.utcnow() + timedelta(minutes=5))
+
+    async def login():
+        return "new", datetime.utcnow() + timedelta(hours=23, minutes=50)
+
+    assert asyncio.run(store.get_token("k", login)) == "new"
+    assert store.stats["proactive_refreshes"] == 1
+
+
+def test_token_survives_restart_with_file_backend(tmp_path):
+    cache_file = str(tmp_path / "atmo_token.json")
+    expires_at = datetime.utcnow() + timedelta(hours=2)
+    AtmoTokenStore(cache_file=cache_file).set("k", "persisted", expires_at)
+
+    assert json.loads((tmp_path / "atmo_token.json").read_text())["k"]["token"] == "persisted"
+    assert AtmoTokenStore(cache_file=cache_file).peek("k") == "persisted"
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import atmo
+from app.etl.atmo_transform import normalize_day, normalize_features, parse_fields
+from app.main import app
+
+FEATURES = [
+    {"date_maj": "2024-11-14T10:00:00Z", "date_ech": "2024-11-15T00:00:00+01:00", "code_qual": 2, "lib_zone": "Paris"},
+    {"date_maj": "2024-11-14T10:00:00Z", "date_ech": "2024-11-15T00:00:00+01:00", "code_qual": 3, "lib_zone": "Paris"},
+    {"date_maj": "14/11/2024T10h", "code_qual": 1, "lib_zone": "Lyon"},
+    {"date_maj": None, "code_qual": 4},
+    {"date_maj": "2024-11-14", "code_qual": None},
+]
+
+
+def test_normalize_features_matches_legacy_per_row_output():
+    assert normalize_features(FEATURES) == [
+        {"date": "2024-11-14", "code_qual": 2},
+        {"date": "2024-11-14", "code_qual": 3},
+        {"date": "14/11/2024", "code_qual": 1},
+    ]
+
+
+def test_normalize_features_projects_extra_fields():
+    rows = normalize_features(FEATURES, ["lib_zone", "date_ech", "code_no2"])
+    assert rows[0] == {"lib_zone": "Paris", "date_ech": "2024-11-15", "code_no2": None}
+    assert [row["date_ech"] for row in rows] == ["2024-11-15", "2024-11-15", None]
+
+
+def test_repeated_timestamps_are_parsed_once():
+    normalize_day.cache_clear()
+    normalize_features(FEATURES * 100)
+    info = normalize_day.cache_info()
+    assert info.misses == 2 and info.hits == 0
+    normalize_features(FEATURES)
+    assert normalize_day.cache_info().misses == 2
+
+
+def test_pandas_engine_matches_python_engine():
+    pytest.importorskip("pandas")
+    fields = ["date", "date_ech", "code_qual", "lib_zone"]
+    assert normalize_features(FEATURES, fields, engine="pandas") == normalize_features(FEATURES, fields)
+
+
+def test_parse_fields():
+    assert parse_fields(None) == ["date", "code_qual"]
+    assert parse_fields("lib_zone, code_qual,lib_zone") == ["lib_zone", "code_qual"]
+    with pytest.raises(ValueError):
+        parse_fields("date,nope")
+
+
+def test_indices_endpoint_fields_parameter(monkeypatch):
+    seen = []
+
+    async def fake_fetch(http_client, d, dh, code_zone, fields):
+        seen.append(fields)
+        return {"results": normalize_features(FEATURES, fields)}
+
+    atmo.get_atmo_cache.cache_clear()
+    monkeypatch.setattr(atmo, "_fetch_indices", fake_fetch)
+    client = TestClient(app)
+    params = {"date": "2024-11-14", "date_historique": "2024-11-10"}
+
+    response = client.get("/api/v1/atmo/indices", params={**params, "fields": "code_qual,lib_zone"})
+    assert response.json()["results"][0] == {"code_qual": 2, "lib_zone": "Paris"}
+    # Different projections are cached separately
+    assert client.get("/api/v1/atmo/indices", params=params).json()["results"][0] == {"date": "2024-11-14", "code_qual": 2}
+    assert seen == [["code_qual", "lib_zone"], ["date", "code_qual"]]
+    assert client.get("/api/v1/atmo/indices", params={**params, "fields": "bogus"}).status_code == 400
@@ -0,0 +1,97 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, accepted_encodings
+
+BODY = "date;valeur\n" * 500
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, gzip_level=6, brotli_quality=4)
+
+    @app.get("/big")
+    def big():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/precompressed")
+    def precompressed():
+        return Response(gzip.compress(BODY.encode()), media_type="text/csv", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    def stream():
+        async def lines():
+            for i in range(3):
+                yield f'{{"i":{i}}}\n'.encode()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def test_accept_encoding_negotiation():
+    assert accepted_encodings("gzip, br", ["br", "gzip"]) == ["br", "gzip"]
+    assert accepted_encodings("br;q=0.5, gzip", ["br", "gzip"]) == ["gzip", "br"]
+    assert accepted_encodings("gzip;q=0, *", ["br", "gzip"]) == ["br"]
+    assert accepted_encodings("identity", ["br", "gzip"]) == []
+    assert accepted_encodings(None, ["gzip"]) == []
+
+
+def test_gzip_above_threshold_only():
+    client = _client()
+    big = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert big.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in big.headers["vary"]
+    assert int(big.headers["content-length"]) < len(BODY) // 10
+    assert big.text == BODY
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert client.get("/big", headers={"Accept-Encoding": "identity"}).headers.get("content-encoding") is None
+
+
+def test_brotli_preferred_when_available():
+    if compression.brotli is None:
+        pytest.skip("brotli not installed")
+    with _client().stream("GET", "/big", headers={"Accept-Encoding": "gzip, br"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "br"
+    assert compression.brotli.decompress(raw).decode() == BODY
+
+
+def test_already_encoded_response_is_not_recompressed():
+    with _client().stream("GET", "/precompressed", headers={"Accept-Encoding": "gzip, br"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).decode() == BODY
+
+
+def test_streamed_chunks_are_flushed_individually():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i in range(3):
+            await send({"type": "http.response.body", "body": f'{{"i":{i}}}\n'.encode(), "more_body": i < 2})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app)(scope, None, send))
+
+    assert (b"content-encoding", b"gzip") in messages[0]["headers"]
+    # Each chunk decodes as soon as it arrives: no line waits for the end of the stream
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert [decoder.decompress(message["body"]) for message in messages[1:]] == [b'{"i":0}\n', b'{"i":1}\n', b'{"i":2}\n']
@@ -0,0 +1,16 @@
+import asyncio
+
+from app.core.config import get_settings
+from app.db.session import dispose_async_engine, get_async_engine
+
+
+def test_async_engine_uses_asyncpg_and_pool_settings():
+    settings = get_settings()
+    engine = get_async_engine()
+    try:
+        assert engine.url.drivername == "postgresql+asyncpg"
+        assert engine.pool.size() == settings.DB_POOL_SIZE
+        assert get_async_engine() is engine
+    finally:
+        asyncio.run(dispose_async_engine())
+    assert get_async_engine.cache_info().currsize == 0
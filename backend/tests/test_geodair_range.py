@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.core.http import get_http_client
+from app.etl.geodair_client import GeodairClient, merge_chunk_results, split_time_range
+from app.main import app
+
+
+def test_split_time_range_covers_window_without_gaps():
+    windows = split_time_range(datetime(2024, 1, 1), datetime(2024, 1, 3, 12), timedelta(days=1))
+    assert windows == [
+        (datetime(2024, 1, 1), datetime(2024, 1, 2)),
+        (datetime(2024, 1, 2), datetime(2024, 1, 3)),
+        (datetime(2024, 1, 3), datetime(2024, 1, 3, 12)),
+    ]
+
+
+def test_range_fetch_is_ordered_and_retries_failed_chunks():
+    attempts = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        start = request.url.params["start"]
+        attempts[start] = attempts.get(start, 0) + 1
+        day = int(start[8:10])
+        # Later chunks answer first, and one chunk fails once
+        await asyncio.sleep(0.01 * (10 - day))
+        if day == 3 and attempts[start] == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json=[{"date_debut": start, "valeur": day}])
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = GeodairClient(base_url="https://geodair.test", http_client=http_client)
+            return [
+                result
+                async for _, _, result in client.fetch_air_quality_range(
+                    "24",
+                    "2024-01-01T00:00:00",
+                    "2024-01-08T00:00:00",
+                    concurrency=3,
+                    backoff_seconds=0,
+                )
+            ]
+
+    merged = merge_chunk_results(asyncio.run(run()))
+    assert [row["valeur"] for row in merged["data"]] == [1, 2, 3, 4, 5, 6, 7]
+    assert attempts["2024-01-03T00:00:00"] == 2
+
+
+def test_csv_chunks_are_merged_into_one_content_with_a_single_header():
+    merged = merge_chunk_results(
+        [{"content": "date;valeur\n2024-01-01;1\n"}, {"content": "date;valeur\n2024-01-02;2"}, {"content": "date;valeur\n"}]
+    )
+    assert merged == {"content": "date;valeur\n2024-01-01;1\n2024-01-02;2"}
+    # JSON objects cannot be concatenated: the caller falls back to a single call
+    assert merge_chunk_results([{"data": {"a": 1}}, {"data": [2]}]) is None
+
+
+def _csv_upstream(seen):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.params["start"], request.url.params["end"]))
+        return httpx.Response(
+            200, text=f"date;valeur\n{request.url.params['start']};1\n", headers={"Content-Type": "text/csv"}
+        )
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_long_csv_window_keeps_the_single_call_shape_and_utc_offsets():
+    seen = []
+    app.dependency_overrides[get_http_client] = lambda: _csv_upstream(seen)
+    try:
+        response = TestClient(app).get(
+            "/api/v1/air-quality",
+            params={"pollutant_code": "24", "start": "2024-01-01T00:00:00+01:00", "end": "2024-01-10T00:00:00+01:00"},
+        )
+    finally:
+        app.dependency_overrides.pop(get_http_client, None)
+    assert response.status_code == 200
+    lines = response.json()["content"].splitlines()
+    assert lines[0] == "date;valeur" and lines.count("date;valeur") == 1 and len(lines) == 10
+    assert len(seen) == 9
+    assert seen[0] == ("2024-01-01T00:00:00+01:00", "2024-01-02T00:00:00+01:00")
+
+
+def test_mixed_naive_and_aware_bounds_are_forwarded_unchanged():
+    seen = []
+    app.dependency_overrides[get_http_client] = lambda: _csv_upstream(seen)
+    params = {"pollutant_code": "24", "start": "2024-01-01T00:00:00", "end": "2024-01-10T00:00:00+01:00"}
+    try:
+        response = TestClient(app).get("/api/v1/air-quality", params=params)
+    finally:
+        app.dependency_overrides.pop(get_http_client, None)
+    assert response.status_code == 200
+    assert seen == [(params["start"], params["end"])]
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.etl.atmo_client import AtmoClient
+from app.etl.atmo_token_store import AtmoTokenStore
+from app.etl.geojson_stream import FeatureSplitter, iter_feature_properties
+
+
+def _collection(n):
+    return {
+        "type": "FeatureCollection",
+        "bbox": [0, 0, 1, 1],
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [2.35, 48.85]},
+                "properties": {"date_maj": f"2024-11-{i + 1:02d}T10:00:00Z", "code_qual": i, "lib_zone": 'Zone "é" {[]}'},
+            }
+            for i in range(n)
+        ],
+        "meta": {"features": [{"ignored": True}]},
+    }
+
+
+def _chunks(payload: bytes, size: int):
+    return [payload[i : i + size] for i in range(0, len(payload), size)]
+
+
+def test_properties_match_full_parse_for_any_chunking():
+    doc = _collection(5)
+    payload = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+    expected = [ft["properties"] for ft in doc["features"]]
+    for size in (1, 3, 17, len(payload)):
+        assert list(iter_feature_properties(_chunks(payload, size))) == expected
+
+
+def test_top_level_list_payload_yields_dict_rows():
+    payload = json.dumps([{"date_maj": "2024-11-01", "code_qual": 3}, "skip", {"code_qual": 4}]).encode()
+    assert list(iter_feature_properties(_chunks(payload, 4))) == [
+        {"date_maj": "2024-11-01", "code_qual": 3},
+        {"code_qual": 4},
+    ]
+
+
+def test_buffer_stays_bounded_by_one_feature():
+    payload = json.dumps(_collection(2000)).encode()
+    splitter = FeatureSplitter()
+    peak = 0
+    for chunk in _chunks(payload, 512):
+        splitter.feed(chunk.decode())
+        peak = max(peak, splitter.buffered)
+    assert peak < 2048
+
+
+def test_iter_indices_atmo_streams_and_retries_after_401():
+    payload = json.dumps(_collection(3)).encode()
+    seen_tokens = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/login":
+            return httpx.Response(200, json={"token": "fresh"})
+        seen_tokens.append(request.headers.get("Authorization"))
+        if request.headers.get("Authorization") != "Bearer fresh":
+            return httpx.Response(401)
+        return httpx.Response(200, stream=httpx.ByteStream(payload))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = AtmoClient(
+                base_url="https://atmo.test",
+                api_key="expired",
+                username="user",
+                password="secret",
+                http_client=http_client,
+                token_store=AtmoTokenStore(),
+            )
+            return [props async for props in client.iter_indices_atmo("2024-11-14", "2024-11-10")]
+
+    rows = asyncio.run(run())
+    assert [row["code_qual"] for row in rows] == [0, 1, 2]
+    assert seen_tokens == ["Bearer expired", "Bearer fresh"]
+
+
+def test_truncated_collection_raises_instead_of_returning_partial_results():
+    payload = json.dumps(_collection(3)).encode()
+    cut = payload[: payload.index(b'"code_qual": 2')]
+    rows = []
+    with pytest.raises(ValueError, match="not closed"):
+        for props in iter_feature_properties(_chunks(cut, 7)):
+            rows.append(props)
+    assert len(rows) == 2
+    with pytest.raises(ValueError, match="Truncated"):
+        list(iter_feature_properties([b'{"type": "FeatureCollection", "bbox": [0, ']))
+
+
+def test_malformed_element_fails_fast_without_buffering_the_rest():
+    bad = b'[{"code_qual": 1}, {bad}, ' + b", ".join([b'{"code_qual": 2}'] * 500) + b"]"
+    splitter = FeatureSplitter()
+    fed = 0
+    with pytest.raises(ValueError, match="Malformed"):
+        for chunk in _chunks(bad, 16):
+            fed += len(chunk)
+            splitter.feed(chunk.decode())
+    # Detected within a few chunks of the bad element, not at the end of the body
+    assert fed < 200
+    with pytest.raises(ValueError, match="Malformed"):
+        list(iter_feature_properties(_chunks(bad, 16)))
+
+
+def test_body_without_target_array_is_an_error():
+    assert list(iter_feature_properties([b'{"type": "FeatureCollection", "features": []}'])) == []
+    for body in (b'{"type": "FeatureCollection", "meta": {"n": 0}}', b'{"detail": "quota"}', b"<html>maintenance</html>"):
+        with pytest.raises(ValueError, match="No 'features' array"):
+            list(iter_feature_properties(_chunks(body, 5)))
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import httpx
+
+from app.core.hedging import HEDGES, HedgeBudget, Hedger, LatencyWindow
+from app.core.resilience import CircuitBreaker
+from app.etl.geodair_client import GeodairClient
+
+
+def _sender(delays, calls, cancelled):
+    async def send():
+        delay = delays[len(calls)]
+        calls.append(delay)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return httpx.Response(200, text=str(delay))
+
+    return send
+
+
+def _hedger(ratio):
+    return Hedger("test", budget=HedgeBudget(ratio=ratio), min_delay=0.02, min_samples=0)
+
+
+def test_slow_request_is_hedged_and_the_loser_cancelled():
+    calls, cancelled = [], []
+    before = HEDGES.get(("test", "hedge_won"))
+    start = time.perf_counter()
+    response = asyncio.run(_hedger(ratio=1.0).wrap(_sender([5.0, 0.0], calls, cancelled))())
+    assert response.text == "0.0"
+    assert time.perf_counter() - start < 1.0
+    assert calls == [5.0, 0.0] and cancelled == [5.0]
+    assert HEDGES.get(("test", "hedge_won")) == before + 1
+
+
+def test_cancelled_loser_is_kept_in_the_latency_window():
+    calls, cancelled = [], []
+    hedger = _hedger(ratio=1.0)
+    asyncio.run(hedger.wrap(_sender([5.0, 0.0], calls, cancelled))())
+    assert len(hedger.latencies) == 2
+    # The primary's censored sample: at least the hedge delay it waited
+    assert hedger.latencies.quantile(1.0) >= 0.02
+
+
+def test_fast_requests_and_an_empty_budget_send_one_request():
+    calls, cancelled = [], []
+    asyncio.run(_hedger(ratio=1.0).wrap(_sender([0.0], calls, cancelled))())
+    assert calls == [0.0]
+
+    # No token in the bucket: the slow request is simply awaited
+    calls.clear()
+    response = asyncio.run(_hedger(ratio=0.0).wrap(_sender([0.1, 0.0], calls, cancelled))())
+    assert response.text == "0.1" and calls == [0.1]
+
+
+def test_hedge_delay_follows_the_latency_percentile():
+    hedger = Hedger("test", budget=HedgeBudget(), quantile=0.9, min_delay=0.01, min_samples=10)
+    assert hedger.delay() is None
+    for i in range(1, 101):
+        hedger.latencies.observe(i / 1000)
+    assert hedger.delay() == 0.091
+
+    window = LatencyWindow(size=4, refresh_every=100)
+    for value in (1, 2, 3, 4, 5):
+        window.observe(value)
+    assert window.quantile(0.0) == 2
+
+
+def test_geodair_client_uses_the_first_answer():
+    seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if len(seen) == 1:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json=[{"valeur": len(seen)}])
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = GeodairClient(
+                "https://geodair.test", http_client=http_client, breaker=CircuitBreaker("test"), hedger=_hedger(1.0)
+            )
+            return await client.fetch_air_quality("24", "2024-01-01T00:00:00", "2024-01-02T00:00:00")
+
+    assert asyncio.run(run()) == {"data": [{"valeur": 2}]}
+    assert len(seen) == 2
@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.core.http import HostLimitedTransport
+from app.main import create_app
+
+
+def test_lifespan_creates_and_closes_shared_client():
+    app = create_app()
+    with TestClient(app):
+        client = app.state.http_client
+        assert isinstance(client, httpx.AsyncClient)
+        assert not client.is_closed
+    assert client.is_closed
+    assert app.state.http_client is None
+
+
+def test_host_limited_transport_caps_concurrency_per_host():
+    in_flight = {"a.test": 0, "b.test": 0}
+    peak = {"a.test": 0, "b.test": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        in_flight[host] += 1
+        peak[host] = max(peak[host], in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200, json={"ok": True})
+
+    async def run() -> None:
+        transport = HostLimitedTransport(httpx.MockTransport(handler), max_per_host=2)
+        async with httpx.AsyncClient(transport=transport) as client:
+            urls = [f"https://{host}/" for host in ("a.test", "b.test") for _ in range(6)]
+            responses = await asyncio.gather(*(client.get(url) for url in urls))
+        assert all(r.status_code == 200 for r in responses)
+
+    asyncio.run(run())
+    assert peak == {"a.test": 2, "b.test": 2}
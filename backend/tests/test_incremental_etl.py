@@ -0,0 +1,81 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.db.session import Base
+from app.etl.incremental import get_watermark, sync_atmo_zone
+from app.models import Indicator
+
+
+class FakeAtmoClient:
+    def __init__(self, fail_on_call=None):
+        self.calls = []
+        self.fail_on_call = fail_on_call
+
+    async def iter_indices_atmo(self, **params):
+        self.calls.append((params["date_historique"], params["date"]))
+        if self.fail_on_call == len(self.calls):
+            raise RuntimeError("connection reset")
+        day = date.fromisoformat(params["date_historique"]) + timedelta(days=1)
+        while day <= date.fromisoformat(params["date"]):
+            yield {"code_zone": params["code_zone"], "lib_zone": "Paris", "date_ech": day.isoformat(), "code_qual": 3}
+            day += timedelta(days=1)
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return Session(bind=engine)
+
+
+def _sync(session, client, until):
+    return asyncio.run(
+        sync_atmo_zone(session, client, "75056", since=date(2024, 11, 1), until=until, window_days=4)
+    )
+
+
+def test_second_run_only_fetches_new_days():
+    session = _session()
+    first = FakeAtmoClient()
+    assert _sync(session, first, until=date(2024, 11, 8)) == 8
+    assert len(first.calls) == 2
+    assert get_watermark(session, "75056", "atmo") == date(2024, 11, 8)
+
+    second = FakeAtmoClient()
+    assert _sync(session, second, until=date(2024, 11, 10)) == 2
+    assert second.calls == [("2024-11-08", "2024-11-10")]
+
+
+def test_crash_resumes_after_last_committed_window():
+    session = _session()
+    with pytest.raises(RuntimeError):
+        _sync(session, FakeAtmoClient(fail_on_call=2), until=date(2024, 11, 8))
+    assert get_watermark(session, "75056", "atmo") == date(2024, 11, 4)
+
+    resumed = FakeAtmoClient()
+    _sync(session, resumed, until=date(2024, 11, 8))
+    assert resumed.calls == [("2024-11-04", "2024-11-08")]
+    assert session.scalar(select(func.count()).select_from(Indicator)) == 8
+
+
+class VanishingSubIndexClient(FakeAtmoClient):
+    async def iter_indices_atmo(self, **params):
+        async for props in super().iter_indices_atmo(**params):
+            # code_so2 is only reported until Nov 2
+            if props["date_ech"] <= "2024-11-02":
+                props["code_so2"] = 1
+            yield props
+
+
+def test_sub_index_no_longer_reported_does_not_freeze_resume_date():
+    session = _session()
+    _sync(session, VanishingSubIndexClient(), until=date(2024, 11, 8))
+    assert get_watermark(session, "75056", "atmo", type="atmo_so2") == date(2024, 11, 8)
+    assert get_watermark(session, "75056", "atmo", type="atmo_no2") == date(2024, 11, 8)
+
+    second = VanishingSubIndexClient()
+    _sync(session, second, until=date(2024, 11, 10))
+    assert second.calls == [("2024-11-08", "2024-11-10")]
@@ -0,0 +1,177 @@
+from datetime import date, timedelta
+
+import io
+import json
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.endpoints.indicators import DAILY, MONTHLY, RAW, build_timeseries_query, plan_table
+from app.db.rollups import rebuild_rollups
+from app.core.config import get_settings
+from app.db.deps import get_async_db
+from app.db.session import Base
+from app.main import app
+from app.models import City, Indicator
+
+
+class AsyncSessionAdapter:
+    """Expose a sync SQLite session through the AsyncSession methods used by the endpoint."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def get_bind(self):
+        return self.session.get_bind()
+
+    async def execute(self, stmt):
+        return self.session.execute(stmt)
+
+    async def stream(self, stmt):
+        return AsyncResultAdapter(self.session.execute(stmt))
+
+
+class AsyncResultAdapter:
+    def __init__(self, result):
+        self.result = result
+
+    async def partitions(self, size):
+        for partition in self.result.partitions(size):
+            yield partition
+
+
+@pytest.fixture()
+def client():
+    # TestClient runs the app in another thread
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = Session(bind=engine)
+    paris = City(name="Paris", insee_code="75056")
+    lyon = City(name="Lyon", insee_code="69123")
+    session.add_all([paris, lyon])
+    session.flush()
+    day = date(2025, 1, 1)  # Wednesday
+    for offset in range(40):
+        current = day + timedelta(days=offset)
+        session.add(Indicator(city_id=paris.id, type="atmo_indice", value=offset % 5, date=current, source="atmo"))
+        session.add(Indicator(city_id=lyon.id, type="atmo_indice", value=1, date=current, source="atmo"))
+    session.commit()
+    rebuild_rollups(session, since=day, until=day + timedelta(days=60))
+
+    async def override():
+        yield AsyncSessionAdapter(session)
+
+    app.dependency_overrides[get_async_db] = override
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_async_db, None)
+        session.close()
+
+
+def test_weekly_buckets_are_aggregated_per_city(client):
+    response = client.get(
+        "/api/v1/indicators",
+        params={"city": "75056", "bucket": "week", "stats": "count,min,max,avg", "end": "2025-01-12"},
+    )
+    assert response.status_code == 200
+    assert response.headers["X-Indicators-Table"] == DAILY
+    body = response.json()
+    assert body["truncated"] is False
+    [series] = body["series"]
+    assert series["insee_code"] == "75056"
+    assert series["points"] == [
+        {"date": "2024-12-30", "count": 5, "min": 0.0, "max": 4.0, "avg": 2.0},
+        {"date": "2025-01-06", "count": 7, "min": 0.0, "max": 4.0, "avg": pytest.approx(11 / 7)},
+    ]
+
+
+def test_monthly_buckets_and_limit(client):
+    response = client.get("/api/v1/indicators", params={"bucket": "month", "stats": "count"})
+    assert response.headers["X-Indicators-Table"] == MONTHLY
+    body = response.json()
+    assert [(s["insee_code"], [p["count"] for p in s["points"]]) for s in body["series"]] == [
+        ("69123", [31, 9]),
+        ("75056", [31, 9]),
+    ]
+
+    body = client.get("/api/v1/indicators", params={"bucket": "month", "limit": 3}).json()
+    assert body["truncated"] is True
+    assert sum(len(s["points"]) for s in body["series"]) == 3
+
+
+def test_rollups_answer_like_the_raw_table(client, monkeypatch):
+    params = {"bucket": "week", "stats": "count,min,max,avg", "start": "2025-01-03", "end": "2025-02-05"}
+    from_rollups = client.get("/api/v1/indicators", params=params).json()
+    monkeypatch.setenv("INDICATORS_USE_ROLLUPS", "false")
+    get_settings.cache_clear()
+    try:
+        response = client.get("/api/v1/indicators", params=params)
+    finally:
+        get_settings.cache_clear()
+    assert response.headers["X-Indicators-Table"] == RAW
+    assert response.json() == from_rollups
+
+
+def test_planner_routes_coarse_requests_to_rollups():
+    assert plan_table("month", ["avg"], date(2025, 1, 1), date(2025, 3, 31)) == MONTHLY
+    assert plan_table("month", ["avg"], None, None) == MONTHLY
+    assert plan_table("month", ["avg"], date(2025, 1, 15), date(2025, 3, 31)) == DAILY
+    assert plan_table("week", ["min", "max"], None, None) == DAILY
+    assert plan_table("month", ["avg", "p95"], None, None) == RAW
+
+
+def test_ndjson_streams_flat_points(client):
+    response = client.get(
+        "/api/v1/indicators",
+        params={"bucket": "month", "stats": "count"},
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {"insee_code": "69123", "type": "atmo_indice", "date": "2025-01-01", "count": 31}
+    assert len(lines) == 4
+
+
+def test_invalid_parameters_are_rejected(client):
+    assert client.get("/api/v1/indicators", params={"bucket": "hour"}).status_code == 400
+    assert client.get("/api/v1/indicators", params={"stats": "median"}).status_code == 400
+    assert client.get("/api/v1/indicators", params={"start": "2025-02-01", "end": "2025-01-01"}).status_code == 400
+
+
+def test_postgres_query_uses_date_trunc_and_percentiles():
+    stmt = build_timeseries_query("postgresql", "week", ["avg", "p95"], cities=["75056"])
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "date_trunc" in sql
+    assert "percentile_cont" in sql and "WITHIN GROUP (ORDER BY indicators.value ASC)" in sql
+    assert "GROUP BY cities.insee_code, indicators.type" in sql
+
+
+def test_export_requires_pyarrow(client, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    response = client.get("/api/v1/indicators/export", params={"city": "75056"})
+    assert response.status_code == 501
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_export_streams_columnar_batches(client, fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    response = client.get(
+        "/api/v1/indicators/export",
+        params={"format": fmt, "city": "75056", "end": "2025-01-31", "batch_size": 1000},
+    )
+    assert response.status_code == 200
+    if fmt == "arrow":
+        table = pa.ipc.open_stream(response.content).read_all()
+    else:
+        table = pq.read_table(io.BytesIO(response.content))
+    assert table.column_names == ["insee_code", "type", "source", "date", "value"]
+    assert table.num_rows == 31
+    assert table.column("date")[0].as_py() == date(2025, 1, 1)
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.db.session import Base
+from app.etl.load_indicators import (
+    atmo_indicator_rows,
+    bulk_upsert_indicators,
+    geodair_indicator_rows,
+    load_geodair_measurements,
+)
+from app.models import City, Indicator, IndicatorDailyRollup, IndicatorMonthlyRollup
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return Session(bind=engine)
+
+
+def _atmo_props(code_zone, day, code_qual):
+    return {
+        "code_zone": code_zone,
+        "lib_zone": f"Zone {code_zone}",
+        "date_ech": f"{day}T00:00:00Z",
+        "date_maj": f"{day}T10:00:00Z",
+        "code_qual": code_qual,
+        "code_no2": 1,
+    }
+
+
+def test_atmo_rows_are_loaded_in_chunks_and_upserted():
+    session = _session()
+    features = [_atmo_props(f"750{i:02d}", "2024-11-14", 2) for i in range(5)]
+
+    assert bulk_upsert_indicators(session, atmo_indicator_rows(features), chunk_size=3) == 10
+    assert session.scalar(select(func.count()).select_from(City)) == 5
+    assert session.scalar(select(func.count()).select_from(Indicator)) == 10
+
+    # Re-loading the same window updates values instead of duplicating rows
+    features[0]["code_qual"] = 5
+    bulk_upsert_indicators(session, atmo_indicator_rows(features), chunk_size=3)
+    assert session.scalar(select(func.count()).select_from(Indicator)) == 10
+    value = session.scalar(
+        select(Indicator.value).join(City).where(City.insee_code == "75000", Indicator.type == "atmo_indice")
+    )
+    assert value == 5
+
+
+def test_geodair_rows_are_daily_means():
+    payload = {
+        "data": [
+            {"date_debut": "2024-11-14 00:00:00", "valeur": "10"},
+            {"date_debut": "2024-11-14 01:00:00", "valeur": "20,0"},
+            {"date_debut": "2024-11-15 00:00:00", "valeur": ""},
+        ]
+    }
+    rows = geodair_indicator_rows(payload, insee_code="75056", pollutant_code="24")
+    assert [(r["date"], r["value"], r["type"]) for r in rows] == [(date(2024, 11, 14), 15.0, "geodair_24")]
+
+
+
+def test_rollups_are_refreshed_for_loaded_days_only():
+    session = _session()
+    bulk_upsert_indicators(
+        session,
+        atmo_indicator_rows([_atmo_props("75056", day, 2) for day in ("2024-10-31", "2024-11-14", "2024-11-15")]),
+    )
+    monthly = session.execute(
+        select(IndicatorMonthlyRollup.period, IndicatorMonthlyRollup.value_count, IndicatorMonthlyRollup.value_sum)
+        .where(IndicatorMonthlyRollup.type == "atmo_indice")
+        .order_by(IndicatorMonthlyRollup.period)
+    ).all()
+    assert monthly == [(date(2024, 10, 1), 1, 2.0), (date(2024, 11, 1), 2, 4.0)]
+
+    # Reloading one day recomputes that day and its month; October is untouched
+    bulk_upsert_indicators(session, atmo_indicator_rows([_atmo_props("75056", "2024-11-15", 5)]))
+    daily = session.execute(
+        select(IndicatorDailyRollup.period, IndicatorDailyRollup.value_max)
+        .where(IndicatorDailyRollup.type == "atmo_indice")
+        .order_by(IndicatorDailyRollup.period)
+    ).all()
+    assert daily == [(date(2024, 10, 31), 2.0), (date(2024, 11, 14), 2.0), (date(2024, 11, 15), 5.0)]
+    november = session.execute(
+        select(IndicatorMonthlyRollup.value_sum, IndicatorMonthlyRollup.value_max).where(
+            IndicatorMonthlyRollup.type == "atmo_indice", IndicatorMonthlyRollup.period == date(2024, 11, 1)
+        )
+    ).one()
+    assert tuple(november) == (7.0, 5.0)
+
+
+class ChunkedGeodairClient:
+    """Fenêtres de 12 h : chaque jour est réparti sur deux fenêtres."""
+
+    def __init__(self, session):
+        self.session = session
+        self.rows_seen = []
+
+    async def fetch_air_quality_range(self, **_):
+        for window_start, values in (
+            (datetime(2024, 11, 14, 0), [10]),
+            (datetime(2024, 11, 14, 12), [20]),
+            (datetime(2024, 11, 15, 0), [4]),
+            (datetime(2024, 11, 15, 12), [6]),
+        ):
+            # What has been written before this window is delivered
+            self.rows_seen.append(self.session.scalar(select(func.count()).select_from(Indicator)))
+            data = [{"date_debut": f"{window_start:%Y-%m-%d %H}:00:00", "valeur": str(v)} for v in values]
+            yield window_start, window_start, {"data": data}
+
+
+def test_geodair_days_are_loaded_as_windows_arrive():
+    session = _session()
+    client = ChunkedGeodairClient(session)
+    total = asyncio.run(
+        load_geodair_measurements(
+            session,
+            client,
+            insee_code="75056",
+            pollutant_code="24",
+            start="2024-11-14T00:00:00",
+            end="2024-11-16T00:00:00",
+        )
+    )
+    assert total == 2
+    # The 14th is written once its last window is behind, before the end of the backfill
+    assert client.rows_seen == [0, 0, 0, 1]
+    values = session.execute(select(Indicator.date, Indicator.value).order_by(Indicator.date)).all()
+    assert values == [(date(2024, 11, 14), 15.0), (date(2024, 11, 15), 5.0)]
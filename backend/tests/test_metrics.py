@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.metrics import REGISTRY, UPSTREAM_REQUESTS, MetricsRegistry, observe_upstream
+from app.core.resilience import CircuitBreaker
+from app.etl.geodair_client import GeodairClient
+from app.main import app
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("job_seconds", "Durée", ("job",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, ("load",))
+    lines = registry.render().decode().splitlines()
+    assert lines[:2] == ["# HELP job_seconds Durée", "# TYPE job_seconds histogram"]
+    assert lines[2:] == [
+        'job_seconds_bucket{job="load",le="0.1"} 2',
+        'job_seconds_bucket{job="load",le="1"} 3',
+        'job_seconds_bucket{job="load",le="+Inf"} 4',
+        'job_seconds_sum{job="load"} 3.65',
+        'job_seconds_count{job="load"} 4',
+    ]
+
+
+def test_metrics_endpoint_reports_routes_by_template_and_cache():
+    with TestClient(app) as client:
+        client.get("/api/v1/health")
+        client.get("/does-not-exist")
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/health",status="200"}' in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'atmo_cache_requests_total{result="miss"}' in body
+    assert 'upstream_circuit_open{upstream="atmo"} 0' in body
+    # No engine was built by the scrape itself
+    assert "db_pool_checked_out{" not in body
+
+
+def _upstream_count(status):
+    labels = {"upstream": "geodair", "operation": "data", "status": status}
+    for name, _, _, samples in REGISTRY.families():
+        if name == "upstream_requests_total":
+            return sum(value for _, sample_labels, value in samples if sample_labels == labels)
+    return 0
+
+
+def test_upstream_calls_are_timed_per_attempt():
+    statuses = iter([503, 200])
+
+    async def handler(request):
+        return httpx.Response(next(statuses), json=[])
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = GeodairClient("https://geodair.test", http_client=http_client, breaker=CircuitBreaker("test"))
+            await client.fetch_air_quality("24", "2024-01-01T00:00:00", "2024-01-02T00:00:00")
+
+    before = _upstream_count("503"), _upstream_count("200")
+    asyncio.run(run())
+    # The retried 503 and the final 200 are both recorded
+    assert (_upstream_count("503"), _upstream_count("200")) == (before[0] + 1, before[1] + 1)
+
+
+def test_unexpected_upstream_errors_propagate_unchanged():
+    async def undecodable():
+        raise httpx.DecodingError("bad gzip")
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    labels = ("geodair", "probe")
+    with pytest.raises(httpx.DecodingError):
+        asyncio.run(observe_upstream("geodair", "probe", undecodable)())
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(observe_upstream("geodair", "probe", cancelled)())
+    assert UPSTREAM_REQUESTS.get((*labels, "error")) == 1
+    assert UPSTREAM_REQUESTS.get((*labels, "cancelled")) == 1
@@ -0,0 +1,38 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.db.migrate import MIGRATIONS_DIR, pending_migrations
+from app.models import Indicator
+
+
+def test_pending_migrations_are_ordered_and_skip_applied():
+    versions = [path.stem for path in pending_migrations([])]
+    assert versions == sorted(versions)
+    assert versions[:3] == [
+        "0001_indicators_city_type_date_index",
+        "0002_indicators_date_brin",
+        "0003_indicators_monthly_partitions",
+    ]
+    assert [path.stem for path in pending_migrations(versions[:2])] == versions[2:]
+    assert MIGRATIONS_DIR.is_dir()
+
+
+def test_model_indexes_match_migrations():
+    ddl = {
+        index.name: str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+        for index in Indicator.__table__.indexes
+    }
+    assert "INCLUDE (value)" in ddl["ix_indicators_city_type_date"]
+    assert "USING brin" in ddl["ix_indicators_date_brin"]
+    # The partitioned table is rebuilt with the same index names
+    partitioned = (MIGRATIONS_DIR / "0003_indicators_monthly_partitions.sql").read_text()
+    assert all(name in partitioned for name in ddl if name != "ix_indicators_id")
+
+
+def test_upsert_key_is_added_to_tables_created_without_it():
+    # Baseline tables lack the constraint the ETL upserts rely on: 0001 adds it, guarded
+    first = (MIGRATIONS_DIR / "0001_indicators_city_type_date_index.sql").read_text()
+    assert "IF NOT EXISTS" in first and "ADD CONSTRAINT uq_indicators_city_type_date_source" in first
+    partitioned = (MIGRATIONS_DIR / "0003_indicators_monthly_partitions.sql").read_text()
+    rename = partitioned.index("RENAME CONSTRAINT uq_indicators_city_type_date_source")
+    assert "IF EXISTS" in partitioned[:rename]
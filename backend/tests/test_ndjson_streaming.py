@@ -0,0 +1,70 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import atmo
+from app.core.resilience import CircuitOpenError
+from app.core.streaming import wants_ndjson
+from app.main import app
+
+client = TestClient(app)
+NDJSON = {"Accept": "application/x-ndjson"}
+PARAMS = {"date": "2024-11-14", "date_historique": "2024-11-10", "code_zone": "75056"}
+
+
+def _install_fake_stream(monkeypatch, fail_after=None, error=None):
+    calls = []
+
+    async def fake_iter(http_client, d, dh, code_zone, fields):
+        calls.append(code_zone)
+        for i in range(3):
+            if fail_after == i:
+                raise error or RuntimeError("connection reset")
+            yield [{"date": f"2024-11-1{i}", "code_qual": i}]
+
+    atmo.get_atmo_cache.cache_clear()
+    monkeypatch.setattr(atmo, "_iter_indices", fake_iter)
+    return calls
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_accept_header_negotiation():
+    assert wants_ndjson("application/x-ndjson")
+    assert wants_ndjson("application/json;q=0.5, application/x-ndjson")
+    assert not wants_ndjson("application/json")
+    assert not wants_ndjson(None)
+
+
+def test_atmo_indices_stream_one_line_per_row_then_replay_from_cache(monkeypatch):
+    calls = _install_fake_stream(monkeypatch)
+
+    first = client.get("/api/v1/atmo/indices", params=PARAMS, headers=NDJSON)
+    assert first.headers["content-type"] == "application/x-ndjson"
+    assert first.headers["X-Cache"] == "MISS"
+    assert _lines(first) == [{"date": f"2024-11-1{i}", "code_qual": i} for i in range(3)]
+
+    second = client.get("/api/v1/atmo/indices", params=PARAMS, headers=NDJSON)
+    assert second.headers["X-Cache"] == "HIT"
+    assert _lines(second) == _lines(first)
+    # The JSON representation is served from the same cache entry
+    assert client.get("/api/v1/atmo/indices", params=PARAMS).json() == {"results": _lines(first)}
+    assert calls == ["75056"]
+
+
+def test_error_before_first_row_keeps_http_status(monkeypatch):
+    _install_fake_stream(monkeypatch, fail_after=0, error=CircuitOpenError("atmo", 10))
+    response = client.get("/api/v1/atmo/indices", params=PARAMS, headers=NDJSON)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "11"
+
+
+def test_error_mid_stream_ends_with_error_line_and_is_not_cached(monkeypatch):
+    _install_fake_stream(monkeypatch, fail_after=2)
+    response = client.get("/api/v1/atmo/indices", params=PARAMS, headers=NDJSON)
+    assert response.status_code == 200
+    lines = _lines(response)
+    assert len(lines) == 3 and lines[-1] == {"error": "connection reset"}
+    assert atmo.get_atmo_cache().snapshot()["entries"] == 0
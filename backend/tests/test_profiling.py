@@ -0,0 +1,72 @@
+import json
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import atmo
+from app.core.http import get_http_client
+from app.core.profiling import ProfilingMiddleware
+from app.main import app
+
+FEATURES = {
+    "type": "FeatureCollection",
+    "features": [
+        {"properties": {"code_zone": "75056", "date_ech": "2024-11-14T00:00:00+01:00", "code_qual": 2}}
+    ],
+}
+
+
+def test_atmo_indices_report_server_timing_phases():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=FEATURES)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    atmo.get_atmo_cache.cache_clear()
+    app.dependency_overrides[get_http_client] = lambda: http_client
+    try:
+        response = TestClient(app).get(
+            "/api/v1/atmo/indices", params={"date": "2024-11-14", "date_historique": "2024-11-10"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_http_client, None)
+    assert response.status_code == 200
+    phases = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert phases == ["upstream", "parse", "transform", "serialize", "total"]
+
+
+def _profiled_app(**kwargs):
+    profiled = FastAPI()
+
+    @profiled.get("/slow")
+    async def slow():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return {"ok": True}
+
+    profiled.add_middleware(ProfilingMiddleware, secret="s3cret", **kwargs)
+    return TestClient(profiled)
+
+
+def test_profile_replaces_response_only_with_the_secret():
+    client = _profiled_app()
+    assert client.get("/slow", headers={"X-Profile": "wrong"}).json() == {"ok": True}
+
+    response = client.get("/slow", params={"profile": "s3cret"})
+    assert response.headers["x-profiled-status"] == "200"
+    assert response.headers["content-disposition"].endswith('.speedscope.json"')
+    profile = response.json()
+    samples = profile["profiles"][0]["samples"]
+    assert samples and len(samples) == len(profile["profiles"][0]["weights"])
+    names = {frame["name"] for frame in profile["shared"]["frames"]}
+    assert any(name.endswith("slow") for name in names)
+
+
+def test_profile_is_stored_when_an_output_dir_is_set(tmp_path):
+    client = _profiled_app(output_dir=str(tmp_path))
+    response = client.get("/slow", headers={"X-Profile": "s3cret"})
+    assert response.json() == {"ok": True}
+    stored = json.loads((tmp_path / response.headers["x-profile-file"]).read_text())
+    assert stored["profiles"][0]["type"] == "sampled"
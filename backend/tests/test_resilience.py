@@ -0,0 +1,139 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import atmo
+from app.core.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, send_with_retry
+from app.main import app
+
+
+def _sender(statuses, calls):
+    async def send():
+        calls.append(1)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        if status == "timeout":
+            raise httpx.ReadTimeout("slow")
+        return httpx.Response(status)
+
+    return send
+
+
+def test_transient_failures_are_retried():
+    calls = []
+    breaker = CircuitBreaker("test")
+    response = asyncio.run(
+        send_with_retry(breaker, _sender(["timeout", 503, 200], calls), max_attempts=3, base_delay=0)
+    )
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert breaker.state == CLOSED
+
+
+def test_breaker_opens_fails_fast_then_probes():
+    calls = []
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    response = asyncio.run(send_with_retry(breaker, _sender([500], calls), max_attempts=2, base_delay=0))
+    assert response.status_code == 500
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(send_with_retry(breaker, _sender([200], calls), max_attempts=1))
+    assert len(calls) == 2
+
+    breaker.opened_at -= 61
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_429_honours_retry_after_without_tripping_the_breaker(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    calls = []
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def send():
+        calls.append(1)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "1.5"})
+        return httpx.Response(200)
+
+    response = asyncio.run(send_with_retry(breaker, send, max_attempts=3, max_delay=2))
+    assert response.status_code == 200
+    assert sleeps == [1.5]
+    assert breaker.state == CLOSED and breaker.stats["failures"] == 0
+
+    # Asked to wait longer than max_delay: the 429 goes back to the caller at once
+    calls.clear()
+    sleeps.clear()
+    response = asyncio.run(
+        send_with_retry(breaker, lambda: _throttled(calls, "60"), max_attempts=3, max_delay=2)
+    )
+    assert response.status_code == 429 and len(calls) == 1 and sleeps == []
+
+
+async def _throttled(calls, retry_after):
+    calls.append(1)
+    return httpx.Response(429, headers={"Retry-After": retry_after})
+
+
+def test_cancelled_or_crashed_probe_releases_the_half_open_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    breaker.opened_at -= 61
+
+    async def cancelled_probe():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+
+        task = asyncio.ensure_future(send_with_retry(breaker, hang, max_attempts=1))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled_probe())
+    assert breaker.state == HALF_OPEN and breaker.stats["failures"] == 1
+
+    async def undecodable():
+        raise httpx.DecodingError("bad gzip")
+
+    # The next call is the probe again; its unexpected error counts as a failure
+    with pytest.raises(httpx.DecodingError):
+        asyncio.run(send_with_retry(breaker, undecodable, max_attempts=1))
+    assert breaker.state == OPEN
+
+    breaker.opened_at -= 61
+    response = asyncio.run(send_with_retry(breaker, _sender([200], []), max_attempts=1))
+    assert response.status_code == 200 and breaker.state == CLOSED
+
+
+def test_stale_cache_is_served_when_upstream_fails(monkeypatch):
+    atmo.get_atmo_cache.cache_clear()
+    cache = atmo.get_atmo_cache()
+    cache.set("2024-11-14|2024-11-10|", {"results": [{"date": "2024-11-10", "code_qual": 1}]}, ttl_seconds=-10)
+
+    async def failing_fetch(http_client, d, dh, code_zone, fields):
+        raise HTTPException(status_code=503, detail="ATMO error: circuit open")
+
+    monkeypatch.setattr(atmo, "_fetch_indices", failing_fetch)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/atmo/indices", params={"date": "2024-11-14", "date_historique": "2024-11-10"})
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "STALE"
+    assert response.json()["results"][0]["code_qual"] == 1
+
+    other = client.get("/api/v1/atmo/indices", params={"date": "2024-11-15", "date_historique": "2024-11-10"})
+    assert other.status_code == 503
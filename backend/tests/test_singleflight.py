@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.singleflight import SingleFlight
+from app.main import app
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+
+    async def upstream():
+        executions.append(1)
+        await asyncio.sleep(0.02)
+        return {"value": 42}
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", upstream) for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert results == [{"value": 42}] * 20
+    assert len(executions) == 1
+    assert flight.stats == {"calls": 20, "executions": 1, "shared": 19, "timeouts": 0}
+    assert flight.coalescing_ratio == pytest.approx(0.95)
+    assert flight.in_flight == 0
+
+
+def test_waiter_timeout_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        patient = asyncio.ensure_future(flight.do("k", slow))
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("k", slow, timeout=0.01)
+        return await patient
+
+    assert asyncio.run(run()) == "done"
+    assert flight.stats["timeouts"] == 1
+
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+    assert len(attempts) == 1
+    asyncio.run(run())
+    assert len(attempts) == 2
+
+
+def test_upstreams_health_exposes_coalescing_stats():
+    response = TestClient(app).get("/api/v1/health/upstreams")
+    assert response.status_code == 200
+    assert set(response.json()["coalescing"]) == {"atmo", "geodair"}
@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Generous budgets: they catch a heavy import sneaking in, not small regressions
+IMPORT_BUDGET_SECONDS = 5.0
+FIRST_REQUEST_BUDGET_SECONDS = 2.0
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.db.session import get_async_engine, get_engine
+with TestClient(app.main.app) as client:
+    ready = time.perf_counter()
+    status = client.get("/api/v1/health").status_code
+    answered = time.perf_counter()
+    engines = get_engine.cache_info().currsize + get_async_engine.cache_info().currsize
+print(json.dumps({
+    "import": imported - start,
+    "first_request": answered - ready,
+    "status": status,
+    "engines": engines,
+    "drivers": [name for name in ("psycopg2", "asyncpg") if name in sys.modules],
+}))
+"""
+
+
+def test_import_and_first_request_stay_cheap():
+    # Fresh interpreter: the test process has already imported everything
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    assert result["status"] == 200
+    # No database engine, no DB driver import for requests that do not touch the database
+    assert result["engines"] == 0
+    assert result["drivers"] == []
+    assert result["import"] < IMPORT_BUDGET_SECONDS
+    assert result["first_request"] < FIRST_REQUEST_BUDGET_SECONDS
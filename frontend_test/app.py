@@ -4,6 +4,7 @@ from typing import Any, Dict, Optional
 
 import httpx
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -29,6 +30,13 @@ def http_get(client: httpx.Client, url: str, params: Optional[Dict[str, Any]] =
         return {"content": response.text}
 
 
+def http_get_arrow(client: httpx.Client, url: str, params: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    # Arrow IPC stream: columns arrive typed, no JSON decoding
+    response = client.get(url, params=params)
+    response.raise_for_status()
+    return pa.ipc.open_stream(response.content).read_pandas()
+
+
 def render_sidebar() -> str:
     st.sidebar.title("Observatoire Citadin")
     st.sidebar.caption("Frontend Streamlit")
@@ -51,7 +59,7 @@ def render_sidebar() -> str:
     st.sidebar.divider()
     st.sidebar.markdown("Endpoints:")
     st.sidebar.code(
-        "/api/v1/health\n/api/v1/atmo/indices",
+        "/api/v1/health\n/api/v1/atmo/indices\n/api/v1/indicators/export",
         language=None,
     )
     return st.session_state.backend_url
@@ -124,16 +132,54 @@ def tab_atmo_indices(client: httpx.Client, base_url: str) -> None:
             st.error(f"Erreur: {exc}")
 
 
+def tab_indicators_export(client: httpx.Client, base_url: str) -> None:
+    st.subheader("Indicateurs en base (export Arrow)")
+    st.caption("Séries brutes lues en base par l'API, transférées au format Apache Arrow.")
+    today = datetime.now().date()
+    with st.form("indicators_export_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            insee_code = st.text_input("Code INSEE", value="75056")
+            start_val = st.date_input("Début", value=today.replace(day=1))
+        with col2:
+            indicator_type = st.text_input("Type (optionnel)", value="atmo_indice")
+            end_val = st.date_input("Fin", value=today)
+        submitted = st.form_submit_button("Charger")
+
+    if submitted:
+        params: Dict[str, Any] = {
+            "format": "arrow",
+            "city": insee_code.strip(),
+            "start": start_val.isoformat(),
+            "end": end_val.isoformat(),
+        }
+        if indicator_type.strip():
+            params["type"] = indicator_type.strip()
+        try:
+            df = http_get_arrow(client, f"{base_url}/api/v1/indicators/export", params=params)
+        except Exception as exc:
+            st.error(f"Erreur: {exc}")
+            return
+        if df.empty:
+            st.info("Aucun indicateur pour ces critères.")
+            return
+        st.line_chart(df.pivot_table(index="date", columns="type", values="value"))
+        with st.expander(f"Données ({len(df)} lignes)"):
+            st.dataframe(df, use_container_width=True)
+
+
 def main() -> None:
     st.set_page_config(page_title="Observatoire Citadin", layout="wide")
     base_url = render_sidebar()
     client = get_http_client()
 
-    tabs = st.tabs(["Health", "Indice ATMO"])
+    tabs = st.tabs(["Health", "Indice ATMO", "Indicateurs"])
     with tabs[0]:
         tab_health(client, base_url)
     with tabs[1]:
         tab_atmo_indices(client, base_url)
+    with tabs[2]:
+        tab_indicators_export(client, base_url)
 
 
 if __name__ == "__main__":